@@ -0,0 +1,41 @@
+import contextlib
+import threading
+
+class CancelToken:
+    """
+    Cancellation flag of one run, e.g. one Start..Stop of the window.
+
+    A token belongs to the run rather than to a model, so cancelling it
+    never affects other users of a shared Transcriber, and a new run simply
+    starts with a new token.
+    """
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+_cancellation = threading.local()
+
+@contextlib.contextmanager
+def cancellation(token):
+    """
+    Makes every decode on this thread, with any Transcriber, stop as soon as
+    ``token`` is cancelled; the decoder raises DecodingCancelled and the
+    Transcriber methods return empty results.
+    """
+    previous = getattr(_cancellation, "token", None)
+    _cancellation.token = token
+    try:
+        yield
+    finally:
+        _cancellation.token = previous
+
+def cancellation_requested():
+    """True if the token of the calling thread's run has been cancelled."""
+    token = getattr(_cancellation, "token", None)
+    return token is not None and token.cancelled
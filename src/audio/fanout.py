@@ -0,0 +1,109 @@
+import threading
+
+from audio.pipeline import StageQueue
+from audio.translator import collect_batch
+
+class _LanguageWorker:
+    def __init__(self, lang, sink, maxsize):
+        # A language whose model is slow (or still loading) loses its oldest
+        # pending segments instead of growing without bound.
+        self.queue = StageQueue(f"translate-{lang}", maxsize, policy="drop_oldest")
+        self.stop_event = threading.Event()
+        self.sink = sink
+        self.thread = None
+
+class TranslationFanout:
+    """
+    Translates every English segment into several target languages at once.
+
+    Each target language has its own queue and worker thread that micro-batches
+    segments and calls its sink with the results, so a slow or still-loading
+    model for one language never holds up the others. Languages can be added
+    or removed while running with set_targets().
+    """
+    def __init__(self, translator, max_batch=16, max_wait=0.05, max_pending=64):
+        """
+        Parameters:
+            translator (Translator): Shared translator; its per-language
+                                     pipelines are loaded and cached by it.
+            max_batch (int): Maximum segments translated per batch.
+            max_wait (float): Seconds a worker waits to fill a batch.
+            max_pending (int): Segments queued per language before the
+                               oldest are dropped.
+        """
+        self.translator = translator
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self._workers = {}
+        self._stopped = []
+        self._lock = threading.Lock()
+
+    @property
+    def languages(self):
+        with self._lock:
+            return list(self._workers)
+
+    def set_targets(self, sinks):
+        """
+        Sets the active target languages.
+
+        Parameters:
+            sinks (dict): Maps language code to a callable that receives the
+                          list of translated segments of each batch, in order.
+        """
+        with self._lock:
+            for lang in list(self._workers):
+                if lang not in sinks:
+                    worker = self._workers.pop(lang)
+                    worker.stop_event.set()
+                    worker.queue.close()
+                    self._stopped.append(worker)
+            for lang, sink in sinks.items():
+                worker = self._workers.get(lang)
+                if worker is not None:
+                    worker.sink = sink
+                    continue
+                worker = _LanguageWorker(lang, sink, self.max_pending)
+                worker.thread = threading.Thread(target=self._run, args=(lang, worker),
+                                                 name=f"translate-{lang}", daemon=True)
+                self._workers[lang] = worker
+                worker.thread.start()
+
+    def submit(self, segment):
+        """Queues an English segment for every active language."""
+        with self._lock:
+            workers = list(self._workers.values())
+        for worker in workers:
+            worker.queue.put(segment)
+
+    def stop(self):
+        """Stops all workers; segments still queued are discarded."""
+        self.set_targets({})
+
+    def join(self, timeout=None):
+        """
+        Waits for stopped workers to exit. Returns True if all of them did.
+        """
+        with self._lock:
+            stopped = list(self._stopped)
+        for worker in stopped:
+            worker.thread.join(timeout)
+        with self._lock:
+            self._stopped = [w for w in self._stopped if w.thread.is_alive()]
+            return not self._stopped
+
+    def stats(self):
+        """Queue stats of every active language."""
+        with self._lock:
+            return [worker.queue.stats() for worker in self._workers.values()]
+
+    def _run(self, lang, worker):
+        while not worker.stop_event.is_set():
+            segments = collect_batch(worker.queue, max_batch=self.max_batch,
+                                     max_wait=self.max_wait, timeout=0.5)
+            if not segments:
+                continue
+            translations = self.translator.translate_batch(segments, lang)
+            if not worker.stop_event.is_set():
+                worker.sink(translations)
@@ -0,0 +1,73 @@
+import shutil
+import subprocess
+import wave
+import numpy as np
+
+from audio.resampler import StreamingResampler
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".m4a", ".ogg", ".opus", ".webm", ".mp4", ".aac")
+
+def stream_audio(path, chunk_seconds=30.0, sample_rate=16000, start=0.0):
+    """
+    Decodes an audio file piece by piece.
+
+    Yields mono float32 chunks of ``chunk_seconds`` at ``sample_rate`` (the
+    last one may be shorter), so memory use does not depend on the length of
+    the file. ffmpeg is used when it is installed (it is what Whisper itself
+    uses); otherwise only PCM WAV files can be read.
+
+    Parameters:
+        path (str): Audio or video file.
+        chunk_seconds (float): Length of each yielded chunk.
+        sample_rate (int): Output sample rate.
+        start (float): Offset in seconds to start decoding from.
+    """
+    if shutil.which("ffmpeg"):
+        yield from _stream_ffmpeg(path, chunk_seconds, sample_rate, start)
+    elif path.lower().endswith(".wav"):
+        yield from _stream_wav(path, chunk_seconds, sample_rate, start)
+    else:
+        raise RuntimeError(f"ffmpeg is required to read {path}")
+
+def _stream_ffmpeg(path, chunk_seconds, sample_rate, start):
+    command = ["ffmpeg", "-nostdin", "-loglevel", "error"]
+    if start > 0:
+        command += ["-ss", f"{start:.3f}"]
+    command += ["-i", path, "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le",
+                "-ar", str(sample_rate), "-"]
+    chunk_bytes = int(chunk_seconds * sample_rate) * 2
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            data = process.stdout.read(chunk_bytes)
+            if not data:
+                break
+            yield np.frombuffer(data, np.int16).astype(np.float32) / 32768.0
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed on {path}: {process.stderr.read().decode(errors='replace').strip()}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+
+def _stream_wav(path, chunk_seconds, sample_rate, start):
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise RuntimeError(f"Only 16-bit PCM WAV files can be read without ffmpeg: {path}")
+        channels = wav.getnchannels()
+        resampler = StreamingResampler(wav.getframerate(), sample_rate)
+        wav.setpos(min(int(start * wav.getframerate()), wav.getnframes()))
+        frames_per_chunk = max(1, int(chunk_seconds * wav.getframerate()))
+        while True:
+            data = wav.readframes(frames_per_chunk)
+            if not data:
+                break
+            samples = np.frombuffer(data, np.int16).astype(np.float32) / 32768.0
+            if channels > 1:
+                samples = samples.reshape(-1, channels).mean(axis=1)
+            yield resampler.process(samples)
+        tail = resampler.flush()
+        if len(tail):
+            yield tail
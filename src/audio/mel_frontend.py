@@ -0,0 +1,147 @@
+import numpy as np
+import torch
+import whisper
+
+N_FFT = whisper.audio.N_FFT
+HOP_LENGTH = whisper.audio.HOP_LENGTH
+N_FRAMES = whisper.audio.N_FRAMES
+
+class IncrementalMelFrontend:
+    """
+    Log-mel frontend for a growing stream of audio.
+
+    whisper.log_mel_spectrogram recomputes the STFT and mel filterbank for the
+    whole 30 s window on every call, although consecutive windows of a stream
+    share almost all of their audio. This frontend keeps the log-mel frames of
+    audio it has already seen and only runs the STFT over newly appended
+    samples, so its cost scales with the new audio rather than the window.
+
+    Frames are cached before Whisper's per-window normalisation (clamping to
+    8 dB below the window maximum and rescaling), which is applied cheaply
+    when a window is assembled. Frame ``i`` is centred on stream sample
+    ``i * HOP_LENGTH``, as in Whisper; the last couple of frames, whose
+    support reaches past the received audio, are computed on demand with
+    zero padding just like Whisper pads the end of a window.
+    """
+    def __init__(self, n_mels=80, device="cpu"):
+        """
+        Parameters:
+            n_mels (int): Number of mel bands of the model (80 or 128).
+            device (str): Device the assembled mel is moved to.
+        """
+        self.n_mels = n_mels
+        self.device = device
+        self._filters = whisper.audio.mel_filters("cpu", n_mels)
+        self._window = torch.hann_window(N_FFT)
+        self.reset()
+
+    def reset(self):
+        # Samples from _samples_offset onward that are still needed, either for
+        # frames not yet computed or as the left context of the next frame.
+        self._samples = np.zeros(0, dtype=np.float32)
+        self._samples_offset = 0
+        self._frames = np.zeros((self.n_mels, 0), dtype=np.float32)
+        self._frames_offset = 0
+        self._total_samples = 0
+
+    @property
+    def total_samples(self):
+        return self._total_samples
+
+    @property
+    def next_frame(self):
+        """Index of the first frame that is not cached yet."""
+        return self._frames_offset + self._frames.shape[1]
+
+    def append(self, audio):
+        """
+        Adds audio to the stream and computes every frame it completes.
+        """
+        audio = np.asarray(audio, dtype=np.float32)
+        if not len(audio):
+            return
+        if self._total_samples == 0:
+            # Whisper reflect-pads the start of the signal by half a window.
+            # Wait for enough samples to do the same.
+            self._samples = np.concatenate((self._samples, audio))
+            if len(self._samples) <= N_FFT // 2:
+                return
+            audio, self._samples = self._samples, np.zeros(0, dtype=np.float32)
+            pad = audio[1:N_FFT // 2 + 1][::-1]
+            self._samples = pad.copy()
+            self._samples_offset = -len(pad)
+        self._samples = np.concatenate((self._samples, audio))
+        self._total_samples += len(audio)
+
+        # Frame i needs samples [i*hop - n_fft/2, i*hop + n_fft/2).
+        end = self._samples_offset + len(self._samples)
+        last = (end - N_FFT // 2) // HOP_LENGTH
+        first = self.next_frame
+        if last < first:
+            return
+        start = first * HOP_LENGTH - N_FFT // 2 - self._samples_offset
+        stop = last * HOP_LENGTH + N_FFT // 2 - self._samples_offset
+        frames = self._log_mel(self._samples[start:stop])
+        self._frames = np.concatenate((self._frames, frames), axis=1)
+
+        keep_from = (last + 1) * HOP_LENGTH - N_FFT // 2
+        drop = keep_from - self._samples_offset
+        if drop > 0:
+            self._samples = self._samples[drop:]
+            self._samples_offset = keep_from
+
+    def trim(self, before_sample):
+        """
+        Forgets the frames of audio before ``before_sample`` (stream time).
+        """
+        drop = before_sample // HOP_LENGTH - self._frames_offset
+        if drop > 0:
+            drop = min(drop, self._frames.shape[1])
+            self._frames = self._frames[:, drop:]
+            self._frames_offset += drop
+
+    def window(self, start_sample, end_sample=None):
+        """
+        Assembles the normalised model input for audio between two stream
+        positions (at most 30 s apart). ``start_sample`` should be a multiple
+        of HOP_LENGTH: frames are cached on that grid, so another start is
+        rounded down to it and no longer matches whisper.log_mel_spectrogram.
+
+        Returns:
+            tuple: (mel tensor of shape (n_mels, 3000), number of frames that
+                   hold audio rather than padding).
+        """
+        if end_sample is None:
+            end_sample = self._total_samples
+        first = start_sample // HOP_LENGTH
+        num_frames = min((end_sample - start_sample) // HOP_LENGTH, N_FRAMES)
+        # Include the frames just past the end whose support still overlaps
+        # the audio, as Whisper does when it pads a window with silence.
+        last = min(-(-(end_sample + N_FFT // 2) // HOP_LENGTH), first + N_FRAMES)
+
+        cached_end = min(last, self.next_frame)
+        parts = [self._frames[:, max(first - self._frames_offset, 0):cached_end - self._frames_offset]]
+        if last > self.next_frame:
+            parts.append(self._tail_frames(self.next_frame, last))
+        log_spec = np.concatenate(parts, axis=1)
+        # Padding frames hold log10 of the clamped power of silence.
+        log_spec = np.pad(log_spec, ((0, 0), (0, N_FRAMES - log_spec.shape[1])),
+                          constant_values=-10.0)
+        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+        mel = torch.from_numpy((log_spec + 4.0) / 4.0)
+        return mel.to(self.device), num_frames
+
+    def _tail_frames(self, first, last):
+        # Frames whose support extends past the received audio; zero-padded.
+        start = first * HOP_LENGTH - N_FFT // 2 - self._samples_offset
+        needed = (last - 1) * HOP_LENGTH + N_FFT // 2 - self._samples_offset
+        samples = self._samples[max(start, 0):]
+        samples = np.pad(samples, (0, max(needed - start - len(samples), 0)))
+        return self._log_mel(samples)
+
+    def _log_mel(self, samples):
+        stft = torch.stft(torch.from_numpy(np.ascontiguousarray(samples)), N_FFT, HOP_LENGTH,
+                          window=self._window, center=False, return_complex=True)
+        magnitudes = stft.abs() ** 2
+        mel_spec = self._filters @ magnitudes
+        return torch.clamp(mel_spec, min=1e-10).log10().numpy()
@@ -0,0 +1,274 @@
+import contextlib
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+import numpy as np
+
+class Histogram:
+    """
+    Distribution of the most recent ``window`` observations of a value
+    (usually seconds), plus the all-time count, total and maximum.
+    """
+    def __init__(self, window=512):
+        self.values = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.values.append(value)
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def summary(self):
+        recent = np.fromiter(self.values, dtype=np.float64, count=len(self.values))
+        p50, p90, p99 = np.percentile(recent, (50, 90, 99)) if len(recent) else (0.0, 0.0, 0.0)
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": float(p50),
+            "p90": float(p90),
+            "p99": float(p99),
+            "max": self.max,
+        }
+
+class SegmentTrace:
+    """
+    Timestamps (time.perf_counter) of one segment at each stage it passes,
+    in order, e.g. captured -> dequeued -> transcribed -> displayed.
+    """
+    __slots__ = ("id", "marks")
+
+    def __init__(self, trace_id, captured_at=None):
+        self.id = trace_id
+        self.marks = [("captured", time.perf_counter() if captured_at is None else captured_at)]
+
+    def mark(self, stage, when=None):
+        self.marks.append((stage, time.perf_counter() if when is None else when))
+
+    def durations(self):
+        """Seconds spent between consecutive marks, keyed "a->b"."""
+        return {f"{a}->{b}": t_b - t_a
+                for (a, t_a), (b, t_b) in zip(self.marks, self.marks[1:])}
+
+    def total(self):
+        return self.marks[-1][1] - self.marks[0][1]
+
+class Metrics:
+    """
+    Thread-safe collection of counters, gauges, latency histograms and
+    per-segment traces.
+
+    Every stage records into the process-wide instance (see get_metrics());
+    recording is a dictionary update under a lock, cheap enough for the
+    capture and decode loops. snapshot() returns everything as plain data
+    for the stats panel, to_json()/export() write it out, and serve() makes
+    it available over HTTP as JSON or in the Prometheus text format.
+    """
+    def __init__(self, window=512, max_traces=100):
+        """
+        Parameters:
+            window (int): Observations kept per histogram for percentiles.
+            max_traces (int): Finished segment traces kept for inspection.
+        """
+        self.window = window
+        self.started = time.time()
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._traces = deque(maxlen=max_traces)
+        self._collectors = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # Set by audio.profiling when the first capture starts.
+        self.profiler = None
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name, value):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(self.window)
+            histogram.observe(value)
+
+    @contextlib.contextmanager
+    def timer(self, name, profile=True):
+        """
+        Observes the wall time of the ``with`` block under ``name``. While a
+        profiling capture runs, the block is also recorded as a profiler
+        region unless ``profile`` is False (e.g. for blocks that await).
+        """
+        profiler = self.profiler if profile else None
+        started = time.perf_counter()
+        try:
+            if profiler is not None and profiler.active:
+                with profiler.region(name):
+                    yield
+            else:
+                yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def start_trace(self, captured_at=None):
+        """
+        Starts a segment trace.
+
+        Parameters:
+            captured_at (float): perf_counter time the segment's audio was
+                                 captured; defaults to now.
+        """
+        return SegmentTrace(next(self._ids), captured_at)
+
+    def finish_trace(self, trace, stage="displayed"):
+        """
+        Marks the last stage of a trace and records its stage durations as
+        "segment.<a>-><b>" histograms and its total as "segment.end_to_end".
+        """
+        trace.mark(stage)
+        for name, seconds in trace.durations().items():
+            self.observe(f"segment.{name}", seconds)
+        self.observe("segment.end_to_end", trace.total())
+        with self._lock:
+            self._traces.append(trace)
+
+    def add_collector(self, name, collect):
+        """
+        Registers a callable whose result is included in every snapshot
+        under ``name``, e.g. the pipeline's queue stats.
+        """
+        with self._lock:
+            self._collectors[name] = collect
+
+    def remove_collector(self, name):
+        with self._lock:
+            self._collectors.pop(name, None)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+            self._traces.clear()
+            self.started = time.time()
+
+    def snapshot(self):
+        """
+        Returns every metric as plain data (JSON-serialisable).
+        """
+        with self._lock:
+            snapshot = {
+                "time": time.time(),
+                "uptime": time.time() - self.started,
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "histograms": {name: h.summary() for name, h in sorted(self._histograms.items())},
+                "traces": [{"id": t.id, "total": t.total(), "stages": t.durations()}
+                           for t in list(self._traces)[-10:]],
+            }
+            collectors = list(self._collectors.items())
+        for name, collect in collectors:
+            try:
+                snapshot[name] = collect()
+            except Exception as e:
+                snapshot[name] = {"error": str(e)}
+        return snapshot
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2, default=str)
+
+    def to_prometheus(self, prefix="scribulate"):
+        """
+        Renders counters, gauges and histogram summaries in the Prometheus
+        text exposition format.
+        """
+        def metric_name(name):
+            return prefix + "_" + "".join(c if c.isalnum() else "_" for c in name)
+
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot["counters"].items()):
+            lines += [f"# TYPE {metric_name(name)}_total counter",
+                      f"{metric_name(name)}_total {value}"]
+        for name, value in sorted(snapshot["gauges"].items()):
+            lines += [f"# TYPE {metric_name(name)} gauge", f"{metric_name(name)} {value}"]
+        for name, summary in snapshot["histograms"].items():
+            base = metric_name(name)
+            lines.append(f"# TYPE {base} summary")
+            for key, quantile in (("p50", "0.5"), ("p90", "0.9"), ("p99", "0.99")):
+                lines.append(f'{base}{{quantile="{quantile}"}} {summary[key]}')
+            lines += [f"{base}_sum {summary['mean'] * summary['count']}",
+                      f"{base}_count {summary['count']}"]
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Writes a JSON snapshot to ``path`` (atomically)."""
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+        os.replace(path + ".tmp", path)
+
+    def serve(self, port, host="127.0.0.1"):
+        """
+        Serves the metrics over HTTP on a daemon thread: JSON at /metrics,
+        Prometheus text at /metrics?format=prometheus.
+
+        Returns:
+            The running http.server instance (call shutdown() to stop it).
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path, _, query = self.path.partition("?")
+                if path != "/metrics":
+                    self.send_error(404)
+                    return
+                if "format=prometheus" in query:
+                    body, content_type = metrics.to_prometheus(), "text/plain; version=0.0.4"
+                else:
+                    body, content_type = metrics.to_json(), "application/json"
+                body = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+def describe_stages(snapshot):
+    """
+    One-line summary of where segment time goes: p50 / p90 of every stage.
+    """
+    stages = [name for name in snapshot["histograms"] if name.startswith("segment.")]
+    # The total goes last, after the individual stages.
+    stages.sort(key=lambda name: name == "segment.end_to_end")
+    return "  |  ".join(f"{name[len('segment.'):]} {snapshot['histograms'][name]['p50']:.2f}"
+                        f"/{snapshot['histograms'][name]['p90']:.2f} s" for name in stages)
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def get_metrics():
+    """Returns the process-wide Metrics."""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
@@ -0,0 +1,119 @@
+import gc
+import threading
+import time
+from collections import OrderedDict
+
+def model_size_mb(model):
+    """
+    Returns the memory held by a model's parameters and buffers in MB.
+    """
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors) / (1024 * 1024)
+
+class TranslationModelManager:
+    """
+    Loads MarianMT pipelines within a memory budget.
+
+    Pipelines are kept in least-recently-used order; when loading a model
+    pushes the resident total over ``memory_budget_mb``, the least recently
+    used models are unloaded. Models can be preloaded in the background (e.g.
+    as soon as the user picks a language) and are warmed up with one short
+    inference so the first real segment does not pay for lazy initialisation.
+
+    Attributes:
+        pipelines (OrderedDict): Loaded pipelines keyed by language code,
+                                 least recently used first.
+        stats (dict): Per-language load time, warm-up time and size in MB.
+    """
+    def __init__(self, model_map, memory_budget_mb=1200, warmup_text="Hello.", on_loaded=None):
+        """
+        Parameters:
+            model_map (dict): Language code to Hugging Face model name.
+            memory_budget_mb (float): Resident size above which models are evicted.
+            warmup_text (str): Sentence translated once after loading.
+            on_loaded (callable): Called with a one-line report after each load.
+        """
+        self.model_map = model_map
+        self.memory_budget_mb = memory_budget_mb
+        self.warmup_text = warmup_text
+        self.on_loaded = on_loaded
+        self.pipelines = OrderedDict()
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def get(self, lang):
+        """
+        Returns the pipeline for a language, loading it if necessary.
+        Returns None if the model cannot be loaded.
+        """
+        with self._lock:
+            if lang in self.pipelines:
+                self.pipelines.move_to_end(lang)
+                return self.pipelines[lang]
+            load_lock = self._load_locks.setdefault(lang, threading.Lock())
+        # One loader per language; other languages can load in parallel.
+        with load_lock:
+            with self._lock:
+                if lang in self.pipelines:
+                    self.pipelines.move_to_end(lang)
+                    return self.pipelines[lang]
+            translator = self._load(lang)
+            if translator is None:
+                return None
+            with self._lock:
+                self.pipelines[lang] = translator
+                self._evict(keep=lang)
+            return translator
+
+    def preload(self, lang):
+        """
+        Loads a language's model on a background thread.
+        """
+        if lang not in self.model_map or lang in self.pipelines:
+            return None
+        thread = threading.Thread(target=self.get, args=(lang,), name=f"preload-{lang}", daemon=True)
+        thread.start()
+        return thread
+
+    def _load(self, lang):
+        start = time.perf_counter()
+        try:
+            # Imported on first load so the GUI starts without transformers.
+            from transformers import pipeline
+            translator = pipeline("translation", model=self.model_map[lang])
+        except Exception as e:
+            print(f"Error loading translation model for {lang}: {e}")
+            return None
+        loaded = time.perf_counter()
+        try:
+            translator(self.warmup_text, max_length=32)
+        except Exception as e:
+            print(f"Warm-up failed for {lang}: {e}")
+        warmed = time.perf_counter()
+        stats = {
+            "load_time": loaded - start,
+            "warmup_time": warmed - loaded,
+            "size_mb": model_size_mb(translator.model),
+        }
+        self.stats[lang] = stats
+        if self.on_loaded:
+            self.on_loaded(f"Loaded {self.model_map[lang]} in {stats['load_time']:.1f} s "
+                           f"(warm-up {stats['warmup_time']:.2f} s, {stats['size_mb']:.0f} MB)")
+        return translator
+
+    def resident_mb(self):
+        return sum(self.stats[lang]["size_mb"] for lang in self.pipelines if lang in self.stats)
+
+    def _evict(self, keep):
+        # Called with self._lock held.
+        evicted = False
+        while self.resident_mb() > self.memory_budget_mb and len(self.pipelines) > 1:
+            lang = next(l for l in self.pipelines if l != keep)
+            del self.pipelines[lang]
+            evicted = True
+            if self.on_loaded:
+                self.on_loaded(f"Unloaded translation model for {lang} to stay within "
+                               f"{self.memory_budget_mb:.0f} MB")
+        if evicted:
+            gc.collect()
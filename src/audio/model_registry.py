@@ -0,0 +1,195 @@
+import threading
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded Whisper models.
+
+    Each (model_name, device, precision) combination is loaded once and the
+    same Transcriber is handed to every consumer that asks for it. Loads of
+    different keys can run in parallel; concurrent requests for the same key
+    wait for the single load in progress.
+    """
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    @staticmethod
+    def key(model_name="base", device=None, precision="fp32"):
+        return (model_name, device, precision)
+
+    def get(self, model_name="base", device=None, precision="fp32", **callbacks):
+        """
+        Returns the shared Transcriber for a key, loading it if necessary.
+
+        Parameters:
+            model_name (str): Whisper model name or checkpoint path.
+            device (str): Device, or None to auto-detect.
+            precision (str): Numeric precision of the model.
+            **callbacks: progress/download/stage callbacks forwarded to
+                         Transcriber when a load is actually performed.
+        """
+        key = self.key(model_name, device, precision)
+        with self._lock:
+            if key in self._models:
+                return self._models[key]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            with self._lock:
+                if key in self._models:
+                    return self._models[key]
+            from audio.transcriber import Transcriber
+            transcriber = Transcriber(model_name=model_name, device=device,
+                                      precision=precision, **callbacks)
+            with self._lock:
+                self._models[key] = transcriber
+            return transcriber
+
+    def load_async(self, model_name="base", device=None, precision="fp32",
+                   on_loaded=None, on_error=None, **callbacks):
+        """
+        Loads a model on a background thread and calls ``on_loaded`` with the
+        Transcriber (or ``on_error`` with the exception).
+        """
+        def run():
+            try:
+                transcriber = self.get(model_name, device, precision, **callbacks)
+            except Exception as e:
+                if on_error:
+                    on_error(e)
+                else:
+                    print(f"Error loading Whisper model {model_name}: {e}")
+                return
+            if on_loaded:
+                on_loaded(transcriber)
+
+        thread = threading.Thread(target=run, name=f"load-{model_name}", daemon=True)
+        thread.start()
+        return thread
+
+    def is_loaded(self, model_name="base", device=None, precision="fp32"):
+        with self._lock:
+            return self.key(model_name, device, precision) in self._models
+
+    def unload(self, model_name="base", device=None, precision="fp32"):
+        """
+        Drops the registry's reference; the model is freed once no consumer
+        still holds it.
+        """
+        with self._lock:
+            self._models.pop(self.key(model_name, device, precision), None)
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry():
+    """Returns the process-wide ModelRegistry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
+
+class SwappableTranscriber:
+    """
+    Stand-in for a Transcriber whose model can be replaced at runtime.
+
+    Calls are forwarded to the current Transcriber. switch() loads the new
+    model through the registry on a background thread while decoding carries
+    on with the old one; the swap itself is a single reference assignment,
+    so every call sees either the old model or the new one, never a mix.
+
+    The latest switch() wins: a load that finishes after a later request
+    (including a request for the model already active) is discarded. Models
+    that are replaced or discarded are unloaded from the registry, so only
+    the active model stays resident.
+    """
+    def __init__(self, transcriber, model_name="base", device=None, precision="fp32",
+                 registry=None, on_switched=None, on_model_changed=None):
+        """
+        Parameters:
+            transcriber: The initially active Transcriber.
+            model_name, device, precision: The key it was loaded under.
+            registry (ModelRegistry): Defaults to the process-wide registry.
+            on_switched (callable): Receives a message after each swap or failure.
+            on_model_changed (callable): Receives the model name after each
+                                         swap, e.g. to update a model picker.
+        """
+        self._current = transcriber
+        self.model_name = model_name
+        self.model_device = device
+        self.precision = precision
+        self.registry = registry or get_registry()
+        self.on_switched = on_switched
+        self.on_model_changed = on_model_changed
+        self._lock = threading.Lock()
+        # Bumped by every switch(); a load only swaps in if it is the latest.
+        self._generation = 0
+        self._target = self.key
+
+    @property
+    def key(self):
+        return (self.model_name, self.model_device, self.precision)
+
+    @property
+    def current(self):
+        return self._current
+
+    def switch(self, model_name, device=None, precision=None, on_failed=None):
+        """
+        Starts loading ``model_name`` and swaps it in once ready.
+        ``on_failed`` receives the error if the load fails, or a message if
+        a later switch() supersedes it.
+        Returns the loader thread, or None if it is already active.
+        """
+        device = self.model_device if device is None else device
+        precision = precision or self.precision
+        key = (model_name, device, precision)
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._target = key
+            if key == self.key:
+                # Also supersedes a load still in progress.
+                return None
+
+        def swap(transcriber):
+            with self._lock:
+                latest = generation == self._generation
+                if latest:
+                    replaced = self.key
+                    self._current = transcriber
+                    self.model_name, self.model_device, self.precision = key
+            if not latest:
+                self._release(key)
+                if on_failed:
+                    on_failed("superseded by a later switch")
+                return
+            self._release(replaced)
+            if self.on_switched:
+                self.on_switched(f"Switched Whisper model to '{model_name}' ({precision})")
+            if self.on_model_changed:
+                self.on_model_changed(model_name)
+
+        def failed(error):
+            with self._lock:
+                if generation == self._generation:
+                    self._target = self.key
+            if self.on_switched:
+                self.on_switched(f"Could not switch to '{model_name}': {error}")
+            if on_failed:
+                on_failed(error)
+
+        return self.registry.load_async(model_name, device, precision,
+                                        on_loaded=swap, on_error=failed)
+
+    def _release(self, key):
+        # Keeps the active model and the one a pending switch() waits for.
+        with self._lock:
+            if key in (self.key, self._target):
+                return
+        self.registry.unload(*key)
+
+    def __getattr__(self, name):
+        # Only called for attributes not defined on the proxy itself.
+        return getattr(self._current, name)
@@ -0,0 +1,210 @@
+import queue
+import threading
+import time
+
+from audio.pipeline import StageQueue, merge_audio
+
+SAMPLE_RATE = 16000
+WINDOW_SAMPLES = 30 * SAMPLE_RATE
+
+class _Stream:
+    def __init__(self, name, sink, maxsize):
+        # A stream that produces audio faster than it can be decoded merges
+        # its backlog into longer windows (up to 30 s) before losing any.
+        self.name = name
+        self.sink = sink
+        self.queue = StageQueue(f"stream-{name}", maxsize, policy="coalesce",
+                                coalesce=merge_audio(WINDOW_SAMPLES))
+        self.windows = 0
+        self.audio_seconds = 0.0
+        # Detected from the stream's first window with speech.
+        self.language = None
+
+class MultiStreamTranscriber:
+    """
+    Transcribes several independent audio streams (input devices, server
+    sessions, ...) on one shared model.
+
+    Every stream has its own bounded queue of ready windows. A single
+    decode thread collects windows from all streams, round-robin so a busy
+    stream cannot starve the others, stacks them into one
+    Transcriber.decode_batch() call and hands each transcript back to the
+    sink of the stream it came from, in that stream's order. Whisper pads
+    every window to 30 s anyway, so a batch of N windows costs far less
+    than N separate decodes. Every stream keeps its own language.
+    """
+    def __init__(self, transcriber, max_batch=8, max_wait=0.05, max_pending=8):
+        """
+        Parameters:
+            transcriber: Transcriber (or SwappableTranscriber) shared by all streams.
+            max_batch (int): Maximum windows decoded together.
+            max_wait (float): Seconds to wait for more streams to fill a batch.
+            max_pending (int): Windows queued per stream before the newest
+                               ones are merged.
+        """
+        self.transcriber = transcriber
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self.batches = 0
+        self.windows = 0
+        self.busy_seconds = 0.0
+        self._streams = {}
+        self._next = 0
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add_stream(self, name, sink):
+        """
+        Registers a stream.
+
+        Parameters:
+            name (str): Unique stream name.
+            sink (callable): Receives (name, text) for every decoded window,
+                             called on the decode thread.
+        """
+        with self._cond:
+            if name in self._streams:
+                raise ValueError(f"Stream already exists: {name}")
+            self._streams[name] = _Stream(name, sink, self.max_pending)
+
+    def remove_stream(self, name):
+        """Unregisters a stream; its queued windows are discarded."""
+        with self._cond:
+            stream = self._streams.pop(name, None)
+        if stream is not None:
+            stream.queue.close()
+
+    @property
+    def streams(self):
+        with self._cond:
+            return list(self._streams)
+
+    def submit(self, name, audio):
+        """
+        Queues 16 kHz mono audio of a stream. Audio longer than 30 s is split
+        into several windows; None items (utterance markers) are ignored.
+        """
+        if audio is None or not len(audio):
+            return
+        with self._cond:
+            stream = self._streams.get(name)
+        if stream is None:
+            return
+        for start in range(0, len(audio), WINDOW_SAMPLES):
+            stream.queue.put(audio[start:start + WINDOW_SAMPLES])
+        with self._cond:
+            self._cond.notify_all()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="multistream-decode", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the decode thread after the batch in progress."""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def join(self, timeout=None):
+        """Waits for the decode thread to exit. Returns True if it did."""
+        if self._thread is None:
+            return True
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def stats(self):
+        """
+        Batch counters and the queue stats of every stream.
+        """
+        with self._cond:
+            streams = list(self._streams.values())
+        return {
+            "batches": self.batches,
+            "windows": self.windows,
+            "mean_batch": self.windows / self.batches if self.batches else 0.0,
+            "busy_seconds": self.busy_seconds,
+            "queues": [stream.queue.stats() for stream in streams],
+        }
+
+    def _pending(self):
+        return sum(stream.queue.qsize() for stream in self._streams.values())
+
+    def _collect(self, timeout=0.5):
+        """
+        Takes up to ``max_batch`` windows, one per stream per round, starting
+        after the stream served first last time.
+
+        Returns:
+            list: (stream, audio) pairs; empty if nothing arrived in time.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._pending() or self._stop_event.is_set(), timeout):
+                return []
+            # Give other streams a moment to contribute to the batch.
+            deadline = time.monotonic() + self.max_wait
+            while (self._pending() < min(self.max_batch, len(self._streams))
+                   and not self._stop_event.is_set()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            streams = list(self._streams.values())
+            if not streams:
+                return []
+            self._next %= len(streams)
+            streams = streams[self._next:] + streams[:self._next]
+            self._next += 1
+        batch = []
+        while len(batch) < self.max_batch:
+            taken = 0
+            for stream in streams:
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    batch.append((stream, stream.queue.get_nowait()))
+                except queue.Empty:
+                    continue
+                taken += 1
+            if not taken:
+                break
+        return batch
+
+    def _decode(self, batch):
+        audios = [audio for _, audio in batch]
+        if hasattr(self.transcriber, "decode_batch"):
+            languages = [stream.language for stream, _ in batch]
+            texts = self.transcriber.decode_batch(audios, languages=languages)
+            for (stream, _), language in zip(batch, languages):
+                stream.language = stream.language or language
+            return texts
+        # Transcribers without batching (e.g. a process pool) decode in turn.
+        return ["".join(self.transcriber.transcribe_stream(audio, fast=True)) for audio in audios]
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+            started = time.perf_counter()
+            try:
+                texts = self._decode(batch)
+            except Exception as e:
+                print("Error during batched transcription:", e)
+                continue
+            self.busy_seconds += time.perf_counter() - started
+            self.batches += 1
+            self.windows += len(batch)
+            if self._stop_event.is_set():
+                break
+            for (stream, audio), text in zip(batch, texts):
+                stream.windows += 1
+                stream.audio_seconds += len(audio) / SAMPLE_RATE
+                try:
+                    stream.sink(stream.name, text)
+                except Exception as e:
+                    print(f"Error in sink of stream {stream.name}:", e)
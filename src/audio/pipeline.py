@@ -0,0 +1,252 @@
+import queue
+import threading
+import time
+from collections import deque
+import numpy as np
+
+from audio.metrics import get_metrics
+
+POLICIES = ("block", "drop_oldest", "drop_newest", "coalesce")
+
+def merge_audio(max_samples):
+    """
+    Returns a coalesce function that joins adjacent audio chunks up to
+    ``max_samples``. None items (utterance markers) are never merged.
+    """
+    def merge(older, newer):
+        if older is None or newer is None or len(older) + len(newer) > max_samples:
+            return None
+        return np.concatenate((older, newer))
+    return merge
+
+def merge_text(older, newer):
+    return older + newer
+
+def describe(stats):
+    """
+    One-line summary of queue stats: depth, age of the oldest item and
+    number of dropped items per stage.
+    """
+    parts = []
+    for stage in stats:
+        part = f"{stage['name']}: {stage['depth']}"
+        if stage["depth"]:
+            part += f" ({stage['age']:.1f} s)"
+        if stage["dropped"]:
+            part += f", {stage['dropped']} dropped"
+        parts.append(part)
+    return "  |  ".join(parts)
+
+class StageQueue:
+    """
+    Bounded queue between two pipeline stages.
+
+    What happens when a producer finds the queue full depends on ``policy``:
+
+    * ``"block"`` waits for space (backpressure on the producer),
+    * ``"drop_oldest"`` discards the oldest item,
+    * ``"drop_newest"`` discards the new item,
+    * ``"coalesce"`` merges the new item into the newest queued one with the
+      ``coalesce`` function, falling back to dropping the oldest item when it
+      returns None.
+
+    close() wakes every blocked producer and consumer, so stage threads can be
+    stopped even while waiting. The get/put/qsize interface matches
+    queue.Queue, and every item's enqueue time is kept so the age of the
+    oldest waiting item can be reported and the time each item waited is
+    recorded as the "queue.<name>.wait" metric.
+    """
+    def __init__(self, name, maxsize=0, policy="block", coalesce=None):
+        """
+        Parameters:
+            name (str): Stage name used in stats.
+            maxsize (int): Capacity in items; 0 means unbounded.
+            policy (str): One of POLICIES.
+            coalesce (callable): (older, newer) -> merged item or None.
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.name = name
+        self.maxsize = maxsize
+        self.policy = policy
+        self.coalesce = coalesce
+        self.closed = False
+        self.dropped = 0
+        self.coalesced = 0
+        # Enqueue time (perf_counter) of the item returned by the last get();
+        # only meaningful to the queue's single consumer.
+        self.last_enqueued = None
+        self.metrics = get_metrics()
+        self._wait_metric = f"queue.{name}.wait"
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def _full(self):
+        return self.maxsize > 0 and len(self._items) >= self.maxsize
+
+    def put(self, item, block=True, timeout=None):
+        """
+        Adds an item according to the queue's policy.
+
+        Returns:
+            bool: False if the item was discarded (queue closed or policy
+            "drop_newest"). Raises queue.Full if a blocking put times out.
+        """
+        with self._cond:
+            if self.closed:
+                return False
+            if self._full():
+                if self.policy == "block":
+                    if not block:
+                        raise queue.Full
+                    deadline = None if timeout is None else time.monotonic() + timeout
+                    while self._full() and not self.closed:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            raise queue.Full
+                        self._cond.wait(remaining)
+                    if self.closed:
+                        return False
+                elif self.policy == "drop_newest":
+                    self.dropped += 1
+                    return False
+                else:
+                    if self.policy == "coalesce" and self.coalesce is not None and self._items:
+                        enqueued, newest = self._items[-1]
+                        merged = self.coalesce(newest, item)
+                        if merged is not None:
+                            self._items[-1] = (enqueued, merged)
+                            self.coalesced += 1
+                            self._cond.notify_all()
+                            return True
+                    self._items.popleft()
+                    self.dropped += 1
+            self._items.append((time.perf_counter(), item))
+            self._cond.notify_all()
+            return True
+
+    def put_nowait(self, item):
+        return self.put(item, block=False)
+
+    def get(self, block=True, timeout=None):
+        """
+        Removes and returns the oldest item. Raises queue.Empty when nothing
+        arrives in time or the queue is closed and drained.
+        """
+        with self._cond:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not self._items:
+                if not block or self.closed:
+                    raise queue.Empty
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise queue.Empty
+                self._cond.wait(remaining)
+            enqueued, item = self._items.popleft()
+            self.last_enqueued = enqueued
+            self._cond.notify_all()
+        self.metrics.observe(self._wait_metric, time.perf_counter() - enqueued)
+        return item
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def task_done(self):
+        # Accepted for queue.Queue compatibility; StageQueue has no join().
+        pass
+
+    def qsize(self):
+        with self._cond:
+            return len(self._items)
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def clear(self):
+        with self._cond:
+            self._items.clear()
+            self._cond.notify_all()
+
+    def close(self):
+        """Discards new items from now on and wakes all waiting threads."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def reopen(self):
+        with self._cond:
+            self._items.clear()
+            self.closed = False
+            self.dropped = 0
+            self.coalesced = 0
+
+    def stats(self):
+        """
+        Returns the queue's depth, the age in seconds of its oldest item and
+        how many items were dropped or coalesced.
+        """
+        with self._cond:
+            age = time.perf_counter() - self._items[0][0] if self._items else 0.0
+            return {
+                "name": self.name,
+                "depth": len(self._items),
+                "maxsize": self.maxsize,
+                "age": age,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+            }
+
+class Pipeline:
+    """
+    Owns the queues and threads of a staged pipeline and their lifecycle.
+
+    start() launches the stage threads; stop() sets ``stop_event`` and closes
+    every queue so that threads blocked on a queue wake up at once. A new run
+    can only be started after all threads of the previous one have exited
+    (see running()), so repeated start/stop never leaves threads behind.
+    """
+    def __init__(self):
+        self.stop_event = threading.Event()
+        self.queues = {}
+        self._threads = []
+
+    def add_queue(self, name, maxsize=0, policy="block", coalesce=None):
+        stage_queue = StageQueue(name, maxsize, policy, coalesce)
+        self.queues[name] = stage_queue
+        return stage_queue
+
+    def start(self, stages):
+        """
+        Starts one thread per stage.
+
+        Parameters:
+            stages (dict): Thread name to target callable.
+        """
+        if self.running():
+            raise RuntimeError("Pipeline threads from the previous run are still running")
+        self.stop_event.clear()
+        for stage_queue in self.queues.values():
+            stage_queue.reopen()
+        self._threads = [threading.Thread(target=target, name=name, daemon=True)
+                         for name, target in stages.items()]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        for stage_queue in self.queues.values():
+            stage_queue.close()
+
+    def running(self):
+        """Returns the names of stage threads that have not exited yet."""
+        return [thread.name for thread in self._threads if thread.is_alive()]
+
+    def join(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            thread.join(remaining)
+        return not self.running()
+
+    def stats(self):
+        return [stage_queue.stats() for stage_queue in self.queues.values()]
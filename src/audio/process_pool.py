@@ -0,0 +1,269 @@
+import itertools
+import multiprocessing as mp
+import multiprocessing.connection
+import os
+import threading
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+import numpy as np
+
+def _attach(name):
+    # The parent owns (and unlinks) every block. Before Python 3.13 attaching
+    # always registers the block, but spawned workers share the parent's
+    # resource tracker, where it is already registered.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+def _worker_main(model_name, device, precision, cpus, tasks, results):
+    """
+    Entry point of a worker process: loads its own Transcriber and serves
+    jobs until it receives None.
+    """
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    import torch
+    from audio.model_registry import get_registry
+    if cpus:
+        torch.set_num_threads(len(cpus))
+    transcriber = get_registry().get(model_name, device, precision)
+    results.put(("ready", os.getpid(), None))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        job_id, method, shm_name, length, kwargs = task
+        shm = _attach(shm_name)
+        try:
+            audio = np.ndarray((length,), dtype=np.float32, buffer=shm.buf)
+            try:
+                if method == "segments":
+                    result = list(transcriber.transcribe_stream(audio, **kwargs))
+                elif method == "words":
+                    result = transcriber.transcribe_words(audio, **kwargs)
+                else:
+                    result = transcriber.transcribe(audio, **kwargs)
+                error = None
+            except Exception as e:
+                result, error = None, repr(e)
+            del audio
+        finally:
+            try:
+                shm.close()
+            except BufferError:
+                # A tensor still views the block; it is released with the process.
+                pass
+        results.put((job_id, result, error))
+
+def split_cpus(workers):
+    """
+    Divides the CPUs this process may run on evenly between ``workers``.
+    Returns one CPU list per worker, or None where affinity is unsupported.
+    """
+    if not hasattr(os, "sched_getaffinity"):
+        return [None] * workers
+    cpus = sorted(os.sched_getaffinity(0))
+    per_worker = max(1, len(cpus) // workers)
+    return [cpus[(i * per_worker) % len(cpus):][:per_worker] for i in range(workers)]
+
+class TranscriberPool:
+    """
+    Runs Whisper in separate worker processes so decoding does not compete
+    with the GUI, capture and translation threads for the GIL.
+
+    Each job's audio is written once into a ``multiprocessing.shared_memory``
+    block; only the block's name travels over the task queue, and the worker
+    maps the same memory as a NumPy array. Results come back over a result
+    queue and are matched to their callers by a dispatcher thread.
+
+    The pool offers the same transcribe / transcribe_stream / transcribe_words
+    methods as Transcriber, so it can be used in its place.
+
+    If a worker process dies (a crash, or killed while loading), the pool is
+    broken: every pending job fails, as do later submissions, and
+    wait_ready() returns False.
+    """
+    def __init__(self, model_name="base", workers=1, device="cpu", cpu_affinity=None, precision="fp32"):
+        """
+        Parameters:
+            model_name (str): Whisper model each worker loads.
+            workers (int): Number of worker processes.
+            device (str): Device for the workers' models.
+            cpu_affinity (list | str): One list of CPU ids per worker, "auto"
+                                       to split the available CPUs evenly, or
+                                       None for no pinning.
+            precision (str): Transcriber precision mode for the workers.
+        """
+        self.model_name = model_name
+        self.device = device
+        if cpu_affinity == "auto":
+            cpu_affinity = split_cpus(workers)
+        cpu_affinity = cpu_affinity or [None] * workers
+
+        context = mp.get_context("spawn")
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._job_ids = itertools.count()
+        # Guards the ready count and the broken/closing state.
+        self._state = threading.Condition()
+        self._ready_count = 0
+        self._broken = None
+        self._closing = False
+        self._processes = []
+        for cpus in cpu_affinity[:workers]:
+            process = context.Process(target=_worker_main,
+                                      args=(model_name, device, precision, cpus,
+                                            self._tasks, self._results),
+                                      daemon=True)
+            process.start()
+            self._processes.append(process)
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+        self._monitor_thread = threading.Thread(target=self._monitor, daemon=True)
+        self._monitor_thread.start()
+
+    def wait_ready(self, timeout=600.0):
+        """
+        Blocks until every worker has loaded its model (including a first
+        download), a worker dies, or ``timeout`` seconds pass.
+
+        Returns:
+            bool: True if every worker is ready; otherwise ``error`` says why.
+        """
+        with self._state:
+            ready = self._state.wait_for(
+                lambda: self._ready_count == len(self._processes) or self._broken, timeout)
+            return bool(ready) and not self._broken
+
+    @property
+    def error(self):
+        """Why the pool is unusable, or None."""
+        with self._state:
+            if self._broken:
+                return self._broken
+            if self._ready_count < len(self._processes):
+                return "Transcription workers are still loading"
+            return None
+
+    def submit(self, audio, method="segments", **kwargs):
+        """
+        Queues a job and returns a Future for its result.
+
+        Parameters:
+            audio (np.ndarray): 16 kHz mono audio.
+            method (str): "segments", "words" or "text".
+        """
+        audio = np.asarray(audio, dtype=np.float32)
+        shm = shared_memory.SharedMemory(create=True, size=max(audio.nbytes, 1))
+        np.ndarray(audio.shape, dtype=np.float32, buffer=shm.buf)[:] = audio
+        future = Future()
+        job_id = next(self._job_ids)
+        # _broken is set before _fail_pending takes this lock, so a job is
+        # either failed by it or refused here, never left pending.
+        with self._pending_lock:
+            broken = self._broken
+            if not broken:
+                self._pending[job_id] = (future, shm)
+        if broken:
+            shm.close()
+            shm.unlink()
+            raise RuntimeError(broken)
+        self._tasks.put((job_id, method, shm.name, len(audio), kwargs))
+        return future
+
+    def transcribe(self, audio: np.ndarray) -> str:
+        try:
+            return self.submit(audio, method="text").result()
+        except Exception as e:
+            print("Error during transcription:", e)
+            return ""
+
+    def transcribe_stream(self, audio: np.ndarray, fast=False):
+        try:
+            segments = self.submit(audio, method="segments", fast=fast).result()
+        except Exception as e:
+            print("Error during streaming transcription:", e)
+            segments = [""]
+        yield from segments
+
+    def transcribe_words(self, audio: np.ndarray, initial_prompt=None):
+        try:
+            return self.submit(audio, method="words", initial_prompt=initial_prompt).result()
+        except Exception as e:
+            print("Error during word-level transcription:", e)
+            return []
+
+    def _dispatch(self):
+        while True:
+            try:
+                job_id, result, error = self._results.get()
+            except (EOFError, OSError):
+                break
+            if job_id is None:
+                break
+            if job_id == "ready":
+                with self._state:
+                    self._ready_count += 1
+                    self._state.notify_all()
+                continue
+            with self._pending_lock:
+                job = self._pending.pop(job_id, None)
+            if job is None:
+                # Already failed by _fail_pending.
+                continue
+            future, shm = job
+            shm.close()
+            shm.unlink()
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(error))
+
+    def _monitor(self):
+        # A worker only exits on its own if it crashed; nobody can tell which
+        # of the queued jobs it had taken, so all pending jobs fail.
+        sentinels = {process.sentinel: process for process in self._processes}
+        while sentinels:
+            for sentinel in mp.connection.wait(list(sentinels), timeout=1.0):
+                process = sentinels.pop(sentinel)
+                process.join(timeout=1)  # so exitcode is set
+                with self._state:
+                    if self._closing:
+                        return
+                    self._broken = (f"Transcription worker {process.pid} exited unexpectedly "
+                                    f"(exit code {process.exitcode})")
+                    self._state.notify_all()
+                print(self._broken)
+                self._fail_pending(self._broken)
+                return
+            with self._state:
+                if self._closing:
+                    return
+
+    def _fail_pending(self, message):
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for future, shm in pending.values():
+            shm.close()
+            shm.unlink()
+            future.set_exception(RuntimeError(message))
+
+    def close(self):
+        """Stops the workers and fails any job still pending."""
+        with self._state:
+            self._closing = True
+            self._broken = self._broken or "Transcriber pool closed"
+            self._state.notify_all()
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._results.put((None, None, None))
+        self._dispatcher.join(timeout=5)
+        self._fail_pending("Transcriber pool closed")
@@ -0,0 +1,289 @@
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from audio.metrics import get_metrics
+
+class Profiler:
+    """
+    On-demand profiling captures of a bounded length.
+
+    While a capture runs:
+
+    * every ``Metrics.timer`` block (Whisper decodes, MarianMT generations,
+      ...) becomes a region, recorded with the torch profiler on the thread
+      that runs it. torch allows one profiler at a time, so a region that
+      overlaps another thread's region is recorded without operator detail.
+    * a sampler thread records the Python stack of every other thread every
+      ``sample_interval`` seconds.
+
+    Regions and samples are labelled with the segment being processed on
+    their thread (see segment()). When the capture ends, after ``duration``
+    seconds or on stop(), a Chrome trace (open in chrome://tracing or
+    https://ui.perfetto.dev) and a folded-stacks file (for flamegraph.pl or
+    speedscope) are written to ``output_dir``. A region still running when
+    the capture ends is recorded up to the end of the capture, without
+    operator detail. Outside captures region() and segment() cost next to
+    nothing.
+    """
+    def __init__(self, metrics=None):
+        self.metrics = metrics or get_metrics()
+        self.active = False
+        self._local = threading.local()
+        # Segment of every thread, for the sampler (which cannot read the
+        # other threads' locals).
+        self._thread_segments = {}
+        self._lock = threading.Lock()
+        self._torch_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._sampler = None
+        self._torch_ready = False
+
+    def start(self, duration=20.0, output_dir="profiles", sample_interval=0.005,
+              max_torch_events=200000, on_finished=None):
+        """
+        Starts a capture.
+
+        Parameters:
+            duration (float): Seconds until the capture stops by itself.
+            output_dir (str): Directory for the trace files.
+            sample_interval (float): Seconds between Python stack samples.
+            max_torch_events (int): Operator events kept before further
+                                    regions are recorded without them.
+            on_finished (callable): Receives the list of written paths (or
+                                    an error message string), called on the
+                                    sampler thread.
+
+        Returns:
+            bool: False if a capture is already running.
+        """
+        if self.active:
+            return False
+        self._warm_up_torch()
+        with self._lock:
+            if self.active:
+                return False
+            self.output_dir = output_dir
+            self.on_finished = on_finished
+            self.max_torch_events = max_torch_events
+            self._regions = []
+            # Regions that have started but not finished, by id.
+            self._open_regions = {}
+            self._samples = []
+            self._thread_names = {}
+            self._torch_events = 0
+            self._started = time.perf_counter()
+            self._started_wall = time.time()
+            self._stop_event.clear()
+            self.active = True
+        self.metrics.profiler = self
+        self._sampler = threading.Thread(target=self._sample, args=(duration, sample_interval),
+                                         name="profiler-sampler", daemon=True)
+        self._sampler.start()
+        return True
+
+    def _warm_up_torch(self):
+        # The profiler's first start in a process takes seconds; pay for it
+        # here instead of inside the first recorded region.
+        if self._torch_ready:
+            return
+        try:
+            import torch
+            with torch.profiler.profile(activities=[torch.profiler.ProfilerActivity.CPU]):
+                pass
+        except Exception as e:
+            print("Torch profiler unavailable, recording regions without operator detail:", e)
+        self._torch_ready = True
+
+    def stop(self):
+        """Ends the running capture early; its files are still written."""
+        self._stop_event.set()
+
+    @contextlib.contextmanager
+    def segment(self, segment_id):
+        """Labels regions and samples on this thread with ``segment_id``."""
+        previous = getattr(self._local, "segment", None)
+        ident = threading.get_ident()
+        self._local.segment = self._thread_segments[ident] = segment_id
+        try:
+            yield
+        finally:
+            self._local.segment = self._thread_segments[ident] = previous
+
+    @property
+    def current_segment(self):
+        return getattr(self._local, "segment", None)
+
+    @contextlib.contextmanager
+    def region(self, name):
+        """
+        Records the ``with`` block as a named region of the running capture,
+        with torch operator detail when the torch profiler is free.
+        """
+        if not self.active:
+            yield
+            return
+        segment = self.current_segment
+        label = name if segment is None else f"{name} [segment {segment}]"
+        thread = threading.current_thread()
+        torch_profile = None
+        if self._torch_events < self.max_torch_events and self._torch_lock.acquire(blocking=False):
+            try:
+                import torch
+                activities = [torch.profiler.ProfilerActivity.CPU]
+                if torch.cuda.is_available():
+                    activities.append(torch.profiler.ProfilerActivity.CUDA)
+                torch_profile = torch.profiler.profile(activities=activities)
+                torch_profile.start()
+            except Exception:
+                torch_profile = None
+                self._torch_lock.release()
+        started = time.perf_counter()
+        region = {"name": label, "segment": segment, "thread": thread.ident,
+                  "thread_name": thread.name, "start": started, "end": None, "torch": []}
+        with self._lock:
+            if self.active:
+                self._open_regions[id(region)] = region
+        try:
+            if torch_profile is not None:
+                import torch
+                with torch.profiler.record_function(label):
+                    yield
+            else:
+                yield
+        finally:
+            ended = time.perf_counter()
+            events = []
+            if torch_profile is not None:
+                try:
+                    torch_profile.stop()
+                    events = self._torch_trace_events(torch_profile)
+                except Exception as e:
+                    print("Error while collecting the torch profile:", e)
+                finally:
+                    self._torch_lock.release()
+            with self._lock:
+                # Once the capture has ended the region has been recorded
+                # clipped (or was started too late to take part).
+                if self.active and self._open_regions.pop(id(region), None) is not None:
+                    self._torch_events += len(events)
+                    region.update(end=ended, torch=events)
+                    self._regions.append(region)
+
+    @staticmethod
+    def _torch_trace_events(torch_profile):
+        handle, path = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+        try:
+            torch_profile.export_chrome_trace(path)
+            with open(path, encoding="utf-8") as f:
+                trace = json.load(f)
+        finally:
+            os.remove(path)
+        events = trace["traceEvents"] if isinstance(trace, dict) else trace
+        return [event for event in events if event.get("ph") == "X" and "ts" in event]
+
+    def _sample(self, duration, interval):
+        deadline = self._started + duration
+        own = threading.get_ident()
+        while not self._stop_event.wait(interval) and time.perf_counter() < deadline:
+            now = time.perf_counter()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.reverse()
+                self._samples.append((now, ident, self._thread_segments.get(ident), tuple(stack)))
+                self._thread_names.setdefault(ident, names.get(ident, str(ident)))
+        with self._lock:
+            self.active = False
+            ended = time.perf_counter()
+            for region in self._open_regions.values():
+                region.update(end=ended, clipped=True)
+                self._regions.append(region)
+            self._open_regions = {}
+        try:
+            result = self._write()
+        except Exception as e:
+            result = f"Could not write the profile: {e}"
+        if self.on_finished:
+            self.on_finished(result)
+        else:
+            print(result)
+
+    def _write(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self._started_wall))
+        base = os.path.join(self.output_dir, f"profile-{stamp}")
+        pid = os.getpid()
+
+        def us(when):
+            return (when - self._started) * 1e6
+
+        events = []
+        for region in self._regions:
+            self._thread_names.setdefault(region["thread"], region["thread_name"])
+            args = {"segment": region["segment"]}
+            if region.get("clipped"):
+                args["clipped"] = True
+            events.append({"name": region["name"], "cat": "region", "ph": "X", "pid": pid,
+                           "tid": region["thread"], "ts": us(region["start"]),
+                           "dur": us(region["end"]) - us(region["start"]), "args": args})
+            if region["torch"]:
+                # torch uses its own clock; align its first event with the region start.
+                offset = us(region["start"]) - min(event["ts"] for event in region["torch"])
+                for event in region["torch"]:
+                    events.append({**event, "cat": "torch", "pid": pid, "tid": region["thread"],
+                                   "ts": event["ts"] + offset,
+                                   "args": {**event.get("args", {}), **args}})
+
+        # Turn the stack samples into nested slices per thread.
+        folded = {}
+        by_thread = {}
+        for when, ident, segment, stack in self._samples:
+            by_thread.setdefault(ident, []).append((when, stack))
+            label = "idle" if segment is None else f"segment {segment}"
+            key = ";".join((self._thread_names.get(ident, str(ident)), label) + stack)
+            folded[key] = folded.get(key, 0) + 1
+        for ident, samples in by_thread.items():
+            open_frames = []  # (frame, start)
+            for when, stack in samples + [(samples[-1][0], ())]:
+                common = 0
+                while (common < len(open_frames) and common < len(stack)
+                       and open_frames[common][0] == stack[common]):
+                    common += 1
+                for frame, start in reversed(open_frames[common:]):
+                    events.append({"name": frame, "cat": "python", "ph": "X", "pid": pid,
+                                   "tid": ident, "ts": us(start), "dur": us(when) - us(start)})
+                open_frames = open_frames[:common] + [(frame, when) for frame in stack[common:]]
+
+        events += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": ident, "args": {"name": name}}
+                   for ident, name in self._thread_names.items()]
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                       "otherData": {"started": self._started_wall,
+                                     "segments": sorted({r["segment"] for r in self._regions
+                                                         if r["segment"] is not None})}}, f)
+        with open(base + ".folded", "w", encoding="utf-8") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in sorted(folded.items()))
+        return [base + ".json", base + ".folded"]
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+def get_profiler():
+    """Returns the process-wide Profiler."""
+    global _profiler
+    with _profiler_lock:
+        if _profiler is None:
+            _profiler = Profiler()
+        return _profiler
@@ -1,13 +1,22 @@
+import time
 import sounddevice as sd
 import numpy as np
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from audio.metrics import get_metrics
+from audio.ring_buffer import RingBuffer
+from audio.resampler import StreamingResampler, resample
+
 class Recorder(QObject):
     """
     Recorder encapsulates functionality to record audio from the default microphone.
     
+    Audio is captured at the device's native rate and resampled to
+    ``target_rate`` (16 kHz mono for Whisper) before it is handed out.
+
     Attributes:
-        sample_rate (int): The sampling rate in Hz.
+        sample_rate (int): The device capture rate in Hz.
+        target_rate (int): The rate of the audio returned by record()/read().
         channels (int): Number of audio channels.
         dtype (str): Data type for audio samples.
     """
@@ -18,18 +27,164 @@ class Recorder(QObject):
     def __init__(self, sample_rate=16000, channels=1, dtype='float32'):
         self.device = sd.query_devices(kind='input')
         self.sample_rate = self.device['default_samplerate'] 
+        self.target_rate = sample_rate
         self.channels = channels
         self.dtype = dtype
+        self.resampler = StreamingResampler(self.sample_rate, self.target_rate)
+
+        # Streaming capture state (see start_stream).
+        self.stream = None
+        self.ring_buffer = None
+        self.buffer_seconds = 30
+        # Capture health, counted on the PortAudio thread and published as
+        # "capture.*" metrics by the reading thread (see _report_capture).
+        self.metrics = get_metrics()
+        self.input_overflows = 0
+        self._callback_seconds = 0.0
+        self._callbacks = 0
+        self._reported_overflows = 0
+        self._reported_overruns = 0
+        self._last_warning = 0.0
+        self._unwarned = [0, 0]
 
         super().__init__()
 
     def set_input_device(self, device=None):
         if device:
+            was_streaming = self.is_streaming
+            if was_streaming:
+                self.stop_stream()
             self.device=device
             self.sample_rate = self.device['default_samplerate'] 
+            self.resampler = StreamingResampler(self.sample_rate, self.target_rate)
             print(f"Setting Device to: {device}")
+            if was_streaming:
+                self.start_stream(self.buffer_seconds)
+
+    @property
+    def is_streaming(self):
+        return self.stream is not None
+
+    def start_stream(self, buffer_seconds=30):
+        """
+        Starts continuous capture into a preallocated ring buffer.
+
+        A persistent sd.InputStream delivers audio to a callback that only
+        copies into the ring buffer, so no samples are lost between reads and
+        no thread is blocked while the device is recording. Audio in the ring
+        buffer is always mono float32 at ``target_rate``.
+
+        Parameters:
+            buffer_seconds (float): Amount of audio the ring buffer can hold.
+        """
+        if self.stream is not None:
+            return
+        self.buffer_seconds = buffer_seconds
+        capacity = int(buffer_seconds * self.target_rate)
+        self.resampler.reset()
+        if self.ring_buffer is None or self.ring_buffer.capacity != capacity:
+            self.ring_buffer = RingBuffer(capacity)
+        else:
+            self.ring_buffer.reopen()
+        self._reported_overruns = self.ring_buffer.overruns
+        try:
+            self.stream = sd.InputStream(samplerate=self.sample_rate,
+                                         channels=self.channels,
+                                         dtype='float32',
+                                         device=self.device['index'],
+                                         # ~50 ms blocks keep the per-callback
+                                         # resampling overhead small.
+                                         blocksize=int(self.sample_rate * 0.05),
+                                         callback=self._stream_callback)
+            self.stream.start()
+        except Exception as e:
+            print("Error while starting audio stream:", e)
+            self.log_signal.emit(f"Error while starting audio stream: {e}")
+            self.stream = None
+
+    def stop_stream(self):
+        """
+        Stops continuous capture and wakes any reader blocked in read().
+        """
+        stream, self.stream = self.stream, None
+        if stream is not None:
+            try:
+                stream.stop()
+                stream.close()
+            except Exception as e:
+                print("Error while stopping audio stream:", e)
+                self.log_signal.emit(f"Error while stopping audio stream: {e}")
+        if self.ring_buffer is not None:
+            self.ring_buffer.close()
+
+    def _stream_callback(self, indata, frames, time_info, status):
+        # Runs on the PortAudio thread: no allocation-heavy work, no blocking
+        # (so plain counters here rather than the metrics lock).
+        started = time.perf_counter()
+        if status.input_overflow:
+            self.input_overflows += 1
+        if self.channels == 1:
+            mono = indata[:, 0]
+        else:
+            mono = indata.mean(axis=1)
+        self.ring_buffer.write(self.resampler.process(mono))
+        self._callback_seconds += time.perf_counter() - started
+        self._callbacks += 1
+
+    def _report_capture(self, warn_interval=5.0):
+        """
+        Publishes capture health as metrics and warns through log_signal
+        (at most every ``warn_interval`` seconds) when audio was lost.
+        """
+        ring_buffer = self.ring_buffer
+        overflows = self.input_overflows - self._reported_overflows
+        overruns = ring_buffer.overruns - self._reported_overruns
+        self.metrics.set_gauge("capture.buffered_seconds", ring_buffer.available() / self.target_rate)
+        if self._callbacks:
+            self.metrics.set_gauge("capture.callback_ms", 1000.0 * self._callback_seconds / self._callbacks)
+        if overflows or overruns:
+            self._reported_overflows += overflows
+            self._reported_overruns += overruns
+            self.metrics.increment("capture.device_overflows", overflows)
+            self.metrics.increment("capture.lost_samples", overruns)
+            self._unwarned[0] += overflows
+            self._unwarned[1] += overruns
+        now = time.monotonic()
+        if any(self._unwarned) and now - self._last_warning >= warn_interval:
+            self._last_warning = now
+            overflows, overruns = self._unwarned
+            self._unwarned = [0, 0]
+            self.log_signal.emit(f"Audio capture fell behind: {overflows} device overflow(s), "
+                                 f"{overruns / self.target_rate:.2f} s of audio overwritten")
+
+    def read(self, duration, timeout=None):
+        """
+        Returns the next ``duration`` seconds of streamed audio, blocking
+        until they have been captured.
+
+        The result is a view into the ring buffer (no copy); copy it if it has
+        to outlive the next ``buffer_seconds`` of capture.
+
+        Returns:
+            np.ndarray: Mono audio, or None if the stream was stopped or the
+            timeout expired.
+        """
+        if self.ring_buffer is None:
+            return None
+        audio = self.ring_buffer.read(int(duration * self.target_rate), timeout=timeout)
+        self._report_capture()
+        return audio
+
+    def read_available(self, max_duration=None):
+        """
+        Returns whatever streamed audio has been captured since the last read
+        (a view, possibly empty) without blocking.
+        """
+        if self.ring_buffer is None:
+            return np.zeros(0, dtype=np.float32)
+        max_samples = None if max_duration is None else int(max_duration * self.target_rate)
+        return self.ring_buffer.read_available(max_samples)
 
-    
 
     def record(self, duration):
         """
@@ -39,7 +194,7 @@ class Recorder(QObject):
             duration (float): Duration in seconds to record audio.
 
         Returns:
-            np.ndarray: Recorded audio data as a NumPy array.
+            np.ndarray: Recorded audio data as a NumPy array at ``target_rate``.
         """
         #print(f"Recording for {duration} seconds at {self.sample_rate} Hz...")
         try:
@@ -51,7 +206,9 @@ class Recorder(QObject):
             # If single channel, squeeze the extra dimension
             if self.channels == 1:
                 audio = np.squeeze(audio)
-            return audio
+                return resample(audio, self.sample_rate, self.target_rate)
+            return np.stack([resample(audio[:, ch], self.sample_rate, self.target_rate)
+                             for ch in range(audio.shape[1])], axis=1)
         except Exception as e:
             print("Error while recording audio:", e)
             return None
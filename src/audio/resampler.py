@@ -0,0 +1,98 @@
+from math import gcd
+import numpy as np
+
+class StreamingResampler:
+    """
+    Rational-ratio polyphase resampler that can be fed audio in arbitrary
+    chunks.
+
+    The filter history and the fractional output position are carried over
+    between calls, so resampling a signal in pieces gives the same result as
+    resampling it in one go (no clicks or gaps at chunk edges).
+
+    Attributes:
+        input_rate (int): Sampling rate of the incoming audio in Hz.
+        output_rate (int): Sampling rate of the produced audio in Hz.
+    """
+    def __init__(self, input_rate, output_rate=16000, taps_per_phase=32, beta=8.0):
+        """
+        Parameters:
+            input_rate (float): Rate of the audio passed to process().
+            output_rate (int): Desired output rate (Whisper expects 16000).
+            taps_per_phase (int): FIR length per polyphase branch; longer
+                                  filters give a sharper anti-alias cutoff.
+            beta (float): Kaiser window shape parameter.
+        """
+        self.input_rate = int(round(input_rate))
+        self.output_rate = int(output_rate)
+        g = gcd(self.input_rate, self.output_rate)
+        self.up = self.output_rate // g
+        self.down = self.input_rate // g
+        self.taps = int(taps_per_phase)
+
+        # Low-pass prototype at the upsampled rate, cut off just below the lower
+        # of the two Nyquist frequencies, scaled by `up` to preserve amplitude.
+        n = self.taps * self.up
+        cutoff = 0.95 / max(self.up, self.down)
+        t = np.arange(n) - (n - 1) / 2.0
+        h = cutoff * np.sinc(cutoff * t) * np.kaiser(n, beta) * self.up
+        # Polyphase decomposition: branch p holds h[p], h[p + up], h[p + 2*up], ...
+        self._phases = h.reshape(self.taps, self.up).T.astype(np.float32)
+        self._tap_offsets = np.arange(self.taps)
+        self.reset()
+
+    @property
+    def passthrough(self):
+        return self.up == 1 and self.down == 1
+
+    def reset(self):
+        """Clears the filter history, e.g. before starting a new recording."""
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        # Position of the next output sample, in units of 1/up input samples,
+        # relative to the first sample of the next chunk.
+        self._position = 0
+
+    def process(self, chunk):
+        """
+        Resamples the next chunk of mono audio.
+
+        Parameters:
+            chunk (np.ndarray): Mono float audio at ``input_rate``.
+
+        Returns:
+            np.ndarray: float32 audio at ``output_rate``.
+        """
+        chunk = np.asarray(chunk, dtype=np.float32)
+        if self.passthrough:
+            return chunk.copy()
+        n_in = len(chunk)
+        total = n_in * self.up - self._position
+        n_out = max(0, -(-total // self.down))
+        extended = np.concatenate((self._history, chunk))
+
+        if n_out:
+            positions = self._position + np.arange(n_out) * self.down
+            base = positions // self.up + len(self._history)
+            phase = positions % self.up
+            # Gather the FIR input for every output sample at once.
+            indices = base[:, None] - self._tap_offsets[None, :]
+            output = np.einsum('ij,ij->i', extended[indices], self._phases[phase])
+        else:
+            output = np.zeros(0, dtype=np.float32)
+
+        self._position += n_out * self.down - n_in * self.up
+        self._history = extended[len(extended) - len(self._history):]
+        return output.astype(np.float32, copy=False)
+
+    def flush(self):
+        """Returns the output still held back by the filter delay."""
+        return self.process(np.zeros(self.taps // 2, dtype=np.float32))
+
+def resample(audio, input_rate, output_rate=16000):
+    """
+    Resamples a complete mono signal in one call.
+    """
+    resampler = StreamingResampler(input_rate, output_rate)
+    if resampler.passthrough:
+        return np.asarray(audio, dtype=np.float32)
+    return resampler.process(audio)
@@ -0,0 +1,153 @@
+import threading
+import time
+import numpy as np
+
+class RingBuffer:
+    """
+    Single-producer / single-consumer ring buffer for mono float32 audio.
+
+    The producer (the sounddevice callback) only ever advances the write
+    position and the consumer only ever advances the read position, so no lock
+    is needed between them. Every sample is stored twice (at ``i`` and
+    ``i + capacity``) which means any window of up to ``capacity`` samples is
+    contiguous in memory and can be handed out as a NumPy view without copying.
+
+    Views returned by the read methods stay valid until the producer wraps
+    around onto them; copy them if they need to outlive the next ``capacity``
+    samples (e.g. before putting them on a queue).
+
+    Attributes:
+        capacity (int): Number of samples the buffer can hold.
+        overruns (int): Number of samples lost because the consumer fell behind.
+    """
+    def __init__(self, capacity, dtype=np.float32):
+        self.capacity = int(capacity)
+        self._data = np.zeros(2 * self.capacity, dtype=dtype)
+        # Monotonic sample counters; only the producer writes _write_pos and
+        # only the consumer writes _read_pos.
+        self._write_pos = 0
+        self._read_pos = 0
+        self.overruns = 0
+        self._data_ready = threading.Event()
+        self._closed = False
+
+    def write(self, samples):
+        """
+        Appends samples to the buffer. Never blocks; if the consumer has
+        fallen more than ``capacity`` samples behind, the oldest audio is lost.
+        """
+        n = len(samples)
+        if n == 0:
+            return
+        if n > self.capacity:
+            # Only the newest `capacity` samples can be kept; account for the
+            # rest as if they had been written and overwritten.
+            self._write_pos += n - self.capacity
+            samples = samples[-self.capacity:]
+            n = self.capacity
+        start = self._write_pos % self.capacity
+        first = min(n, self.capacity - start)
+        # Primary copy and its mirror.
+        self._data[start:start + first] = samples[:first]
+        self._data[start + self.capacity:start + self.capacity + first] = samples[:first]
+        if first < n:
+            rest = n - first
+            self._data[:rest] = samples[first:]
+            self._data[self.capacity:self.capacity + rest] = samples[first:]
+        self._write_pos += n
+        self._data_ready.set()
+
+    def available(self):
+        """Returns the number of samples that can be read."""
+        return min(self._write_pos - self._read_pos, self.capacity)
+
+    def _skip_overrun(self):
+        lost = self._write_pos - self._read_pos - self.capacity
+        if lost > 0:
+            self.overruns += lost
+            self._read_pos += lost
+
+    def _view(self, n):
+        start = self._read_pos % self.capacity
+        return self._data[start:start + n]
+
+    def read(self, num_samples, timeout=None):
+        """
+        Returns a view of exactly ``num_samples`` samples, blocking until they
+        are available.
+
+        Parameters:
+            num_samples (int): Window size; must not exceed ``capacity``.
+            timeout (float): Seconds to wait, or None to wait until closed.
+
+        Returns:
+            np.ndarray: A read-only view, or None on timeout or close.
+        """
+        num_samples = int(num_samples)
+        if num_samples > self.capacity:
+            raise ValueError("Requested window is larger than the ring buffer capacity.")
+        if not self.wait_for(num_samples, timeout):
+            return None
+        self._skip_overrun()
+        window = self._view(num_samples)
+        self._read_pos += num_samples
+        window = window.view()
+        window.flags.writeable = False
+        return window
+
+    def read_available(self, max_samples=None):
+        """
+        Returns a view of everything currently buffered (up to ``max_samples``)
+        without blocking. The result may be empty.
+        """
+        self._skip_overrun()
+        n = self.available()
+        if max_samples is not None:
+            n = min(n, int(max_samples))
+        window = self._view(n).view()
+        self._read_pos += n
+        window.flags.writeable = False
+        return window
+
+    def latest(self, num_samples):
+        """
+        Returns a view of the most recent ``num_samples`` samples without
+        consuming them.
+        """
+        n = min(int(num_samples), self._write_pos, self.capacity)
+        start = (self._write_pos - n) % self.capacity
+        window = self._data[start:start + n].view()
+        window.flags.writeable = False
+        return window
+
+    def wait_for(self, num_samples, timeout=None):
+        """
+        Blocks until at least ``num_samples`` samples are buffered.
+        Returns False on timeout or if the buffer was closed.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.available() < num_samples:
+            if self._closed:
+                return False
+            self._data_ready.clear()
+            # Re-check after clearing so a write in between is not missed.
+            if self.available() >= num_samples:
+                break
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self._data_ready.wait(remaining)
+        return True
+
+    def clear(self):
+        """Discards all unread samples."""
+        self._read_pos = self._write_pos
+
+    def close(self):
+        """Wakes any blocked reader; subsequent blocking reads return None."""
+        self._closed = True
+        self._data_ready.set()
+
+    def reopen(self):
+        self._closed = False
+        self.clear()
@@ -0,0 +1,174 @@
+import queue
+import time
+import numpy as np
+
+# Whisper models from slowest to fastest; step_down() moves right.
+MODEL_LADDER = ("large", "medium", "small", "base", "tiny")
+
+class AdaptiveScheduler:
+    """
+    Keeps segment transcription real-time on machines of any speed.
+
+    Every decode is timed against the duration of the audio it covered (the
+    real-time factor, RTF) and the length of the input queue is sampled. When
+    decoding falls behind, the scheduler
+
+    * lengthens segments, so Whisper's fixed per-call cost is amortised over
+      more audio,
+    * merges segments that piled up in the queue into a single decode, and
+    * as a last resort steps down to the next faster Whisper model.
+
+    When decoding has plenty of headroom again the segment length is brought
+    back down for lower latency. Every adjustment is reported through
+    ``on_event``.
+
+    Attributes:
+        segment_duration (float): Current recording segment length in seconds.
+        rtf (float): Smoothed real-time factor (decode time / audio time).
+    """
+    def __init__(self, segment_duration=5.0, min_segment=2.0, max_segment=15.0,
+                 target_rtf=0.7, max_backlog=2, max_merge=30.0, sample_rate=16000,
+                 step_down_after=3, transcriber=None, segmenter=None, on_event=None):
+        """
+        Parameters:
+            segment_duration (float): Initial (and preferred) segment length.
+            min_segment, max_segment (float): Bounds for the segment length.
+            target_rtf (float): RTF above which decoding counts as falling behind.
+            max_backlog (int): Queued segments at which backlog is merged.
+            max_merge (float): Longest merged decode in seconds.
+            sample_rate (int): Rate of the queued audio.
+            step_down_after (int): Consecutive overloaded decodes at the longest
+                                   segment length before a faster model is used.
+            transcriber: Optional SwappableTranscriber used to step down.
+            segmenter (VADSegmenter): Optional segmenter whose ``max_segment``
+                                      follows the segment length.
+            on_event (callable): Receives a message for every adjustment.
+        """
+        self.preferred_duration = segment_duration
+        self.segment_duration = segment_duration
+        self.min_segment = min_segment
+        self.max_segment = max_segment
+        self.target_rtf = target_rtf
+        self.max_backlog = max_backlog
+        self.max_merge_samples = int(max_merge * sample_rate)
+        self.sample_rate = sample_rate
+        self.step_down_after = step_down_after
+        self.transcriber = transcriber
+        self.on_event = on_event
+        self.rtf = None
+        self._overloaded = 0
+        self._switching_to = None
+        self.segmenter = None
+        if segmenter is not None:
+            self.attach_segmenter(segmenter)
+
+    def attach_segmenter(self, segmenter):
+        """
+        Lets the segment length drive a VAD segmenter's forced cut length.
+        """
+        self.segmenter = segmenter
+        if segmenter is not None:
+            segmenter.max_segment = self.segment_duration
+
+    def report(self, message):
+        if self.on_event:
+            self.on_event(message)
+
+    def next_segment(self, audio_queue, timeout=None):
+        """
+        Takes the next segment from ``audio_queue``, merging the backlog into
+        it when ``max_backlog`` or more further segments are waiting.
+        Raises queue.Empty like Queue.get when nothing arrives in time.
+        """
+        audio = audio_queue.get(timeout=timeout)
+        if audio_queue.qsize() < self.max_backlog:
+            return audio
+        parts, length = [audio], len(audio)
+        while length < self.max_merge_samples:
+            try:
+                part = audio_queue.get_nowait()
+            except queue.Empty:
+                break
+            parts.append(part)
+            length += len(part)
+            # The caller acknowledges the merged segment once; the parts
+            # folded into it are acknowledged here.
+            audio_queue.task_done()
+        if len(parts) > 1:
+            self.report(f"Scheduler: merged {len(parts)} backlogged segments "
+                        f"({length / self.sample_rate:.1f} s) into one decode")
+        return np.concatenate(parts)
+
+    def transcribe(self, transcriber, audio, queue_depth=0, **kwargs):
+        """
+        Runs transcriber.transcribe_stream on ``audio``, records its timing
+        and adapts. Returns the list of transcribed segments.
+        """
+        start = time.perf_counter()
+        segments = list(transcriber.transcribe_stream(audio, **kwargs))
+        self.record(len(audio) / self.sample_rate, time.perf_counter() - start, queue_depth)
+        return segments
+
+    def record(self, audio_seconds, decode_seconds, queue_depth=0):
+        """
+        Feeds one measurement into the scheduler.
+        """
+        if audio_seconds <= 0:
+            return
+        rtf = decode_seconds / audio_seconds
+        self.rtf = rtf if self.rtf is None else 0.7 * self.rtf + 0.3 * rtf
+        if self.rtf > self.target_rtf or queue_depth >= self.max_backlog:
+            self._on_overload(queue_depth)
+        else:
+            self._overloaded = 0
+            if self.rtf < self.target_rtf / 2 and queue_depth == 0:
+                self._set_segment_duration(max(self.preferred_duration, self.segment_duration / 1.25))
+
+    def _on_overload(self, queue_depth):
+        if self.segment_duration < self.max_segment:
+            self._overloaded = 0
+            self._set_segment_duration(min(self.max_segment, self.segment_duration * 1.5),
+                                       f"RTF {self.rtf:.2f}, {queue_depth} queued")
+            return
+        self._overloaded += 1
+        if self._overloaded >= self.step_down_after and self.rtf > 1.0:
+            self._overloaded = 0
+            self.step_down()
+
+    def _set_segment_duration(self, duration, reason=None):
+        duration = min(max(duration, self.min_segment), self.max_segment)
+        if abs(duration - self.segment_duration) < 0.05:
+            return
+        self.segment_duration = duration
+        if self.segmenter is not None:
+            self.segmenter.max_segment = duration
+        message = f"Scheduler: segment length set to {duration:.1f} s"
+        self.report(f"{message} ({reason})" if reason else message)
+
+    def step_down(self):
+        """
+        Switches the transcriber to the next faster model, if there is one.
+        """
+        switch = getattr(self.transcriber, "switch", None)
+        current = getattr(self.transcriber, "model_name", None)
+        if switch is None or current not in MODEL_LADDER:
+            return False
+        if self._switching_to is not None and self._switching_to != current:
+            return False  # still loading the previous step
+        index = MODEL_LADDER.index(current)
+        if index + 1 >= len(MODEL_LADDER):
+            return False
+        target = self._switching_to = MODEL_LADDER[index + 1]
+
+        def failed(error):
+            # Allow later step-downs (including a retry of this one).
+            if self._switching_to == target:
+                self._switching_to = None
+            self.report(f"Scheduler: could not step down to '{target}': {error}")
+
+        self.report(f"Scheduler: RTF {self.rtf:.2f} at {self.segment_duration:.1f} s segments, "
+                    f"stepping down from '{current}' to '{target}'")
+        switch(target, on_failed=failed)
+        # Measurements of the old model say nothing about the new one.
+        self.rtf = None
+        return True
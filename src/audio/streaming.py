@@ -0,0 +1,195 @@
+import re
+import numpy as np
+
+# whisper.audio.HOP_LENGTH, repeated here to keep torch out of this module.
+HOP_LENGTH = 160
+
+def _normalize(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+class IncrementalTranscriber:
+    """
+    Sliding-window streaming transcription on top of a Transcriber.
+
+    Audio is appended to a growing window that is re-decoded every
+    ``update_interval`` seconds. A word is only committed once two consecutive
+    hypotheses agree on it (the longest common prefix of the two), and audio
+    before the last committed word is dropped once the window gets long, so
+    the cost of each update stays bounded by ``max_buffer``.
+
+    If the transcriber can decode precomputed windows (``decode_words``), the
+    log-mel input is built by an IncrementalMelFrontend, so each update only
+    computes spectrogram frames for the audio inserted since the last one.
+    The window is only ever cut at a multiple of HOP_LENGTH samples, so its
+    cached frames line up with the ones Whisper would compute for it.
+
+    The stream's language is kept here rather than on the (possibly shared)
+    transcriber: it is detected until a window with speech is decoded and
+    then used for the rest of the stream.
+
+    Attributes:
+        committed_until (float): Stream time (s) up to which text is final.
+        tentative_text (str): The not-yet-confirmed tail of the last hypothesis.
+        language (str): The stream's language, or None until detected.
+    """
+    def __init__(self, transcriber, sample_rate=16000, update_interval=0.5,
+                 trim_after=8.0, max_buffer=15.0, prompt_chars=200, mel_frontend=True,
+                 language=None):
+        """
+        Parameters:
+            transcriber: Object providing transcribe_words(audio, initial_prompt).
+            sample_rate (int): Rate of the inserted audio.
+            update_interval (float): Seconds of new audio between re-decodes.
+            trim_after (float): Window length after which committed audio is cut.
+            max_buffer (float): Hard window limit; everything is committed when
+                                it is exceeded.
+            prompt_chars (int): Length of the committed-text prompt passed to
+                                the decoder for context.
+            mel_frontend (bool): Use the incremental mel frontend when the
+                                 transcriber supports it.
+            language (str): Spoken language, or None to detect it.
+        """
+        self.transcriber = transcriber
+        self.sample_rate = sample_rate
+        self.update_interval = update_interval
+        self.trim_after = trim_after
+        self.max_buffer = max_buffer
+        self.prompt_chars = prompt_chars
+        self.use_mel_frontend = mel_frontend and hasattr(transcriber, "decode_words")
+        self.language = language
+        self.frontend = None
+        self.reset()
+
+    def reset(self):
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.buffer_offset = 0.0
+        # Stream position of the window's first sample.
+        self._buffer_start = 0
+        self.committed_until = 0.0
+        self.committed_text = ""
+        self._previous = []
+        self._pending_samples = 0
+        if self.frontend is not None:
+            self.frontend.reset()
+
+    @property
+    def buffer_duration(self):
+        return len(self.buffer) / self.sample_rate
+
+    @property
+    def tentative_text(self):
+        return "".join(word for _, _, word in self._previous)
+
+    def insert_audio(self, audio):
+        audio = np.asarray(audio, dtype=np.float32)
+        if self.use_mel_frontend:
+            self._mel_frontend().append(audio)
+        self.buffer = np.concatenate((self.buffer, audio))
+        self._pending_samples += len(audio)
+
+    def _mel_frontend(self):
+        # Created on first use (and rebuilt if a model switch changed the
+        # number of mel bands) to keep torch out of start-up.
+        n_mels = self.transcriber.n_mels
+        if self.frontend is None or self.frontend.n_mels != n_mels:
+            from audio.mel_frontend import IncrementalMelFrontend
+            self.frontend = IncrementalMelFrontend(n_mels=n_mels)
+            self.frontend.append(self.buffer)
+        return self.frontend
+
+    def ready(self):
+        return self._pending_samples >= self.update_interval * self.sample_rate
+
+    def process(self):
+        """
+        Re-decodes the window if enough new audio has arrived.
+
+        Returns:
+            tuple: (newly committed text, current tentative text).
+        """
+        if not self.ready():
+            return "", self.tentative_text
+        self._pending_samples = 0
+        prompt = self.committed_text[-self.prompt_chars:] or None
+        if self.use_mel_frontend:
+            words = self._decode_window(prompt)
+        else:
+            words = self.transcriber.transcribe_words(self.buffer, initial_prompt=prompt)
+        hypothesis = self._new_words(words)
+
+        agreed = 0
+        for old, new in zip(self._previous, hypothesis):
+            if _normalize(old[2]) != _normalize(new[2]):
+                break
+            agreed += 1
+        committed = hypothesis[:agreed]
+        self._previous = hypothesis[agreed:]
+
+        if self.buffer_duration > self.max_buffer:
+            # Nothing has stabilised for too long: accept the hypothesis as is.
+            committed, self._previous = hypothesis, []
+        text = self._commit(committed)
+
+        if self.buffer_duration > self.max_buffer:
+            self._trim(self.buffer_offset + self.buffer_duration)
+        elif self.buffer_duration > self.trim_after:
+            self._trim(self.committed_until)
+        return text, self.tentative_text
+
+    def finish(self, decode=True):
+        """
+        Commits whatever is left in the window, e.g. when recording stops.
+        With ``decode=False`` the last hypothesis is committed as it is,
+        without decoding the window again (e.g. once decodes are cancelled).
+        """
+        text = ""
+        if decode and len(self.buffer):
+            self._pending_samples = len(self.buffer)
+            text, _ = self.process()
+        text += self._commit(self._previous)
+        self.reset()
+        return text
+
+    def _decode_window(self, prompt):
+        frontend = self._mel_frontend()
+        mel, num_frames = frontend.window(frontend.total_samples - len(self.buffer))
+        language = self.language or self.transcriber.detect_language(mel)
+        words = self.transcriber.decode_words(mel, num_frames, initial_prompt=prompt, language=language)
+        if words and self.language is None:
+            # Only a window with speech is trusted to tell the language.
+            self.language = language
+        return words
+
+    def _new_words(self, words):
+        # Shift to stream time and drop words that were already committed.
+        hypothesis = [(start + self.buffer_offset, end + self.buffer_offset, word)
+                      for start, end, word in words
+                      if start + self.buffer_offset >= self.committed_until - 0.1]
+        # Whisper often repeats the last committed words at the start of the
+        # window; strip the longest such overlap (up to five words).
+        committed_tail = self.committed_text.split()[-5:]
+        for n in range(min(len(committed_tail), len(hypothesis)), 0, -1):
+            head = [_normalize(w) for _, _, w in hypothesis[:n]]
+            if head == [_normalize(w) for w in committed_tail[-n:]]:
+                return hypothesis[n:]
+        return hypothesis
+
+    def _commit(self, words):
+        if not words:
+            return ""
+        text = "".join(word for _, _, word in words)
+        self.committed_text += text
+        self.committed_until = max(self.committed_until, words[-1][1])
+        return text
+
+    def _trim(self, until):
+        cut = min(int((until - self.buffer_offset) * self.sample_rate), len(self.buffer))
+        # Round down to a frame boundary of the stream.
+        cut -= (self._buffer_start + cut) % HOP_LENGTH
+        if cut <= 0:
+            return
+        self.buffer = self.buffer[cut:]
+        self._buffer_start += cut
+        self.buffer_offset = self._buffer_start / self.sample_rate
+        if self.frontend is not None:
+            self.frontend.trim(self.frontend.total_samples - len(self.buffer))
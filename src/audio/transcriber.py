@@ -1,13 +1,153 @@
+import contextlib
+import dataclasses
+import hashlib
+import os
+import threading
+import time
+import urllib.request
 import torch
 import whisper
 import numpy as np
-import time
+from whisper.timing import find_alignment
+from whisper.tokenizer import get_tokenizer
+
+from audio.cancellation import cancellation_requested
+from audio.metrics import get_metrics
+
+PRECISIONS = ("fp32", "int8", "bf16")
+
+def whisper_cache_dir():
+    default = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(os.getenv("XDG_CACHE_HOME", default), "whisper")
+
+def model_checkpoint_path(model_name, root=None):
+    """
+    Returns where the checkpoint of an official Whisper model is cached,
+    or None for names that are not official models (e.g. local paths).
+    """
+    url = whisper._MODELS.get(model_name)
+    if url is None:
+        return None
+    return os.path.join(root or whisper_cache_dir(), os.path.basename(url))
+
+def download_model(model_name, root=None, progress_callback=None, chunk_size=1024 * 1024):
+    """
+    Downloads an official Whisper checkpoint if it is not cached yet.
+
+    Parameters:
+        model_name (str): Whisper model name.
+        root (str): Cache directory; defaults to whisper's own.
+        progress_callback (callable): Called with (percentage, downloaded
+                                      bytes, total bytes, speed in bits/s).
+
+    Returns:
+        str: Path of the checkpoint, or None if model_name is not an official model.
+    """
+    target = model_checkpoint_path(model_name, root)
+    if target is None or os.path.isfile(target):
+        # whisper.load_model verifies the checksum of cached files itself.
+        return target
+    url = whisper._MODELS[model_name]
+    expected_sha256 = url.split("/")[-2]
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    partial = target + ".part"
+    digest = hashlib.sha256()
+    try:
+        with urllib.request.urlopen(url) as source, open(partial, "wb") as output:
+            total = int(source.info().get("Content-Length", 0))
+            downloaded = 0
+            start_time = time.monotonic()
+            while True:
+                buffer = source.read(chunk_size)
+                if not buffer:
+                    break
+                output.write(buffer)
+                digest.update(buffer)
+                downloaded += len(buffer)
+                if progress_callback:
+                    elapsed = time.monotonic() - start_time
+                    speed = (downloaded * 8) / elapsed if elapsed > 0 else 0.0
+                    percentage = int(downloaded / total * 100) if total else 0
+                    progress_callback(percentage, downloaded, total, speed)
+        if digest.hexdigest() != expected_sha256:
+            raise RuntimeError(f"Downloaded {model_name} checkpoint failed its SHA256 check; please retry.")
+        os.replace(partial, target)
+    except BaseException:
+        # Never leave a truncated or corrupt download behind.
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return target
+
+def _use_plain_linear(module):
+    """
+    Replaces whisper's Linear subclass with torch.nn.Linear (sharing the
+    same parameters) so dynamic quantization recognises the layers.
+    """
+    for name, child in module.named_children():
+        if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+            plain = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None)
+            plain.weight = child.weight
+            plain.bias = child.bias
+            setattr(module, name, plain)
+        else:
+            _use_plain_linear(child)
+
+def quantize_int8(model):
+    """
+    Switches a Whisper model's Linear layers to dynamic int8 quantization
+    (CPU only). The model is modified in place and returned; quantizing in
+    place also avoids holding a second fp32 copy while converting.
+    """
+    _use_plain_linear(model)
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8,
+                                                  inplace=True)
+
+def autocast_bf16(model):
+    """
+    Runs the encoder and decoder under bfloat16 autocast while returning
+    float32 outputs, which is what whisper's decoding loop expects.
+    """
+    for module in (model.encoder, model.decoder):
+        forward = module.forward
+
+        def wrapped(*args, _forward=forward, **kwargs):
+            with torch.autocast(device_type="cpu", dtype=torch.bfloat16):
+                return _forward(*args, **kwargs).float()
+
+        module.forward = wrapped
+    return model
+
+def bf16_supported():
+    try:
+        with torch.autocast(device_type="cpu", dtype=torch.bfloat16):
+            torch.nn.functional.linear(torch.ones(1, 2), torch.ones(2, 2))
+        return True
+    except Exception:
+        return False
+
+class DecodingCancelled(Exception):
+    """Raised inside the decoder when the thread's CancelToken is cancelled."""
+
+@contextlib.contextmanager
+def _removing_new_hooks(modules):
+    # find_alignment removes its attention hooks only when it returns
+    # normally; drop whatever it left behind if it raised.
+    before = [set(module._forward_hooks) for module in modules]
+    try:
+        yield
+    finally:
+        for module, hooks in zip(modules, before):
+            for key in [key for key in module._forward_hooks if key not in hooks]:
+                del module._forward_hooks[key]
 
 class Transcriber:
     """
     Transcriber uses OpenAI's Whisper model to perform automatic speech recognition.
     """
-    def __init__(self, model_name="base", device=None, progress_callback=None):
+    def __init__(self, model_name="base", device=None, progress_callback=None,
+                 download_callback=None, stage_callback=None, precision="fp32",
+                 language=None, fallback_temperatures=(0.2, 0.4, 0.6)):
         """
         Initializes the Transcriber with the specified Whisper model.
 
@@ -16,7 +156,28 @@ class Transcriber:
             device (str): Device to run the model on (e.g., "mps", "cuda", or "cpu").
                           If None, auto-detects the best available device.
             progress_callback (callable): A callback to report progress (0-100).
+            download_callback (callable): Receives (percentage, downloaded bytes,
+                                          total bytes, bits/s) while weights download.
+            stage_callback (callable): Receives a description of each load stage.
+            precision (str): "fp32" (default), "int8" for dynamic int8
+                             quantization of the Linear layers, or "bf16" for
+                             bfloat16 autocast. Both reduced modes run on CPU.
+            language (str): Spoken language for the direct decode path; if
+                            None it is detected until a segment with speech
+                            is decoded, and then pinned.
+            fallback_temperatures (tuple): Temperatures retried by the direct
+                                           decode path when greedy decoding
+                                           looks degenerate; empty to disable.
         """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported precision: {precision}")
+        if precision != "fp32":
+            # Reduced-precision modes target CPU deployments.
+            device = "cpu"
+        if precision == "bf16" and not bf16_supported():
+            print("bfloat16 autocast is not supported on this CPU; using fp32.")
+            precision = "fp32"
+        self.precision = precision
         if device is None:
             if torch.backends.mps.is_available():
                 device = "mps"
@@ -26,18 +187,33 @@ class Transcriber:
                 device = "cpu"
         self.device = device
         print(f"Loading Whisper model: {model_name} on {self.device} ...")
-        
-        # If a progress callback is provided, simulate progress.
-        if progress_callback:
-            total_steps = 5
-            for step in range(total_steps):
-                time.sleep(0.3)  # simulate work
-                progress = int((step + 1) / total_steps * 80)
+
+        def report(progress, stage=None):
+            if progress_callback:
                 progress_callback(progress)
-        
+            if stage and stage_callback:
+                stage_callback(stage)
+
+        # Download the weights first (if needed) so real progress can be shown;
+        # downloading accounts for the first 70% of the overall progress.
+        checkpoint = model_checkpoint_path(model_name)
+        if checkpoint is not None and not os.path.isfile(checkpoint):
+            report(0, f"Downloading Whisper model '{model_name}'")
+
+            def on_download(percentage, downloaded, total, speed):
+                if download_callback:
+                    download_callback(percentage, downloaded, total, speed)
+                report(int(percentage * 0.7))
+
+            download_model(model_name, progress_callback=on_download)
+
         # Load model on CPU first then move to the chosen device.
+        report(70, f"Loading Whisper model '{model_name}' weights")
+        start = time.perf_counter()
         self.model = whisper.load_model(model_name, device="cpu")
+        report(90, f"Weights loaded in {time.perf_counter() - start:.1f} s")
         if self.device != "cpu":
+            report(90, f"Moving model to {self.device}")
             try:
                 self.model = self.model.to(self.device)
             except Exception as e:
@@ -45,26 +221,357 @@ class Transcriber:
                 self.device = "cpu"
         else:
             self.device = "cpu"
+        if self.precision == "int8":
+            report(95, "Quantizing Linear layers to int8")
+            self.model = quantize_int8(self.model)
+        elif self.precision == "bf16":
+            self.model = autocast_bf16(self.model)
+        
+        # State of the direct fixed-window decode path (see decode_window).
+        self.language = language if language or self.model.is_multilingual else "en"
+        self.fallback_temperatures = tuple(fallback_temperatures)
+        self.compression_ratio_threshold = 2.4
+        self.logprob_threshold = -1.0
+        self.no_speech_threshold = 0.6
+        self.n_mels = self.model.dims.n_mels
+        self._pad_buffer = np.zeros(whisper.audio.N_SAMPLES, dtype=np.float32)
+        self._decode_lock = threading.Lock()
+        # Checked before every decoder step so a stop request can interrupt a
+        # decode that is in progress (see audio.cancellation).
+        self.model.decoder.register_forward_pre_hook(self._check_cancelled)
+        # Model times are recorded as "whisper.*" metrics.
+        self.metrics = get_metrics()
         
-        # Finish progress if callback provided.
-        if progress_callback:
-            progress_callback(100)
+        report(100, f"Whisper model '{model_name}' ready on {self.device} ({self.precision})")
+
+    @property
+    def use_fp16(self):
+        return self.device != "cpu" and self.precision == "fp32"
+
+    def _check_cancelled(self, module, args):
+        if cancellation_requested():
+            self.metrics.increment("whisper.cancelled")
+            raise DecodingCancelled()
+
+    def log_mel(self, audio: np.ndarray):
+        """
+        Computes the model's log-mel input for up to 30 s of audio, padding
+        into a preallocated buffer instead of allocating a new one.
+        """
+        length = min(len(audio), len(self._pad_buffer))
+        self._pad_buffer[:length] = audio[:length]
+        self._pad_buffer[length:] = 0.0
+        mel = whisper.log_mel_spectrogram(torch.from_numpy(self._pad_buffer), n_mels=self.n_mels)
+        return mel.to(self.device)
+
+    def is_silence(self, result):
+        """
+        True for results whisper itself would drop as silence or noise
+        (likely no speech and a low-confidence transcript).
+        """
+        return (result.no_speech_prob > self.no_speech_threshold
+                and result.avg_logprob < self.logprob_threshold)
+
+    def _pin_language(self, result):
+        # Only a segment with speech is trusted to tell the language.
+        if self.language is None and not self.is_silence(result):
+            self.language = result.language
+
+    def _needs_fallback(self, result):
+        if result.no_speech_prob > self.no_speech_threshold:
+            return False
+        return (result.compression_ratio > self.compression_ratio_threshold
+                or result.avg_logprob < self.logprob_threshold)
+
+    def detect_language(self, mel):
+        """
+        Returns the configured (or pinned) language, or else the most likely
+        language of a log-mel window, without pinning it.
+        """
+        if self.language is not None:
+            return self.language
+        with self._decode_lock, self.metrics.timer("whisper.detect_language"):
+            _, probs = self.model.detect_language(mel.to(self.device))
+        return max(probs, key=probs.get)
+
+    def decode_mel(self, mel, with_timestamps=False, prompt=None, language=None):
+        """
+        Decodes one 30 s log-mel window directly with whisper.decode.
+
+        Unlike model.transcribe this skips the long-form sliding loop, runs
+        language detection only until a language is pinned, and decodes
+        greedily, retrying at ``fallback_temperatures`` only when the result
+        looks degenerate. The caller decides whether the result is silence
+        (is_silence) and whether to pin its language.
+
+        Parameters:
+            language (str): Language of this window, overriding the pinned one
+                            (e.g. a stream's own language).
+
+        Returns:
+            whisper.DecodingResult
+        """
+        language = language or self.language
+        if language is None:
+            with self.metrics.timer("whisper.detect_language"):
+                _, probs = self.model.detect_language(mel)
+            language = max(probs, key=probs.get)
+        options = whisper.DecodingOptions(task="transcribe", language=language,
+                                          temperature=0.0, prompt=prompt,
+                                          without_timestamps=not with_timestamps,
+                                          fp16=self.use_fp16)
+        with self.metrics.timer("whisper.decode"):
+            result = whisper.decode(self.model, mel, options)
+            for temperature in self.fallback_temperatures:
+                if not self._needs_fallback(result):
+                    break
+                self.metrics.increment("whisper.fallbacks")
+                options = dataclasses.replace(options, temperature=temperature)
+                result = whisper.decode(self.model, mel, options)
+        return result
+
+    def decode_window(self, audio: np.ndarray, prompt=None) -> str:
+        """
+        Transcribes up to 30 s of audio through the direct decode path.
+        """
+        with self._decode_lock:
+            result = self.decode_mel(self.log_mel(audio), prompt=prompt)
+        if self.is_silence(result):
+            return ""
+        self._pin_language(result)
+        return result.text
+
+    def decode_batch(self, audios, prompt=None, languages=None):
+        """
+        Transcribes several windows of up to 30 s in one batched pass.
+
+        The log-mels are stacked so the encoder runs once for the whole batch
+        and the decoder advances every window per step, which uses the
+        hardware far better than decoding the windows one after another.
+        Windows that need a temperature fallback are retried together.
+
+        Windows may come from different streams in different languages:
+        those without a language are detected in one batched call, and each
+        language is decoded as its own batch. Nothing is pinned on the
+        shared model.
+
+        Parameters:
+            audios (list): 16 kHz mono arrays, each at most 30 s.
+            prompt (str): Context shared by every window (optional).
+            languages (list): Language of each window, None where unknown.
+                              The detected language of every window with
+                              speech is filled in, so a caller can keep it
+                              for its stream.
+
+        Returns:
+            list: One transcript per window, in the same order; "" for
+                  windows that are silence, and for all of them if the
+                  batch was cancelled.
+        """
+        if not len(audios):
+            return []
+        if languages is None:
+            languages = [None] * len(audios)
+        try:
+            with self._decode_lock:
+                # Each window is normalised on its own, exactly as log_mel does.
+                mels = torch.stack([
+                    whisper.log_mel_spectrogram(
+                        whisper.pad_or_trim(torch.from_numpy(np.asarray(audio, dtype=np.float32))),
+                        n_mels=self.n_mels)
+                    for audio in audios]).to(self.device)
+                window_languages = [language or self.language for language in languages]
+                unknown = [i for i, language in enumerate(window_languages) if language is None]
+                if unknown:
+                    with self.metrics.timer("whisper.detect_language"):
+                        _, probs = self.model.detect_language(mels[unknown])
+                    for i, window_probs in zip(unknown, probs):
+                        window_languages[i] = max(window_probs, key=window_probs.get)
+                self.metrics.observe("whisper.batch_size", len(audios))
+                results = [None] * len(audios)
+                with self.metrics.timer("whisper.decode_batch"):
+                    for language in dict.fromkeys(window_languages):
+                        group = [i for i, lang in enumerate(window_languages) if lang == language]
+                        for i, result in zip(group, self._decode_group(mels[group], language, prompt)):
+                            results[i] = result
+        except DecodingCancelled:
+            return [""] * len(audios)
+        texts = []
+        for i, result in enumerate(results):
+            if self.is_silence(result):
+                texts.append("")
+                continue
+            if languages[i] is None:
+                languages[i] = window_languages[i]
+            texts.append(result.text)
+        return texts
+
+    def _decode_group(self, mels, language, prompt):
+        options = whisper.DecodingOptions(task="transcribe", language=language,
+                                          temperature=0.0, prompt=prompt,
+                                          without_timestamps=True, fp16=self.use_fp16)
+        results = whisper.decode(self.model, mels, options)
+        for temperature in self.fallback_temperatures:
+            retry = [i for i, result in enumerate(results) if self._needs_fallback(result)]
+            if not retry:
+                break
+            self.metrics.increment("whisper.fallbacks", len(retry))
+            options = dataclasses.replace(options, temperature=temperature)
+            for i, result in zip(retry, whisper.decode(self.model, mels[retry], options)):
+                results[i] = result
+        return results
+
+    def decode_segments(self, audio: np.ndarray, prompt=None, final=False):
+        """
+        Decodes up to 30 s of audio with timestamps, for long recordings
+        processed one window at a time.
+
+        Parameters:
+            audio (np.ndarray): 16 kHz mono audio, at most 30 s.
+            prompt (str): Preceding text used as context.
+            final (bool): True if no audio follows this window, so a segment
+                          cut off at its end is kept rather than re-decoded.
+
+        Returns:
+            tuple: ([(start, end, text), ...] relative to the window start,
+                    seconds of audio consumed). Audio after the last complete
+                    segment is not consumed and should start the next window.
+        """
+        duration = len(audio) / whisper.audio.SAMPLE_RATE
+        try:
+            with self._decode_lock:
+                result = self.decode_mel(self.log_mel(audio), with_timestamps=True, prompt=prompt)
+        except DecodingCancelled:
+            return [], 0.0
+        if self.is_silence(result):
+            return [], duration
+        self._pin_language(result)
+        tokenizer = get_tokenizer(self.model.is_multilingual,
+                                  num_languages=self.model.num_languages,
+                                  language=result.language, task="transcribe")
+        precision = whisper.audio.CHUNK_LENGTH / self.model.dims.n_audio_ctx
+        segments = []
+        start, text_tokens = None, []
+        for token in result.tokens:
+            if token < tokenizer.timestamp_begin:
+                text_tokens.append(token)
+                continue
+            time_ = (token - tokenizer.timestamp_begin) * precision
+            if start is not None and text_tokens:
+                segments.append((start, min(time_, duration), tokenizer.decode(text_tokens).strip()))
+                start, text_tokens = None, []
+            elif start is None:
+                start = time_
+        if not text_tokens:
+            return segments, duration
+        if final or not segments:
+            # Keep the unterminated segment rather than re-decoding it.
+            segments.append((start or 0.0, duration, tokenizer.decode(text_tokens).strip()))
+            return segments, duration
+        return segments, segments[-1][1]
 
     def transcribe(self, audio: np.ndarray) -> str:
         try:
-            result = self.model.transcribe(audio)
+            with self.metrics.timer("whisper.transcribe"):
+                result = self.model.transcribe(audio, fp16=self.use_fp16)
             return result.get("text", "")
+        except DecodingCancelled:
+            return ""
         except Exception as e:
+            self.metrics.increment("whisper.errors")
             print("Error during transcription:", e)
             return ""
     
-    def transcribe_stream(self, audio: np.ndarray):
+    def transcribe_words(self, audio: np.ndarray, initial_prompt=None):
+        """
+        Transcribes audio and returns word-level timings.
+
+        Parameters:
+            audio (np.ndarray): 16 kHz mono audio.
+            initial_prompt (str): Previously committed text used as context.
+
+        Returns:
+            list: (start, end, word) tuples with times in seconds relative to
+                  the start of ``audio``.
+        """
+        try:
+            with self.metrics.timer("whisper.transcribe_words"):
+                result = self.model.transcribe(audio, word_timestamps=True,
+                                               initial_prompt=initial_prompt,
+                                               condition_on_previous_text=False,
+                                               fp16=self.use_fp16)
+        except DecodingCancelled:
+            return []
+        except Exception as e:
+            self.metrics.increment("whisper.errors")
+            print("Error during word-level transcription:", e)
+            return []
+        words = []
+        for segment in result.get("segments", []):
+            for word in segment.get("words", []):
+                words.append((word["start"], word["end"], word["word"]))
+        return words
+
+    def decode_words(self, mel, num_frames, initial_prompt=None, language=None):
+        """
+        Word-level counterpart of transcribe_words for a precomputed window,
+        e.g. one assembled by IncrementalMelFrontend.
+
+        Parameters:
+            mel (torch.Tensor): Normalised log-mel of shape (n_mels, 3000).
+            num_frames (int): Number of frames that hold audio.
+            initial_prompt (str): Previously committed text used as context.
+            language (str): The stream's language; detected for this window
+                            if None and none is pinned. Never pinned here, as
+                            several streams may share the model.
+
+        Returns:
+            list: (start, end, word) tuples relative to the window start.
+        """
+        try:
+            with self._decode_lock:
+                mel = mel.to(self.device)
+                result = self.decode_mel(mel, prompt=initial_prompt, language=language)
+                if self.is_silence(result):
+                    return []
+                tokenizer = get_tokenizer(self.model.is_multilingual,
+                                          num_languages=self.model.num_languages,
+                                          language=result.language, task="transcribe")
+                text_tokens = [t for t in result.tokens if t < tokenizer.eot]
+                with self.metrics.timer("whisper.align"), \
+                        _removing_new_hooks([block.cross_attn for block in self.model.decoder.blocks]):
+                    timings = find_alignment(self.model, tokenizer, text_tokens, mel, num_frames)
+        except DecodingCancelled:
+            return []
+        except Exception as e:
+            self.metrics.increment("whisper.errors")
+            print("Error during word-level decoding:", e)
+            return []
+        return [(float(t.start), float(t.end), t.word) for t in timings if t.word.strip()]
+
+    def transcribe_stream(self, audio: np.ndarray, fast=False):
+        """
+        Yields the transcribed segments of ``audio``.
+
+        With ``fast=True`` chunks of up to 30 s go through decode_window()
+        and are yielded as a single segment (none if it was silence); longer
+        audio always uses model.transcribe.
+        """
         try:
-            result = self.model.transcribe(audio)
+            if fast and len(audio) <= whisper.audio.N_SAMPLES:
+                text = self.decode_window(audio)
+                if text:
+                    yield text
+                return
+            with self.metrics.timer("whisper.transcribe"):
+                result = self.model.transcribe(audio, fp16=self.use_fp16)
             segments = result.get("segments", [])
             for segment in segments:
                 text = segment.get("text", "")
                 yield text
+        except DecodingCancelled:
+            return
         except Exception as e:
+            self.metrics.increment("whisper.errors")
             print("Error during streaming transcription:", e)
             yield ""
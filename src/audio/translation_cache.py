@@ -0,0 +1,119 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Trailing marks that do not change a sentence's translation. "?" is kept:
+# "You're coming?" and "You're coming." translate differently.
+_TRAILING_PUNCTUATION = ".!,;:…"
+
+def normalize_sentence(sentence):
+    """
+    Canonical form used as the cache key: lower case, surrounding and
+    repeated whitespace removed, trailing punctuation other than "?"
+    dropped, so "Okay." and "okay" share an entry.
+    """
+    return " ".join(sentence.lower().split()).rstrip(_TRAILING_PUNCTUATION).rstrip()
+
+def default_cache_path():
+    """Where the persistent translation cache lives unless configured otherwise."""
+    default = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(os.getenv("XDG_CACHE_HOME", default), "scribulate", "translations.sqlite")
+
+class TranslationCache:
+    """
+    Bounded LRU cache of sentence translations, optionally backed by SQLite
+    so entries survive restarts.
+
+    Keys are (model name, target language, normalized sentence). Lookups that
+    miss in memory fall through to the database and are promoted on a hit.
+    The cache is safe to share between translation threads.
+
+    Attributes:
+        hits (int): Lookups answered from memory or disk.
+        misses (int): Lookups that required a model call.
+    """
+    def __init__(self, max_entries=4096, db_path=None):
+        """
+        Parameters:
+            max_entries (int): Maximum number of in-memory entries.
+            db_path (str): SQLite file for the persistent store, or None to
+                           keep the cache in memory only.
+        """
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            try:
+                directory = os.path.dirname(db_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS translations ("
+                    "model TEXT, lang TEXT, source TEXT, target TEXT, "
+                    "PRIMARY KEY (model, lang, source))")
+                self._db.commit()
+            except (OSError, sqlite3.Error) as e:
+                print(f"Could not open the translation cache {db_path}; keeping it in memory only:", e)
+                self._db = None
+
+    def get(self, model, lang, sentence):
+        """
+        Returns the cached translation or None.
+        """
+        key = (model, lang, normalize_sentence(sentence))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT target FROM translations WHERE model=? AND lang=? AND source=?",
+                    key).fetchone()
+                if row is not None:
+                    self._store(key, row[0])
+                    self.hits += 1
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, model, lang, sentence, translation):
+        key = (model, lang, normalize_sentence(sentence))
+        with self._lock:
+            self._store(key, translation)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO translations (model, lang, source, target) "
+                    "VALUES (?, ?, ?, ?)", key + (translation,))
+                self._db.commit()
+
+    def _store(self, key, translation):
+        self._entries[key] = translation
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the current size.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
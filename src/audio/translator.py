@@ -1,12 +1,60 @@
-from transformers import pipeline
+import re
+import queue
+import time
+
+from audio.metrics import get_metrics
+from audio.model_manager import TranslationModelManager
+from audio.translation_cache import TranslationCache
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+def split_sentences(text):
+    """
+    Splits text into sentences on terminal punctuation.
+    """
+    return [sentence.strip() for sentence in _SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+
+def collect_batch(source_queue, max_batch=16, max_wait=0.05, timeout=1.0):
+    """
+    Gathers a micro-batch of items from a queue.
+
+    Blocks up to ``timeout`` seconds for the first item, then keeps collecting
+    until ``max_batch`` items are gathered or ``max_wait`` seconds have passed
+    since the first one arrived.
+
+    Returns:
+        list: The collected items (empty on timeout).
+    """
+    try:
+        batch = [source_queue.get(timeout=timeout)]
+    except queue.Empty:
+        return []
+    deadline = time.monotonic() + max_wait
+    while len(batch) < max_batch:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(source_queue.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return batch
 
 class Translator:
     """
     Translator uses Hugging Face's MarianMT models to translate text from English to a target language.
     """
-    def __init__(self):
-        # Dictionary to cache translation pipelines keyed by target language code.
-        self.translation_pipelines = {}
+    def __init__(self, cache_size=4096, cache_path=None, memory_budget_mb=1200, on_model_loaded=None):
+        """
+        Parameters:
+            cache_size (int): Number of sentence translations kept in memory;
+                              0 disables the cache.
+            cache_path (str): Optional SQLite file that persists the cache.
+            memory_budget_mb (float): RAM budget for loaded MarianMT models.
+            on_model_loaded (callable): Receives a report line whenever a
+                                        model is loaded or evicted.
+        """
+        self.cache = TranslationCache(cache_size, cache_path) if cache_size else None
         # Mapping from target language code to MarianMT model names.
         self.model_map = {
             'fr': "Helsinki-NLP/opus-mt-en-fr",
@@ -16,7 +64,31 @@ class Translator:
             'pt': "Helsinki-NLP/opus-mt-en-pt",
             # Add more mappings as needed.
         }
+        # Loads, warms up and evicts the per-language pipelines.
+        self.models = TranslationModelManager(self.model_map, memory_budget_mb=memory_budget_mb,
+                                              on_loaded=on_model_loaded)
+        # Model times and cache use are recorded as "translate.*" metrics.
+        self.metrics = get_metrics()
+
+    @property
+    def translation_pipelines(self):
+        """Loaded translation pipelines keyed by target language code."""
+        return self.models.pipelines
+
+    def preload(self, target_lang: str):
+        """Starts loading a language's model in the background."""
+        return self.models.preload(target_lang.lower())
     
+    def get_pipeline(self, target_lang: str):
+        """
+        Returns the cached translation pipeline for a language, loading it on
+        first use. Returns None if no model is available.
+        """
+        if target_lang not in self.model_map:
+            print(f"No translation model available for language: {target_lang}. Returning original text.")
+            return None
+        return self.models.get(target_lang)
+
     def translate(self, text: str, target_lang: str) -> str:
         """
         Translates a given text from English to the target language using MarianMT.
@@ -28,27 +100,80 @@ class Translator:
         Returns:
             str: The translated text.
         """
+        return self.translate_batch([text], target_lang)[0]
+
+    def translate_batch(self, texts, target_lang: str, batch_size=16):
+        """
+        Translates several texts with as few model calls as possible.
+
+        Every text is split into sentences. Cached sentences are answered
+        directly; the distinct remaining sentences are sorted by length (to
+        minimise padding) and run through one padded ``generate`` call per
+        ``batch_size`` sentences. The translated sentences are then re-joined
+        per input text, in the original order.
+
+        Parameters:
+            texts (list): The texts to translate.
+            target_lang (str): The target language code.
+            batch_size (int): Maximum sentences per generate call.
+
+        Returns:
+            list: One translated string per input text.
+        """
         target_lang = target_lang.lower()
         if target_lang == "en":
-            return text  # No translation needed.
-        if target_lang not in self.model_map:
-            print(f"No translation model available for language: {target_lang}. Returning original text.")
-            return text
-        
-        # Load the translator pipeline if not already cached.
-        if target_lang not in self.translation_pipelines:
-            try:
-                translator = pipeline("translation", model=self.model_map[target_lang])
-                self.translation_pipelines[target_lang] = translator
-            except Exception as e:
-                print(f"Error loading translation model for {target_lang}: {e}")
-                return text
-        
-        translator = self.translation_pipelines[target_lang]
+            return list(texts)  # No translation needed.
+        translator = self.get_pipeline(target_lang)
+        if translator is None:
+            return list(texts)
+
+        sentences = []
+        owners = []
+        for index, text in enumerate(texts):
+            for sentence in split_sentences(text):
+                sentences.append(sentence)
+                owners.append(index)
+        translated = list(sentences)
+        model_name = self.model_map[target_lang]
+        # Serve repeated sentences from the cache; translate each distinct
+        # remaining sentence once.
+        pending = {}
+        for i, sentence in enumerate(sentences):
+            cached = self.cache.get(model_name, target_lang, sentence) if self.cache else None
+            if cached is not None:
+                translated[i] = cached
+            else:
+                pending.setdefault(sentence, []).append(i)
+        unique = sorted(pending, key=len)
+        self.metrics.increment("translate.sentences", len(sentences))
+        self.metrics.increment("translate.cache_hits", len(sentences) - sum(map(len, pending.values())))
         try:
-            translated = translator(text, max_length=512)
-            return translated[0]['translation_text']
+            for start in range(0, len(unique), batch_size):
+                chunk = unique[start:start + batch_size]
+                with self.metrics.timer(f"translate.{target_lang}.generate"):
+                    outputs = self._generate(translator, chunk)
+                self.metrics.observe("translate.batch_size", len(chunk))
+                for sentence, output in zip(chunk, outputs):
+                    for i in pending[sentence]:
+                        translated[i] = output
+                    if self.cache:
+                        self.cache.put(model_name, target_lang, sentence, output)
         except Exception as e:
+            self.metrics.increment("translate.errors")
             print("Error during translation:", e)
-            return text
+            return list(texts)
+
+        results = [[] for _ in texts]
+        for owner, sentence in zip(owners, translated):
+            results[owner].append(sentence)
+        return [" ".join(parts) for parts in results]
+
+    def _generate(self, translator, sentences):
+        import torch
+        tokenizer, model = translator.tokenizer, translator.model
+        inputs = tokenizer(sentences, return_tensors="pt", padding=True, truncation=True)
+        inputs = inputs.to(model.device)
+        with torch.no_grad():
+            generated = model.generate(**inputs, max_length=512)
+        return tokenizer.batch_decode(generated, skip_special_tokens=True)
 
@@ -0,0 +1,252 @@
+import numpy as np
+
+class VoiceActivityDetector:
+    """
+    Lightweight energy + spectral-flux voice activity detector.
+
+    Audio is split into short frames; a frame counts as speech when its energy
+    is well above an adaptive noise floor, or moderately above it while the
+    spectrum is changing quickly (speech onsets). A short hangover keeps the
+    decision on through the gaps between words. State carries over between
+    calls so the detector can be fed a live stream chunk by chunk.
+    """
+    def __init__(self, sample_rate=16000, frame_duration=0.02, energy_margin_db=9.0,
+                 flux_threshold=0.35, min_energy_db=-65.0, hangover=0.3):
+        """
+        Parameters:
+            sample_rate (int): Rate of the analysed audio.
+            frame_duration (float): Analysis frame length in seconds.
+            energy_margin_db (float): Required level above the noise floor.
+            flux_threshold (float): Normalised spectral flux that marks an onset.
+            min_energy_db (float): Frames quieter than this are never speech.
+            hangover (float): Seconds speech is held after the last loud frame.
+        """
+        self.sample_rate = sample_rate
+        self.frame_len = int(sample_rate * frame_duration)
+        self.energy_margin_db = energy_margin_db
+        self.flux_threshold = flux_threshold
+        self.min_energy_db = min_energy_db
+        self.hangover_frames = int(round(hangover / frame_duration))
+        self._window = np.hanning(self.frame_len).astype(np.float32)
+        self.reset()
+
+    def reset(self):
+        self.noise_floor_db = None
+        self._prev_spectrum = None
+        self._hang = 0
+
+    def _frames(self, audio):
+        n = len(audio) // self.frame_len
+        frames = audio[:n * self.frame_len].reshape(n, self.frame_len)
+        if n * self.frame_len < len(audio) and len(audio) >= self.frame_len:
+            # Analyse the partial tail with the last full frame's worth of audio.
+            frames = np.vstack((frames, audio[-self.frame_len:]))
+        return frames
+
+    def frame_features(self, audio):
+        """
+        Returns per-frame energy (dB) and normalised positive spectral flux.
+        """
+        frames = self._frames(np.asarray(audio, dtype=np.float32))
+        if len(frames) == 0:
+            return np.zeros(0), np.zeros(0)
+        energy_db = 10.0 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+        spectrum = np.abs(np.fft.rfft(frames * self._window, axis=1))
+        previous = spectrum[:1] if self._prev_spectrum is None else self._prev_spectrum
+        shifted = np.vstack((previous, spectrum[:-1]))
+        flux = np.clip(spectrum - shifted, 0, None).sum(axis=1) / (spectrum.sum(axis=1) + 1e-10)
+        self._prev_spectrum = spectrum[-1:]
+        return energy_db, flux
+
+    def frame_mask(self, audio):
+        """
+        Returns a boolean speech decision per analysis frame.
+        """
+        energy_db, flux = self.frame_features(audio)
+        if len(energy_db) == 0:
+            return np.zeros(0, dtype=bool)
+        if self.noise_floor_db is None:
+            self.noise_floor_db = float(np.percentile(energy_db, 10))
+        mask = np.zeros(len(energy_db), dtype=bool)
+        floor = self.noise_floor_db
+        for i, (energy, change) in enumerate(zip(energy_db, flux)):
+            loud = energy > floor + self.energy_margin_db
+            onset = energy > floor + self.energy_margin_db / 2 and change > self.flux_threshold
+            speech = energy > self.min_energy_db and (loud or onset)
+            if speech:
+                self._hang = self.hangover_frames
+            elif self._hang > 0:
+                self._hang -= 1
+                speech = True
+            # Track the floor quickly downwards and slowly upwards.
+            if energy < floor:
+                floor = 0.7 * floor + 0.3 * energy
+            elif not speech:
+                floor = 0.98 * floor + 0.02 * energy
+            mask[i] = speech
+        self.noise_floor_db = floor
+        return mask
+
+    def sample_mask(self, audio):
+        """
+        Returns a boolean speech decision per sample.
+        """
+        frame_mask = self.frame_mask(audio)
+        mask = np.repeat(frame_mask, self.frame_len)[:len(audio)]
+        if len(mask) < len(audio):
+            tail = frame_mask[-1] if len(frame_mask) else False
+            mask = np.concatenate((mask, np.full(len(audio) - len(mask), tail)))
+        return mask
+
+    def contains_speech(self, audio):
+        return bool(self.frame_mask(audio).any())
+
+    def trim_silence(self, audio, padding=0.2):
+        """
+        Removes leading and trailing silence, keeping ``padding`` seconds of
+        context on each side. Returns an empty array if there is no speech.
+        """
+        speech = np.flatnonzero(self.sample_mask(audio))
+        if len(speech) == 0:
+            return audio[:0]
+        pad = int(padding * self.sample_rate)
+        return audio[max(0, speech[0] - pad):speech[-1] + 1 + pad]
+
+class VADSegmenter:
+    """
+    Cuts a live stream into speech segments at natural pauses.
+
+    feed() returns complete segments (silence trimmed, cut where the speaker
+    pauses for ``min_pause`` seconds, or at the quietest point once a segment
+    reaches ``max_segment``). gate() is the alternative for incremental
+    transcription: it passes speech chunks through unchanged and signals
+    pauses. Either way, the amount of audio that never reaches Whisper is
+    tracked in ``skipped_seconds``.
+    """
+    def __init__(self, detector=None, sample_rate=16000, min_pause=0.5,
+                 max_segment=10.0, min_speech=0.3, padding=0.2):
+        self.detector = detector or VoiceActivityDetector(sample_rate=sample_rate)
+        self.sample_rate = sample_rate
+        self.min_pause = int(min_pause * sample_rate)
+        self.max_segment = max_segment
+        self.min_speech = int(min_speech * sample_rate)
+        self.padding = int(padding * sample_rate)
+        self.total_samples = 0
+        self.passed_samples = 0
+        self._reset_segment()
+        self._preroll = np.zeros(0, dtype=np.float32)
+        self._gate_silence = 0
+        self._gate_open = False
+
+    def _reset_segment(self):
+        self._segment = []
+        self._segment_len = 0
+        self._speech_len = 0
+        self._silence_run = 0
+
+    @property
+    def total_seconds(self):
+        return self.total_samples / self.sample_rate
+
+    @property
+    def skipped_seconds(self):
+        return (self.total_samples - self.passed_samples) / self.sample_rate
+
+    def report(self):
+        total = self.total_seconds
+        skipped = self.skipped_seconds
+        percent = 100.0 * skipped / total if total else 0.0
+        return f"VAD skipped {skipped:.1f} s of {total:.1f} s of audio ({percent:.0f}%)"
+
+    def _runs(self, mask):
+        edges = np.flatnonzero(np.diff(mask.astype(np.int8))) + 1
+        bounds = np.concatenate(([0], edges, [len(mask)]))
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            yield start, end, bool(mask[start])
+
+    def feed(self, chunk):
+        """
+        Adds audio and returns the list of segments completed by it.
+        """
+        chunk = np.asarray(chunk, dtype=np.float32)
+        self.total_samples += len(chunk)
+        mask = self.detector.sample_mask(chunk)
+        segments = []
+        for start, end, is_speech in self._runs(mask):
+            piece = chunk[start:end]
+            if is_speech:
+                if not self._segment and len(self._preroll):
+                    self._append(self._preroll)
+                    self._preroll = self._preroll[:0]
+                self._append(piece)
+                self._speech_len += len(piece)
+                self._silence_run = 0
+                if self._segment_len >= self.max_segment * self.sample_rate:
+                    segments.append(self._cut_at_quietest())
+            elif self._segment:
+                self._append(piece)
+                self._silence_run += len(piece)
+                if self._silence_run >= self.min_pause:
+                    segments.append(self._close())
+            else:
+                self._preroll = np.concatenate((self._preroll, piece))[-self.padding:]
+        return [segment for segment in segments if segment is not None]
+
+    def flush(self):
+        """Returns the segment in progress, if any, e.g. when recording stops."""
+        return self._close() if self._segment else None
+
+    def _append(self, piece):
+        self._segment.append(piece)
+        self._segment_len += len(piece)
+
+    def _close(self):
+        audio = np.concatenate(self._segment)
+        # Keep only `padding` samples of the trailing silence.
+        audio = audio[:len(audio) - max(0, self._silence_run - self.padding)]
+        speech_len = self._speech_len
+        self._reset_segment()
+        if speech_len < self.min_speech:
+            return None
+        self.passed_samples += len(audio)
+        return audio
+
+    def _cut_at_quietest(self):
+        audio = np.concatenate(self._segment)
+        frame = self.detector.frame_len
+        # Look for the quietest frame in the last third of the segment.
+        search_start = (2 * len(audio) // 3) // frame * frame
+        tail = audio[search_start:search_start + (len(audio) - search_start) // frame * frame]
+        if len(tail):
+            energy = np.mean(tail.reshape(-1, frame) ** 2, axis=1)
+            cut = search_start + int(np.argmin(energy)) * frame + frame // 2
+        else:
+            cut = len(audio)
+        head, rest = audio[:cut], audio[cut:]
+        self._reset_segment()
+        if len(rest):
+            self._append(rest)
+            self._speech_len = len(rest)
+        self.passed_samples += len(head)
+        return head
+
+    def gate(self, chunk):
+        """
+        Streaming alternative to feed() for incremental transcription.
+
+        Returns:
+            tuple: (chunk or None if it is silent, True when a pause of at
+                   least ``min_pause`` has just ended an utterance).
+        """
+        chunk = np.asarray(chunk, dtype=np.float32)
+        self.total_samples += len(chunk)
+        if self.detector.contains_speech(chunk):
+            self._gate_silence = 0
+            self._gate_open = True
+            self.passed_samples += len(chunk)
+            return chunk, False
+        self._gate_silence += len(chunk)
+        if self._gate_open and self._gate_silence >= self.min_pause:
+            self._gate_open = False
+            return None, True
+        return None, False
@@ -0,0 +1,282 @@
+"""
+Offline batch transcription of recorded audio files.
+
+Files are decoded in streaming 30 s chunks (so memory does not grow with the
+length of a recording) and spread over a pool of worker processes, each of
+which loads the Whisper model once and reuses it for every file it gets.
+
+Every finished segment is appended to ``<file>.partial.jsonl`` (e.g.
+``talk.wav.partial.jsonl``) as soon as it is decoded; if a run is
+interrupted, running the same command again skips finished files and resumes
+unfinished ones after their last saved segment. When a file is done the
+requested TXT/SRT/VTT/JSONL outputs (``talk.wav.txt``, ...) are written next
+to it and the partial file is removed. With --output-dir they go into that
+directory instead, below the file's path inside the directory argument it
+was found in (``recordings/day1/talk.wav`` -> ``<output-dir>/recordings/day1/``).
+
+Usage (from src/):
+    python batch.py recordings/ interview.mp3 --model small --workers 2 --formats txt,srt
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing as mp
+import numpy as np
+
+from audio.file_source import AUDIO_EXTENSIONS, stream_audio
+
+FORMATS = ("txt", "srt", "vtt", "jsonl")
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 30.0
+
+# Per-process state of a pool worker.
+_worker = {}
+
+def collect_files(paths):
+    """
+    Expands directories (recursively) into their audio files.
+
+    Returns:
+        list: (path, name) pairs sorted by path, where name is the file's
+              path relative to the parent of the argument it came from
+              (its output name inside --output-dir).
+    """
+    files = {}
+    for path in paths:
+        if os.path.isdir(path):
+            parent = os.path.dirname(os.path.abspath(path))
+            for root, _, names in os.walk(path):
+                for name in sorted(names):
+                    if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                        file = os.path.join(root, name)
+                        files.setdefault(os.path.abspath(file),
+                                         (file, os.path.relpath(os.path.abspath(file), parent)))
+        elif os.path.isfile(path):
+            files.setdefault(os.path.abspath(path), (path, os.path.basename(path)))
+        else:
+            print(f"Skipping {path}: not found")
+    return sorted(files.values())
+
+def output_base(path, output_dir=None, name=None):
+    """
+    Returns the output path without format extension: the input's own path,
+    or ``name`` (default: the file name) inside ``output_dir``. The input's
+    extension is kept, so talk.wav and talk.mp3 do not share outputs.
+    """
+    if output_dir:
+        return os.path.join(output_dir, name or os.path.basename(path))
+    return os.path.abspath(path)
+
+def is_done(path, formats, output_dir=None, name=None):
+    base = output_base(path, output_dir, name)
+    return (not os.path.exists(base + ".partial.jsonl")
+            and all(os.path.exists(f"{base}.{fmt}") for fmt in formats))
+
+def _timestamp(seconds, separator):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}"
+
+def write_outputs(base, segments, formats):
+    """
+    Writes the finished transcript of one file in every requested format.
+
+    Parameters:
+        base (str): Output path without extension.
+        segments (list): dicts with "start", "end" and "text".
+        formats (list): Any of FORMATS.
+    """
+    writers = {
+        "txt": lambda f: f.writelines(segment["text"] + "\n" for segment in segments),
+        "jsonl": lambda f: f.writelines(json.dumps(segment, ensure_ascii=False) + "\n"
+                                        for segment in segments),
+        "srt": lambda f: f.writelines(
+            f"{i}\n{_timestamp(s['start'], ',')} --> {_timestamp(s['end'], ',')}\n{s['text']}\n\n"
+            for i, s in enumerate(segments, 1)),
+        "vtt": lambda f: f.write("WEBVTT\n\n" + "".join(
+            f"{_timestamp(s['start'], '.')} --> {_timestamp(s['end'], '.')}\n{s['text']}\n\n"
+            for s in segments)),
+    }
+    for fmt in formats:
+        # Write then rename so an interrupted run never leaves a truncated
+        # output that looks finished.
+        with open(f"{base}.{fmt}.tmp", "w", encoding="utf-8") as f:
+            writers[fmt](f)
+        os.replace(f"{base}.{fmt}.tmp", f"{base}.{fmt}")
+
+def read_partial(partial_path):
+    """
+    Returns the segments saved by an interrupted run. A last line cut off
+    mid-write is ignored.
+    """
+    segments = []
+    if not os.path.exists(partial_path):
+        return segments
+    with open(partial_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                segments.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return segments
+
+def _init_worker(model_name, device, precision, threads):
+    import torch
+    from audio.model_registry import get_registry
+    if threads:
+        torch.set_num_threads(threads)
+    _worker["transcriber"] = get_registry().get(model_name, device, precision)
+    _worker["language"] = _worker["transcriber"].language
+
+def transcribe_file(path, formats, output_dir=None, language=None, prompt_chars=200, name=None):
+    """
+    Transcribes one file in a worker process, resuming after the segments of
+    an earlier interrupted run.
+
+    Returns:
+        tuple: (path, seconds of audio decoded now, wall time, segment count).
+    """
+    transcriber = _worker["transcriber"]
+    # A pinned language only carries over between files if the user chose it.
+    transcriber.language = language or _worker["language"]
+    base = output_base(path, output_dir, name)
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    partial_path = base + ".partial.jsonl"
+    segments = read_partial(partial_path)
+    resume_at = segments[-1]["end"] if segments else 0.0
+    started = time.perf_counter()
+
+    window = int(WINDOW_SECONDS * SAMPLE_RATE)
+    buffer = np.zeros(0, dtype=np.float32)
+    offset = resume_at
+    decoded = 0.0
+    # Rewrite the partial file without a possibly truncated last line.
+    with open(partial_path + ".tmp", "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(segment, ensure_ascii=False) + "\n" for segment in segments)
+    os.replace(partial_path + ".tmp", partial_path)
+
+    with open(partial_path, "a", encoding="utf-8") as partial:
+        chunks = stream_audio(path, WINDOW_SECONDS, SAMPLE_RATE, start=resume_at)
+        finished = False
+        while not finished or len(buffer):
+            while not finished and len(buffer) < window:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    finished = True
+                else:
+                    buffer = np.concatenate((buffer, chunk))
+            final = finished and len(buffer) <= window
+            prompt = " ".join(s["text"] for s in segments[-10:])[-prompt_chars:] or None
+            new_segments, consumed = transcriber.decode_segments(buffer[:window], prompt=prompt, final=final)
+            for start, end, text in new_segments:
+                if not text:
+                    continue
+                segment = {"start": round(offset + start, 3), "end": round(offset + end, 3), "text": text}
+                segments.append(segment)
+                partial.write(json.dumps(segment, ensure_ascii=False) + "\n")
+            partial.flush()
+            # Always move forward, even if the window ended mid-segment.
+            cut = min(len(buffer), max(int(consumed * SAMPLE_RATE), SAMPLE_RATE))
+            buffer = buffer[cut:]
+            offset += cut / SAMPLE_RATE
+            decoded += cut / SAMPLE_RATE
+
+    write_outputs(base, segments, formats)
+    os.remove(partial_path)
+    return path, decoded, time.perf_counter() - started, len(segments)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Transcribe audio files and directories.")
+    parser.add_argument("paths", nargs="+", help="audio files or directories")
+    parser.add_argument("--model", default="base",
+                        help="Whisper model name (tiny, base, small, ...) or checkpoint path")
+    parser.add_argument("--precision", default="fp32", choices=["fp32", "int8", "bf16"],
+                        help="numeric precision for CPU inference")
+    parser.add_argument("--device", default=None, help="torch device (default: auto)")
+    parser.add_argument("--language", default=None,
+                        help="spoken language; detected per file if omitted")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes, each with its own model")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="torch threads per worker (default: CPUs / workers)")
+    parser.add_argument("--formats", default="txt,srt",
+                        help=f"comma-separated output formats ({', '.join(FORMATS)})")
+    parser.add_argument("--output-dir", default=None,
+                        help="directory for outputs (default: next to each input)")
+    parser.add_argument("--force", action="store_true",
+                        help="transcribe files again even if their outputs exist")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown:
+        print(f"Unknown output format(s): {', '.join(unknown)}")
+        return 2
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    files = collect_files(args.paths)
+    # Two inputs writing the same outputs would overwrite each other's
+    # transcripts and mix their partial files.
+    bases = {}
+    for path, name in files:
+        base = output_base(path, args.output_dir, name)
+        if base in bases:
+            print(f"{bases[base]} and {path} would both be written to {base}.*; "
+                  f"transcribe them in separate runs or into separate output directories")
+            return 2
+        bases[base] = path
+    pending = [(path, name) for path, name in files
+               if args.force or not is_done(path, formats, args.output_dir, name)]
+    if args.force:
+        for path, name in pending:
+            partial = output_base(path, args.output_dir, name) + ".partial.jsonl"
+            if os.path.exists(partial):
+                os.remove(partial)
+    print(f"{len(files)} file(s) found, {len(files) - len(pending)} already done, "
+          f"{len(pending)} to transcribe")
+    if not pending:
+        return 0
+
+    workers = max(1, min(args.workers, len(pending)))
+    threads = args.threads or max(1, (os.cpu_count() or 1) // workers)
+    started = time.perf_counter()
+    total_audio = 0.0
+    failures = 0
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                                   initializer=_init_worker,
+                                   initargs=(args.model, args.device, args.precision, threads))
+    try:
+        futures = {executor.submit(transcribe_file, path, formats, args.output_dir, args.language,
+                                   name=name): path
+                   for path, name in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            try:
+                _, audio_seconds, wall, count = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"[{done}/{len(pending)}] {path}: failed: {e}")
+                continue
+            total_audio += audio_seconds
+            rtf = wall / audio_seconds if audio_seconds else 0.0
+            print(f"[{done}/{len(pending)}] {path}: {count} segments, "
+                  f"{audio_seconds:.1f} s of audio in {wall:.1f} s (RTF {rtf:.2f})")
+    except KeyboardInterrupt:
+        print("\nInterrupted; run the same command again to resume.")
+        executor.shutdown(wait=False, cancel_futures=True)
+        return 130
+    executor.shutdown()
+    elapsed = time.perf_counter() - started
+    print(f"Transcribed {total_audio:.1f} s of audio in {elapsed:.1f} s with {workers} worker(s)"
+          + (f", {failures} failed" if failures else ""))
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
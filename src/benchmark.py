@@ -0,0 +1,485 @@
+"""
+Speed benchmarks for Transcriber, Translator and the capture-to-text pipeline.
+
+Every configuration (model x precision x thread count, or translation
+language x thread count) runs in a fresh child process, so model load times
+are really cold and peak RSS belongs to that configuration alone. Audio is
+synthetic and seeded (or read from --audio WAV/ffmpeg fixtures) and the
+translation text is canned, so two runs on the same machine measure the
+same work.
+
+Reported per configuration:
+  * cold and warm load time (first and second load in the child process),
+  * real-time factor and per-segment latency percentiles of
+    Transcriber.transcribe and Transcriber.transcribe_stream,
+  * optionally the VAD -> transcribe -> translate pipeline,
+  * translation latency and sentences/s for Translator.translate and
+    Translator.translate_batch,
+  * peak RSS of the process.
+
+Usage (from src/):
+    python benchmark.py run --models tiny,base --threads 1,4 --languages fr -o results.json
+    python benchmark.py compare baseline.json results.json --threshold 0.1
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+
+SAMPLE_RATE = 16000
+RESULT_PREFIX = "BENCHMARK-RESULT "
+
+CANNED_TEXT = [
+    "Good morning, and thank you all for joining the call today.",
+    "Before we start, could everyone please mute their microphones?",
+    "The first item on the agenda is the budget for the next quarter.",
+    "We spent slightly less than planned, mostly because the conference was cancelled.",
+    "Marketing would like to move part of that money into online advertising.",
+    "Does anyone have concerns about that proposal?",
+    "I think we should wait until the numbers for September are final.",
+    "That is a fair point, so let's come back to it next week.",
+    "The second item is the release of the new mobile application.",
+    "Testing is almost finished and only two minor bugs remain open.",
+    "The support team has prepared answers to the most common questions.",
+    "We expect the application to be available in the stores by Friday.",
+    "Please send me any last comments on the release notes by tomorrow.",
+    "Finally, a reminder that the office will be closed on Monday.",
+    "If there are no other questions, we can finish a little early today.",
+    "Thanks again, and have a great rest of your week.",
+]
+
+# Metrics compared by `compare`, and whether a larger value is better.
+METRICS = {
+    "import_seconds": False,
+    "cold_load_seconds": False,
+    "warm_load_seconds": False,
+    "peak_rss_mb": False,
+    "rtf": False,
+    "latency_p50": False,
+    "latency_p90": False,
+    "latency_p99": False,
+    "sentences_per_second": True,
+}
+
+def synthetic_speech(seconds, seed=0, sample_rate=SAMPLE_RATE):
+    """
+    Speech-like test audio: utterances of voiced "syllables" (harmonic
+    stacks shaped by vowel formants, with a syllable envelope) separated by
+    pauses, over a faint noise floor. The same seed gives the same audio.
+    """
+    rng = np.random.default_rng(seed)
+    formants = [(730, 1090), (270, 2290), (530, 1840), (570, 840), (300, 870), (660, 1720)]
+    audio = rng.standard_normal(int(seconds * sample_rate)).astype(np.float32) * 0.003
+    position = int(rng.uniform(0.2, 0.5) * sample_rate)
+    while position < len(audio):
+        utterance_end = position + int(rng.uniform(1.0, 3.0) * sample_rate)
+        while position < min(utterance_end, len(audio)):
+            length = min(int(rng.uniform(0.12, 0.3) * sample_rate), len(audio) - position)
+            t = np.arange(length) / sample_rate
+            f0 = rng.uniform(100, 220) * (1 - 0.1 * t / max(t[-1], 1e-3))
+            phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+            f1, f2 = formants[rng.integers(len(formants))]
+            syllable = np.zeros(length)
+            for harmonic in range(1, 30):
+                frequency = harmonic * f0.mean()
+                if frequency > sample_rate / 2:
+                    break
+                gain = (np.exp(-((frequency - f1) / 150) ** 2)
+                        + 0.5 * np.exp(-((frequency - f2) / 200) ** 2) + 0.02)
+                syllable += gain * np.sin(harmonic * phase)
+            syllable *= np.hanning(length)
+            audio[position:position + length] += 0.15 * syllable.astype(np.float32) / max(np.abs(syllable).max(), 1e-6)
+            position += length
+        position += int(rng.uniform(0.3, 0.8) * sample_rate)
+    return np.clip(audio, -1.0, 1.0)
+
+def fixture_audio(args):
+    """
+    Returns the benchmark audio: the --audio files joined together, or
+    ``args.seconds`` of synthetic speech.
+    """
+    if not args.audio:
+        return synthetic_speech(args.seconds, seed=args.seed)
+    from audio.file_source import stream_audio
+    return np.concatenate([chunk for path in args.audio
+                           for chunk in stream_audio(path, sample_rate=SAMPLE_RATE)])
+
+def fixture_segments(audio, segment_seconds):
+    length = int(segment_seconds * SAMPLE_RATE)
+    return [audio[i:i + length] for i in range(0, len(audio) - length // 2, length)]
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def summarize(latencies, audio_seconds=None):
+    """
+    Latency percentiles (seconds) of a list of timed calls, plus the
+    real-time factor when the audio length is known.
+    """
+    latencies = np.asarray(latencies, dtype=np.float64)
+    summary = {
+        "calls": len(latencies),
+        "total_seconds": float(latencies.sum()),
+        "latency_mean": float(latencies.mean()),
+        "latency_p50": float(np.percentile(latencies, 50)),
+        "latency_p90": float(np.percentile(latencies, 90)),
+        "latency_p99": float(np.percentile(latencies, 99)),
+        "latency_max": float(latencies.max()),
+    }
+    if audio_seconds:
+        summary["audio_seconds"] = audio_seconds
+        summary["rtf"] = float(latencies.sum()) / audio_seconds
+    return summary
+
+def time_calls(function, inputs, repeat=1):
+    latencies = []
+    for _ in range(repeat):
+        for item in inputs:
+            started = time.perf_counter()
+            function(item)
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+def bench_transcriber(args):
+    """
+    Child process: load times and decode speed of one Whisper configuration.
+    """
+    started = time.perf_counter()
+    import torch
+    from audio.transcriber import Transcriber
+    torch.set_num_threads(args.threads)
+    result = {"kind": "transcriber", "model": args.model, "precision": args.precision,
+              "threads": args.threads, "import_seconds": time.perf_counter() - started}
+
+    def load():
+        started = time.perf_counter()
+        transcriber = Transcriber(args.model, device=args.device, precision=args.precision,
+                                  language=args.language)
+        return transcriber, time.perf_counter() - started
+
+    transcriber, result["cold_load_seconds"] = load()
+    del transcriber
+    gc.collect()
+    transcriber, result["warm_load_seconds"] = load()
+    result["device"] = transcriber.device
+
+    audio = fixture_audio(args)
+    segments = fixture_segments(audio, args.segment_seconds)
+    audio_seconds = sum(len(segment) for segment in segments) / SAMPLE_RATE * args.repeat
+    # One untimed decode so lazy initialisation is not counted.
+    transcriber.decode_window(segments[0])
+    result["transcribe"] = summarize(
+        time_calls(transcriber.transcribe, segments, args.repeat), audio_seconds)
+    result["transcribe_stream"] = summarize(
+        time_calls(lambda segment: list(transcriber.transcribe_stream(segment, fast=True)),
+                   segments, args.repeat), audio_seconds)
+    if args.pipeline:
+        result["pipeline"] = bench_pipeline(transcriber, audio, args)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+def bench_pipeline(transcriber, audio, args):
+    """
+    Feeds the fixture through the VAD, transcriber and (optionally)
+    translator the way main.py does, as fast as possible. Latency is the
+    time from a segment being cut to its text (and translation) being ready.
+    """
+    from audio.vad import VADSegmenter
+    translator = None
+    if args.pipeline_language:
+        from audio.translator import Translator
+        translator = Translator(cache_size=0)
+        translator.get_pipeline(args.pipeline_language)
+    segmenter = VADSegmenter(sample_rate=SAMPLE_RATE, max_segment=args.segment_seconds * 2)
+    block = SAMPLE_RATE // 2
+    latencies = []
+    started = time.perf_counter()
+
+    def process(segment):
+        cut = time.perf_counter()
+        text = "".join(transcriber.transcribe_stream(segment, fast=True))
+        if translator is not None and text.strip():
+            translator.translate_batch([text], args.pipeline_language)
+        latencies.append(time.perf_counter() - cut)
+
+    for position in range(0, len(audio), block):
+        for segment in segmenter.feed(audio[position:position + block]):
+            process(segment)
+    segment = segmenter.flush()
+    if segment is not None:
+        process(segment)
+    elapsed = time.perf_counter() - started
+    summary = summarize(latencies or [0.0])
+    summary.update(audio_seconds=len(audio) / SAMPLE_RATE, rtf=elapsed / (len(audio) / SAMPLE_RATE),
+                   segments=len(latencies), speech_seconds=segmenter.passed_samples / SAMPLE_RATE,
+                   translation=args.pipeline_language)
+    return summary
+
+def bench_translator(args):
+    """
+    Child process: load times and throughput of one translation model.
+    """
+    started = time.perf_counter()
+    import torch
+    from audio.translator import Translator
+    torch.set_num_threads(args.threads)
+    result = {"kind": "translator", "language": args.language, "threads": args.threads,
+              "import_seconds": time.perf_counter() - started}
+
+    def load():
+        # No cache, so every call really runs the model.
+        translator = Translator(cache_size=0)
+        started = time.perf_counter()
+        if translator.get_pipeline(args.language) is None:
+            raise RuntimeError(f"Could not load the translation model for {args.language}")
+        return translator, time.perf_counter() - started
+
+    translator, result["cold_load_seconds"] = load()
+    del translator
+    gc.collect()
+    translator, result["warm_load_seconds"] = load()
+
+    single = time_calls(lambda text: translator.translate(text, args.language),
+                        CANNED_TEXT, args.repeat)
+    result["translate"] = summarize(single)
+    result["translate"]["sentences_per_second"] = len(single) / sum(single)
+    batched = time_calls(lambda texts: translator.translate_batch(texts, args.language),
+                         [CANNED_TEXT], args.repeat)
+    result["translate_batch"] = summarize(batched)
+    result["translate_batch"]["sentences_per_second"] = len(CANNED_TEXT) * args.repeat / sum(batched)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+def run_child(command, options, timeout):
+    """
+    Runs one configuration in a fresh interpreter and returns its result,
+    or a dict with an "error" entry.
+    """
+    process = subprocess.run([sys.executable, os.path.abspath(__file__), command] + options,
+                             capture_output=True, text=True, timeout=timeout)
+    for line in reversed(process.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    error = (process.stderr.strip().splitlines() or ["no output"])[-1]
+    return {"error": f"exit code {process.returncode}: {error}"}
+
+def environment():
+    def version(module):
+        try:
+            return __import__(module).__version__
+        except Exception:
+            return None
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "torch": version("torch"),
+        "whisper": version("whisper"),
+        "transformers": version("transformers"),
+    }
+
+def _split(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def run(args):
+    shared = ["--seconds", str(args.seconds), "--seed", str(args.seed),
+              "--segment-seconds", str(args.segment_seconds), "--repeat", str(args.repeat)]
+    for path in args.audio or []:
+        shared += ["--audio", path]
+    cases = []
+    for model in _split(args.models):
+        for precision in _split(args.precisions):
+            for threads in _split(args.threads):
+                options = shared + ["--model", model, "--precision", precision, "--threads", threads]
+                if args.device:
+                    options += ["--device", args.device]
+                if args.pipeline:
+                    options += ["--pipeline"]
+                    if args.pipeline_language:
+                        options += ["--pipeline-language", args.pipeline_language]
+                cases.append(("_transcriber", options,
+                              {"kind": "transcriber", "model": model, "precision": precision,
+                               "threads": int(threads)}))
+    for language in _split(args.languages or ""):
+        for threads in _split(args.threads):
+            cases.append(("_translator", shared + ["--language", language, "--threads", threads],
+                          {"kind": "translator", "language": language, "threads": int(threads)}))
+
+    results = []
+    for index, (command, options, key) in enumerate(cases, 1):
+        print(f"[{index}/{len(cases)}] {describe_case(key)} ...", flush=True)
+        try:
+            result = run_child(command, options, args.timeout)
+        except subprocess.TimeoutExpired:
+            result = {"error": f"timed out after {args.timeout} s"}
+        result = {**key, **result}
+        print("    " + describe_result(result), flush=True)
+        results.append(result)
+
+    report = {"environment": environment(),
+              "settings": {"seconds": args.seconds, "seed": args.seed, "audio": args.audio,
+                           "segment_seconds": args.segment_seconds, "repeat": args.repeat},
+              "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 1 if any("error" in result for result in results) else 0
+
+def describe_case(result):
+    if result["kind"] == "transcriber":
+        return f"whisper {result['model']} {result['precision']} x{result['threads']} threads"
+    return f"translation en-{result['language']} x{result['threads']} threads"
+
+def describe_result(result):
+    if "error" in result:
+        return f"failed: {result['error']}"
+    line = f"load {result['cold_load_seconds']:.2f} s cold / {result['warm_load_seconds']:.2f} s warm"
+    if result["kind"] == "transcriber":
+        for name in ("transcribe", "transcribe_stream", "pipeline"):
+            if name in result:
+                stats = result[name]
+                line += (f", {name} RTF {stats['rtf']:.2f} "
+                         f"(p50 {stats['latency_p50']:.2f} s, p90 {stats['latency_p90']:.2f} s)")
+    else:
+        line += (f", {result['translate']['sentences_per_second']:.1f} sentences/s single, "
+                 f"{result['translate_batch']['sentences_per_second']:.1f} batched")
+    if result.get("peak_rss_mb"):
+        line += f", peak RSS {result['peak_rss_mb']:.0f} MB"
+    return line
+
+def flatten(result, prefix=""):
+    """Flattens nested sections into "section.metric" keys."""
+    flat = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix + key] = value
+    return flat
+
+def case_key(result):
+    return tuple(result.get(field) for field in ("kind", "model", "precision", "language", "threads"))
+
+def compare(args):
+    """
+    Prints the change of every metric between two result files and returns
+    1 if any got worse by more than the threshold.
+    """
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = {case_key(r): r for r in json.load(f)["results"] if "error" not in r}
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = {case_key(r): r for r in json.load(f)["results"] if "error" not in r}
+    regressions = 0
+    for key in baseline:
+        if key not in candidate:
+            continue
+        print(describe_case(candidate[key]))
+        old, new = flatten(baseline[key]), flatten(candidate[key])
+        for name in sorted(old):
+            metric = name.rsplit(".", 1)[-1]
+            if metric not in METRICS or name not in new or not old[name]:
+                continue
+            change = (new[name] - old[name]) / old[name]
+            worse = -change if METRICS[metric] else change
+            flag = ""
+            if worse > args.threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            elif worse < -args.threshold:
+                flag = "  improved"
+            print(f"    {name:40s} {old[name]:10.3f} -> {new[name]:10.3f}  {change:+7.1%}{flag}")
+    missing = [describe_case(baseline[key]) for key in baseline if key not in candidate]
+    if missing:
+        print("Not in the new results: " + ", ".join(missing))
+    print(f"{regressions} regression(s) above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+def add_fixture_arguments(parser):
+    parser.add_argument("--seconds", type=float, default=60.0,
+                        help="length of the synthetic fixture audio")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic audio")
+    parser.add_argument("--audio", action="append",
+                        help="audio file to use instead of synthetic audio (repeatable)")
+    parser.add_argument("--segment-seconds", type=float, default=5.0,
+                        help="length of each transcribed segment")
+    parser.add_argument("--repeat", type=int, default=1, help="passes over the fixtures")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark transcription and translation speed.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--models", default="tiny,base",
+                            help="comma-separated Whisper model names or checkpoint paths")
+    run_parser.add_argument("--precisions", default="fp32",
+                            help="comma-separated precisions (fp32, int8, bf16)")
+    run_parser.add_argument("--threads", default=str(os.cpu_count() or 1),
+                            help="comma-separated torch thread counts")
+    run_parser.add_argument("--device", default=None, help="torch device (default: auto)")
+    run_parser.add_argument("--languages", default=None,
+                            help="comma-separated translation targets to benchmark (e.g. fr,de)")
+    run_parser.add_argument("--pipeline", action="store_true",
+                            help="also time the VAD -> transcribe (-> translate) pipeline")
+    run_parser.add_argument("--pipeline-language", default=None,
+                            help="translation target used by --pipeline")
+    run_parser.add_argument("--timeout", type=float, default=3600,
+                            help="seconds before a configuration is abandoned")
+    run_parser.add_argument("-o", "--output", default=None, help="write results to this JSON file")
+    add_fixture_arguments(run_parser)
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                                help="relative change reported as a regression")
+
+    # Run inside the child processes started by `run`.
+    transcriber_parser = commands.add_parser("_transcriber")
+    transcriber_parser.add_argument("--model", required=True)
+    transcriber_parser.add_argument("--precision", default="fp32")
+    transcriber_parser.add_argument("--threads", type=int, default=1)
+    transcriber_parser.add_argument("--device", default=None)
+    # Pinned so language detection does not vary between runs.
+    transcriber_parser.add_argument("--language", default="en")
+    transcriber_parser.add_argument("--pipeline", action="store_true")
+    transcriber_parser.add_argument("--pipeline-language", default=None)
+    add_fixture_arguments(transcriber_parser)
+    translator_parser = commands.add_parser("_translator")
+    translator_parser.add_argument("--language", required=True)
+    translator_parser.add_argument("--threads", type=int, default=1)
+    add_fixture_arguments(translator_parser)
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.command == "run":
+        return run(args)
+    if args.command == "compare":
+        return compare(args)
+    bench = bench_transcriber if args.command == "_transcriber" else bench_translator
+    print(RESULT_PREFIX + json.dumps(bench(args)), flush=True)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
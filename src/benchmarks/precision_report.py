@@ -0,0 +1,107 @@
+"""
+Accuracy-vs-speed report for the Transcriber precision modes.
+
+Runs every clip in a directory through each precision and reports the word
+error rate against reference transcripts and the real-time factor (decode
+time / audio duration). A clip ``name.wav`` (or any format ffmpeg reads) is
+scored against ``name.txt`` next to it; clips without a reference only
+contribute to the timing.
+
+Usage (from src/):
+    python -m benchmarks.precision_report path/to/clips --model small
+"""
+import argparse
+import json
+import os
+import re
+import time
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".m4a", ".ogg")
+
+def normalize_words(text):
+    return re.sub(r"[^\w' ]", " ", text.lower()).split()
+
+def word_error_rate(reference, hypothesis):
+    """
+    Word-level edit distance divided by the reference length.
+    """
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hyp, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1] / len(ref)
+
+def load_clips(directory):
+    """
+    Returns (name, audio, reference or None) for every audio file, sorted by name.
+    """
+    import whisper
+    clips = []
+    for name in sorted(os.listdir(directory)):
+        stem, extension = os.path.splitext(name)
+        if extension.lower() not in AUDIO_EXTENSIONS:
+            continue
+        reference_path = os.path.join(directory, stem + ".txt")
+        reference = None
+        if os.path.isfile(reference_path):
+            with open(reference_path, encoding="utf-8") as f:
+                reference = f.read()
+        clips.append((name, whisper.load_audio(os.path.join(directory, name)), reference))
+    return clips
+
+def evaluate(model_name, precision, clips):
+    from audio.transcriber import Transcriber
+    start = time.perf_counter()
+    transcriber = Transcriber(model_name=model_name, device="cpu", precision=precision)
+    load_time = time.perf_counter() - start
+    # Warm up so one-off initialisation is not charged to the first clip.
+    transcriber.transcribe(clips[0][1][:16000])
+
+    audio_seconds = decode_seconds = 0.0
+    errors = []
+    for name, audio, reference in clips:
+        start = time.perf_counter()
+        text = transcriber.transcribe(audio)
+        decode_seconds += time.perf_counter() - start
+        audio_seconds += len(audio) / 16000
+        if reference is not None:
+            errors.append(word_error_rate(reference, text))
+    return {
+        "model": model_name,
+        "precision": transcriber.precision,
+        "load_time": load_time,
+        "rtf": decode_seconds / audio_seconds if audio_seconds else 0.0,
+        "wer": sum(errors) / len(errors) if errors else None,
+        "clips": len(clips),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Whisper precision modes on a fixed set of clips.")
+    parser.add_argument("clips", help="directory of audio clips with optional .txt references")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--precisions", default="fp32,int8,bf16",
+                        help="comma-separated list of precision modes")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    clips = load_clips(args.clips)
+    if not clips:
+        parser.error(f"No audio clips found in {args.clips}")
+    results = [evaluate(args.model, precision, clips) for precision in args.precisions.split(",")]
+
+    print(f"{'precision':<10} {'load (s)':>9} {'RTF':>7} {'WER':>7}")
+    for result in results:
+        wer = "n/a" if result["wer"] is None else f"{result['wer']:.1%}"
+        print(f"{result['precision']:<10} {result['load_time']:>9.2f} {result['rtf']:>7.3f} {wer:>7}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,298 @@
+import argparse
+import collections
 import threading
 import queue
 import time
 from audio.recorder import Recorder
-from audio.transcriber import Transcriber
+from audio.streaming import IncrementalTranscriber
+from audio.vad import VADSegmenter
+from audio.process_pool import TranscriberPool
+from audio.scheduler import AdaptiveScheduler
+from audio.multistream import MultiStreamTranscriber
+from audio.metrics import get_metrics
+from audio.profiling import get_profiler
+from audio.pipeline import StageQueue, merge_audio
 
-# Thread-safe queue for recorded audio segments.
-audio_queue = queue.Queue()
+# Thread-safe queue for recorded audio segments. It is bounded; when
+# transcription falls behind, adjacent segments are merged (up to 30 s).
+audio_queue = StageQueue("audio", maxsize=8, policy="coalesce", coalesce=merge_audio(30 * 16000))
+metrics = get_metrics()
+profiler = get_profiler()
 
-def recording_thread(recorder, segment_duration):
+def recording_thread(recorder, segment_duration, segmenter=None, incremental=False, scheduler=None):
     """
     Continuously record audio segments and put them in the shared queue.
+
+    With a VAD segmenter, silent audio is dropped and segments are cut at
+    pauses; in incremental mode a None item marks the end of an utterance.
+    Without one, a scheduler (if given) decides the segment length.
     """
+    recorder.start_stream()
     while True:
-        audio_data = recorder.record(segment_duration)
-        if audio_data is not None:
+        if scheduler is not None and segmenter is None:
+            segment_duration = scheduler.segment_duration
+        audio_data = recorder.read(segment_duration)
+        if audio_data is None:
+            break
+        # Copy out of the ring buffer before handing the segment to another thread.
+        audio_data = audio_data.copy()
+        if segmenter is None:
             audio_queue.put(audio_data)
+        elif incremental:
+            speech, pause = segmenter.gate(audio_data)
+            if speech is not None:
+                audio_queue.put(speech)
+            if pause:
+                audio_queue.put(None)
+        else:
+            for segment in segmenter.feed(audio_data):
+                audio_queue.put(segment)
 
 
-def transcription_thread(transcriber):
+def device_recording_thread(recorder, name, multistream, segment_duration, segmenter=None):
+    """
+    Records one of several input devices and submits its segments to the
+    shared multi-stream transcriber under the device's stream name.
+    """
+    recorder.start_stream()
+    while True:
+        audio_data = recorder.read(segment_duration)
+        if audio_data is None:
+            break
+        audio_data = audio_data.copy()
+        if segmenter is None:
+            multistream.submit(name, audio_data)
+        else:
+            for segment in segmenter.feed(audio_data):
+                multistream.submit(name, segment)
+
+def print_stream_text(name, text):
+    if text.strip():
+        print(f"[{name}] {text.strip()}", flush=True)
+
+
+def transcription_thread(transcriber, fast=True, scheduler=None):
     """
     Continuously retrieve audio segments from the queue, transcribe them,
-    and print out each segment character by character to simulate streaming.
+    and print each segment as soon as it is decoded.
     """
     while True:
-        audio_data = audio_queue.get()  # Block until a segment is available.
-        for segment in transcriber.transcribe_stream(audio_data):
-            for char in segment:
-                print(char, end="", flush=True)
-                # Adjust the delay to control the streaming speed (in seconds)
-                time.sleep(0.03)
+        if scheduler is None:
+            audio_data = audio_queue.get()  # Block until a segment is available.
+        else:
+            # The scheduler merges backlog and adapts to the measured speed.
+            audio_data = scheduler.next_segment(audio_queue)
+        trace = metrics.start_trace(captured_at=audio_queue.last_enqueued)
+        trace.mark("dequeued")
+        # Both the decode and the printing belong to this segment.
+        with profiler.segment(trace.id):
+            if scheduler is None:
+                segments = transcriber.transcribe_stream(audio_data, fast=fast)
+            else:
+                segments = scheduler.transcribe(transcriber, audio_data,
+                                                queue_depth=audio_queue.qsize(), fast=fast)
+            for segment in segments:
+                print(segment, end="", flush=True)
         # Print a newline after finishing the segment
         print("", flush=True)
+        metrics.finish_trace(trace, "printed")
         audio_queue.task_done()
 
+def pooled_transcription_thread(pool, fast=True):
+    """
+    Keep every worker process busy by submitting segments as they arrive,
+    and print the results in recording order.
+    """
+    pending = collections.deque()
+    while True:
+        try:
+            # Only block when nothing is in flight.
+            audio_data = audio_queue.get(timeout=None if not pending else 0.05)
+            audio_queue.task_done()
+            pending.append(pool.submit(audio_data, fast=fast))
+        except queue.Empty:
+            pass
+        except RuntimeError as e:
+            # A worker died; the pool cannot be used any more.
+            print("Transcription stopped:", e)
+            return
+        while pending and pending[0].done():
+            try:
+                segments = pending.popleft().result()
+            except Exception as e:
+                print("Error during streaming transcription:", e)
+                continue
+            print("".join(segments), flush=True)
+
+
+def incremental_transcription_thread(transcriber, update_interval):
+    """
+    Feed short audio chunks into a sliding-window transcriber and print
+    words as soon as they are committed.
+    """
+    engine = IncrementalTranscriber(transcriber, update_interval=update_interval)
+    while True:
+        chunks = [audio_queue.get()]
+        # Catch up on chunks that arrived during the previous decode.
+        while not audio_queue.empty():
+            chunks.append(audio_queue.get_nowait())
+        trace = metrics.start_trace(captured_at=audio_queue.last_enqueued)
+        trace.mark("dequeued")
+        with profiler.segment(trace.id):
+            for audio_data in chunks:
+                if audio_data is None:
+                    # End of utterance detected by the VAD.
+                    print(engine.finish(), flush=True)
+                else:
+                    engine.insert_audio(audio_data)
+                audio_queue.task_done()
+            committed, _ = engine.process()
+        if committed:
+            print(committed, end="", flush=True)
+            metrics.finish_trace(trace, "printed")
+
+def print_profile(result):
+    if isinstance(result, str):
+        print(result)
+    else:
+        print("Profile written to", ", ".join(result))
+
+def enable_profiling(args):
+    """
+    Starts the --profile capture and lets SIGUSR1 start further ones, of
+    the same length (20 s without --profile).
+    """
+    import signal
+    duration = args.profile or 20.0
+
+    def capture(*_):
+        if profiler.start(duration=duration, output_dir=args.profile_dir,
+                          on_finished=print_profile):
+            print(f"Profiling for {duration:g} s...")
+
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, capture)
+    if args.profile:
+        capture()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Continuous microphone transcription.")
+    parser.add_argument("--model", default="base",
+                        help="Whisper model name (tiny, base, small, ...) or checkpoint path")
+    parser.add_argument("--precision", default="fp32", choices=["fp32", "int8", "bf16"],
+                        help="numeric precision for CPU inference")
+    parser.add_argument("--full-decode", action="store_true",
+                        help="use whisper's full transcribe() loop instead of the direct decode path")
+    parser.add_argument("--incremental", action="store_true",
+                        help="re-decode a sliding window and print words as they stabilise")
+    parser.add_argument("--update-interval", type=float, default=0.5,
+                        help="seconds of new audio between incremental updates")
+    parser.add_argument("--no-vad", action="store_true",
+                        help="transcribe every block, including silence")
+    parser.add_argument("--max-segment", type=float, default=10.0,
+                        help="longest VAD segment in seconds before a forced cut")
+    parser.add_argument("--segment-duration", type=float, default=5.0,
+                        help="recorded segment length in seconds when the VAD is off")
+    parser.add_argument("--no-adapt", action="store_true",
+                        help="keep segment length and model fixed even when decoding falls behind")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="run Whisper in this many worker processes (0 = in-process)")
+    parser.add_argument("--pin-cpus", action="store_true",
+                        help="pin each worker process to its own share of the CPU cores")
+    parser.add_argument("--devices", default=None,
+                        help="comma-separated input device indices to transcribe at once "
+                             "with batched decoding on one model")
+    parser.add_argument("--max-batch", type=int, default=8,
+                        help="most windows decoded together in --devices mode")
+    parser.add_argument("--list-devices", action="store_true",
+                        help="list input devices and exit")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="serve latency metrics over HTTP on this port (/metrics)")
+    parser.add_argument("--metrics-file", default=None,
+                        help="write a JSON metrics snapshot to this file on exit")
+    parser.add_argument("--profile", type=float, default=None, metavar="SECONDS",
+                        help="record a profile of the first SECONDS of transcription "
+                             "(send SIGUSR1 to record another one later)")
+    parser.add_argument("--profile-dir", default="profiles",
+                        help="directory for profile traces (default: profiles)")
+    return parser.parse_args()
+
 def main():
+    args = parse_args()
+
     # Initialize the recorder and transcriber.
-    recorder = Recorder(sample_rate=32000, channels=1, dtype='float32')
-    transcriber = Transcriber(model_name="base")
-    segment_duration = 5  # seconds per recorded segment
+    recorder = Recorder(sample_rate=16000, channels=1, dtype='float32')
+    # Capture warnings (device overflows, lost audio) go to the console.
+    recorder.log_signal.connect(print)
+    if args.list_devices:
+        recorder.list_input_devices()
+        return
+    if args.devices and (args.incremental or args.workers > 0):
+        print("--devices cannot be combined with --incremental or --workers.")
+        return
+    metrics.add_collector("queues", lambda: [audio_queue.stats()])
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+        print(f"Metrics at http://127.0.0.1:{args.metrics_port}/metrics")
+    if args.workers > 0:
+        transcriber = TranscriberPool(model_name=args.model, workers=args.workers,
+                                      cpu_affinity="auto" if args.pin_cpus else None,
+                                      precision=args.precision)
+        print(f"Starting {args.workers} transcription worker process(es)...")
+        if not transcriber.wait_ready():
+            print("Transcription workers failed to start:", transcriber.error)
+            transcriber.close()
+            return
+    else:
+        # torch and whisper are only needed when decoding in this process.
+        from audio.model_registry import get_registry, SwappableTranscriber
+        transcriber = SwappableTranscriber(get_registry().get(args.model, precision=args.precision),
+                                           model_name=args.model, precision=args.precision,
+                                           on_switched=print)
+    enable_profiling(args)
+    if args.devices:
+        run_multistream(args, transcriber)
+        return
+    segment_duration = args.segment_duration  # seconds per recorded segment
+    segmenter = None
+    if not args.no_vad:
+        segmenter = VADSegmenter(sample_rate=recorder.target_rate,
+                                 max_segment=args.max_segment)
+        segment_duration = 0.5  # the VAD decides where segments end
+    if args.incremental:
+        segment_duration = args.update_interval
+    scheduler = None
+    if not (args.no_adapt or args.incremental or args.workers > 0):
+        scheduler = AdaptiveScheduler(
+            segment_duration=args.max_segment if segmenter else args.segment_duration,
+            max_segment=max(15.0, args.max_segment),
+            sample_rate=recorder.target_rate, transcriber=transcriber,
+            segmenter=segmenter, on_event=print)
 
     # Set up threads for recording and transcription.
     t_record = threading.Thread(
         target=recording_thread, 
-        args=(recorder, segment_duration),
-        daemon=True
-    )
-    t_transcribe = threading.Thread(
-        target=transcription_thread, 
-        args=(transcriber,),
+        args=(recorder, segment_duration, segmenter, args.incremental, scheduler),
         daemon=True
     )
+    if args.incremental:
+        t_transcribe = threading.Thread(
+            target=incremental_transcription_thread,
+            args=(transcriber, args.update_interval),
+            daemon=True
+        )
+    elif args.workers > 0:
+        t_transcribe = threading.Thread(
+            target=pooled_transcription_thread,
+            args=(transcriber, not args.full_decode),
+            daemon=True
+        )
+    else:
+        t_transcribe = threading.Thread(
+            target=transcription_thread, 
+            args=(transcriber, not args.full_decode, scheduler),
+            daemon=True
+        )
 
     t_record.start()
     t_transcribe.start()
@@ -60,6 +303,54 @@ def main():
             time.sleep(0.1)
     except KeyboardInterrupt:
         print("\nExiting continuous transcription.")
+        if segmenter is not None:
+            print(segmenter.report())
+        if args.workers > 0:
+            transcriber.close()
+        if args.metrics_file:
+            metrics.export(args.metrics_file)
+            print(f"Metrics written to {args.metrics_file}")
+
+def run_multistream(args, transcriber):
+    """
+    Transcribes several input devices at once. Each device has its own
+    recorder and VAD; their segments are decoded in shared batches.
+    """
+    import sounddevice as sd
+    multistream = MultiStreamTranscriber(transcriber, max_batch=args.max_batch)
+    recorders, segmenters = [], []
+    for index in args.devices.split(","):
+        recorder = Recorder(sample_rate=16000, channels=1, dtype='float32')
+        recorder.set_input_device(sd.query_devices(int(index)))
+        recorder.log_signal.connect(print)
+        name = f"{index}: {recorder.device['name']}"
+        segmenter = None
+        if not args.no_vad:
+            segmenter = VADSegmenter(sample_rate=recorder.target_rate, max_segment=args.max_segment)
+        multistream.add_stream(name, print_stream_text)
+        threading.Thread(target=device_recording_thread,
+                         args=(recorder, name, multistream,
+                               0.5 if segmenter else args.segment_duration, segmenter),
+                         daemon=True).start()
+        recorders.append(recorder)
+        segmenters.append(segmenter)
+    multistream.start()
+
+    print(f"Transcribing {len(recorders)} input devices. Press Ctrl+C to exit.")
+    try:
+        while True:
+            time.sleep(0.1)
+    except KeyboardInterrupt:
+        print("\nExiting continuous transcription.")
+        multistream.stop()
+        for recorder in recorders:
+            recorder.stop_stream()
+        multistream.join(5)
+        stats = multistream.stats()
+        print(f"{stats['windows']} windows decoded in {stats['batches']} batches "
+              f"(mean batch {stats['mean_batch']:.1f})")
+        if args.metrics_file:
+            metrics.export(args.metrics_file)
 
 if __name__ == "__main__":
     main()
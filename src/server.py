@@ -0,0 +1,490 @@
+"""
+Headless streaming transcription server.
+
+Clients stream raw PCM over HTTP and receive transcript events on the same
+connection while they are still sending:
+
+    POST /stream?rate=16000&translate=fr,de&language=en HTTP/1.1
+    Transfer-Encoding: chunked
+
+    <16-bit little-endian mono PCM, in chunks of any size>
+
+The response is a chunked stream of newline-delimited JSON events:
+
+    {"type": "partial", "text": "..."}       tentative text of the current window
+    {"type": "committed", "text": "..."}     text that will not change any more
+    {"type": "sentence", "text": "..."}      a complete sentence
+    {"type": "translation", "lang": "fr", "text": "..."}
+    {"type": "error", "text": "..."}         the session failed; "end" follows
+    {"type": "end"}
+
+All sessions share one Whisper model and one Translator; each session keeps
+its own VAD, sliding window, language and sentence state (language= pins
+it; otherwise it is detected per session). Decodes from all sessions go
+through a single worker thread, so they never compete for the model, and
+at most --max-sessions streams are admitted (others get 503). GET /health
+returns the number of active sessions and the decode backlog, GET /metrics
+the latency metrics as JSON (or Prometheus text with ?format=prometheus),
+and POST /profile?seconds=20 records a profile into --profile-dir.
+
+Usage (from src/):
+    python server.py serve --model small --port 8765
+    python server.py client recording.wav --translate fr
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+
+from audio.metrics import get_metrics
+from audio.profiling import get_profiler
+from audio.resampler import StreamingResampler
+from audio.streaming import IncrementalTranscriber
+from audio.vad import VADSegmenter
+
+SAMPLE_RATE = 16000
+# Resampled audio is gated in blocks of at least this many samples, so that
+# clients sending tiny pieces (e.g. 10 ms frames) still fill whole VAD frames.
+GATE_SAMPLES = SAMPLE_RATE // 10
+
+class Session:
+    """
+    Per-connection state: resampler, VAD gate, incremental engine and the
+    unfinished sentence. Engine methods only run on the decode thread.
+    """
+    def __init__(self, server, rate, languages, language=None):
+        self.server = server
+        self.languages = languages
+        self.resampler = StreamingResampler(rate, SAMPLE_RATE)
+        self.segmenter = VADSegmenter(sample_rate=SAMPLE_RATE)
+        self.engine = IncrementalTranscriber(server.transcriber, update_interval=server.update_interval,
+                                             language=language)
+        self.events = asyncio.Queue()
+        self.pending = []
+        self.pending_samples = 0
+        self.audio_ready = asyncio.Event()
+        self.closed = False
+        self.sentence = ""
+        self.tentative = ""
+        self.dropped_seconds = 0.0
+        self.translations = set()
+        # When the newest audio arrived, for the per-update latency trace.
+        self.last_audio_at = None
+        # Body pieces can split a sample; its first byte waits here.
+        self.odd_byte = b""
+        # Resampled audio not yet passed through the VAD gate.
+        self.ungated = np.zeros(0, dtype=np.float32)
+
+    def add_audio(self, pcm):
+        pcm = self.odd_byte + pcm
+        usable = len(pcm) - len(pcm) % 2
+        pcm, self.odd_byte = pcm[:usable], pcm[usable:]
+        audio = np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+        self.ungated = np.concatenate((self.ungated, self.resampler.process(audio)))
+        if len(self.ungated) < GATE_SAMPLES:
+            return
+        # Gate whole VAD frames; the rest waits for the next piece.
+        frame = self.segmenter.detector.frame_len
+        usable = len(self.ungated) - len(self.ungated) % frame
+        self.gate(self.ungated[:usable])
+        self.ungated = self.ungated[usable:]
+
+    def flush_audio(self):
+        """Gates the audio still waiting for a full block, at end of stream."""
+        if len(self.ungated):
+            self.gate(self.ungated)
+            self.ungated = self.ungated[:0]
+
+    def gate(self, audio):
+        speech, pause = self.segmenter.gate(audio)
+        if speech is not None:
+            self.pending.append(speech)
+            self.pending_samples += len(speech)
+        if pause:
+            self.pending.append(None)
+        self.last_audio_at = time.perf_counter()
+        # Bound the backlog of a session whose audio arrives faster than
+        # it can be decoded.
+        while self.pending_samples > self.server.max_backlog * SAMPLE_RATE:
+            dropped = self.pending.pop(0)
+            if dropped is not None:
+                self.pending_samples -= len(dropped)
+                self.dropped_seconds += len(dropped) / SAMPLE_RATE
+                self.server.metrics.increment("server.dropped_samples", len(dropped))
+        self.audio_ready.set()
+
+    def step(self, chunks, finish, trace):
+        # Runs on the decode thread.
+        trace.mark("dequeued")
+        with get_profiler().segment(trace.id):
+            return self.decode(chunks, finish)
+
+    def decode(self, chunks, finish):
+        outputs = []
+        for chunk in chunks:
+            if chunk is None:
+                outputs.append(("finish", self.engine.finish()))
+            else:
+                self.engine.insert_audio(chunk)
+        committed, tentative = self.engine.process()
+        outputs.append(("commit", committed))
+        if finish:
+            outputs.append(("finish", self.engine.finish()))
+            tentative = ""
+        return outputs, tentative
+
+    async def emit(self, event):
+        await self.events.put(event)
+
+    async def handle_text(self, outputs, tentative):
+        for kind, text in outputs:
+            if text:
+                await self.emit({"type": "committed", "text": text})
+            self.sentence += text
+            if self.sentence.strip() and (kind == "finish" or re.search(r"[.!?]\s*$", self.sentence)):
+                sentence, self.sentence = self.sentence.strip(), ""
+                await self.emit({"type": "sentence", "text": sentence})
+                for lang in self.languages:
+                    task = asyncio.ensure_future(self.translate(sentence, lang))
+                    self.translations.add(task)
+                    task.add_done_callback(self.translations.discard)
+        if tentative != self.tentative:
+            self.tentative = tentative
+            await self.emit({"type": "partial", "text": tentative})
+
+    async def translate(self, sentence, lang):
+        loop = asyncio.get_running_loop()
+        self.server.translations_in_flight += 1
+        try:
+            # Includes the wait for a free translation thread.
+            with self.server.metrics.timer("server.translation", profile=False):
+                translated = await loop.run_in_executor(self.server.translate_pool,
+                                                        self.server.translator.translate_batch,
+                                                        [sentence], lang)
+            await self.emit({"type": "translation", "lang": lang, "text": translated[0]})
+        finally:
+            self.server.translations_in_flight -= 1
+
+    async def run_decoder(self):
+        """
+        Feeds queued audio to the engine until the client has finished
+        sending and everything has been decoded.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.audio_ready.wait()
+            self.audio_ready.clear()
+            chunks, self.pending, self.pending_samples = self.pending, [], 0
+            finish = self.closed
+            trace = self.server.metrics.start_trace(captured_at=self.last_audio_at)
+            self.server.decodes_queued += 1
+            try:
+                outputs, tentative = await loop.run_in_executor(self.server.decode_pool,
+                                                                self.step, chunks, finish, trace)
+            finally:
+                self.server.decodes_queued -= 1
+            trace.mark("transcribed")
+            await self.handle_text(outputs, tentative)
+            self.server.metrics.finish_trace(trace, "sent")
+            if finish:
+                break
+            if self.pending or self.closed:
+                self.audio_ready.set()
+
+class TranscriptionServer:
+    def __init__(self, transcriber, translator=None, max_sessions=8, update_interval=1.0, max_backlog=10.0,
+                 profile_dir="profiles"):
+        """
+        Parameters:
+            transcriber: Shared Transcriber (or SwappableTranscriber).
+            translator (Translator): Shared translator, or None to disable
+                                     translation events.
+            max_sessions (int): Concurrent streams admitted; others get 503.
+            update_interval (float): Seconds of new audio between re-decodes
+                                     of a session's window.
+            max_backlog (float): Seconds of undecoded audio kept per session.
+            profile_dir (str): Directory for captures started with POST /profile.
+        """
+        self.transcriber = transcriber
+        self.translator = translator
+        self.max_sessions = max_sessions
+        self.update_interval = update_interval
+        self.max_backlog = max_backlog
+        self.profile_dir = profile_dir
+        self.sessions = set()
+        self.decodes_queued = 0
+        self.translations_in_flight = 0
+        self.metrics = get_metrics()
+        self.metrics.add_collector("server", self.health)
+        # One decode thread: every session's windows take turns on the model.
+        self.decode_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="decode")
+        self.translate_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="translate")
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1")
+                if line in ("\r\n", "\n", ""):
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            method, target, _ = (request_line.split(" ") + ["", "", ""])[:3]
+            url = urlparse(target)
+            if method == "GET" and url.path == "/health":
+                await self.respond(writer, 200, self.health())
+            elif method == "GET" and url.path == "/metrics":
+                if "prometheus" in parse_qs(url.query).get("format", []):
+                    await self.respond(writer, 200, self.metrics.to_prometheus(), "text/plain; version=0.0.4")
+                else:
+                    await self.respond(writer, 200, self.metrics.snapshot())
+            elif method == "POST" and url.path == "/profile":
+                await self.profile(writer, parse_qs(url.query))
+            elif method == "POST" and url.path == "/stream":
+                await self.stream(reader, writer, headers, parse_qs(url.query))
+            else:
+                await self.respond(writer, 404, {"error": "not found"})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            # Only reached before a response was started; stream() reports
+            # its own failures as an error event.
+            print("Error while handling a request:", repr(e))
+            try:
+                await self.respond(writer, 500, {"error": str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    def health(self):
+        return {"sessions": len(self.sessions), "max_sessions": self.max_sessions,
+                "decodes_queued": self.decodes_queued,
+                "translations_in_flight": self.translations_in_flight}
+
+    async def profile(self, writer, query):
+        try:
+            seconds = float(query.get("seconds", ["20"])[0])
+        except ValueError:
+            await self.respond(writer, 400, {"error": "seconds must be a number"})
+            return
+        # start() warms up the torch profiler, which can take a moment.
+        started = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: get_profiler().start(duration=seconds, output_dir=self.profile_dir,
+                                               on_finished=self.profile_finished))
+        if started:
+            print(f"Profiling for {seconds:g} s...")
+            await self.respond(writer, 200, {"profiling": seconds, "output_dir": self.profile_dir})
+        else:
+            await self.respond(writer, 409, {"error": "a profile is already being recorded"})
+
+    @staticmethod
+    def profile_finished(result):
+        print(result if isinstance(result, str) else "Profile written to " + ", ".join(result))
+
+    async def respond(self, writer, status, body, content_type="application/json"):
+        reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 409: "Conflict",
+                   500: "Internal Server Error", 503: "Service Unavailable"}
+        data = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+        writer.write(f"HTTP/1.1 {status} {reasons[status]}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data)
+        await writer.drain()
+
+    async def stream(self, reader, writer, headers, query):
+        try:
+            rate = int(query.get("rate", [SAMPLE_RATE])[0])
+        except ValueError:
+            rate = 0
+        if rate <= 0:
+            await self.respond(writer, 400, {"error": "rate must be a positive integer"})
+            return
+        if len(self.sessions) >= self.max_sessions:
+            await self.respond(writer, 503, {"error": "server busy", **self.health()})
+            return
+        language = query.get("language", [None])[0] or None
+        languages = [lang for lang in query.get("translate", [""])[0].split(",") if lang]
+        if self.translator is None:
+            languages = []
+        for lang in languages:
+            self.translator.preload(lang)
+        session = Session(self, rate, languages, language)
+        self.sessions.add(session)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+                     b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+        sender = asyncio.ensure_future(self.send_events(session, writer))
+        decoder = asyncio.ensure_future(session.run_decoder())
+        try:
+            try:
+                async for pcm in self.read_body(reader, headers):
+                    session.add_audio(pcm)
+                    if decoder.done():
+                        # Surface a decoder failure without waiting for the body.
+                        decoder.result()
+                session.flush_audio()
+                session.closed = True
+                session.audio_ready.set()
+                await decoder
+                # Let translations of the last sentences arrive.
+                if session.translations:
+                    await asyncio.gather(*session.translations, return_exceptions=True)
+                if session.dropped_seconds:
+                    await session.emit({"type": "warning",
+                                        "text": f"{session.dropped_seconds:.1f} s of audio dropped (decoder overloaded)"})
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception as e:
+                print("Error in streaming session:", repr(e))
+                await session.emit({"type": "error", "text": str(e) or repr(e)})
+            await session.emit({"type": "end"})
+            await sender
+        finally:
+            decoder.cancel()
+            sender.cancel()
+            self.sessions.discard(session)
+
+    async def read_body(self, reader, headers):
+        """Yields the request body in pieces, chunked or with Content-Length."""
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    await reader.readline()
+                    return
+                data = await reader.readexactly(size)
+                await reader.readexactly(2)
+                yield data
+        else:
+            remaining = int(headers.get("content-length", 0))
+            while remaining > 0:
+                data = await reader.read(min(remaining, 65536))
+                if not data:
+                    return
+                remaining -= len(data)
+                yield data
+
+    async def send_events(self, session, writer):
+        try:
+            while True:
+                event = await session.events.get()
+                data = (json.dumps(event, ensure_ascii=False) + "\n").encode()
+                writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                await writer.drain()
+                if event["type"] == "end":
+                    writer.write(b"0\r\n\r\n")
+                    await writer.drain()
+                    return
+        except ConnectionError:
+            pass
+
+async def serve(args):
+    from audio.model_registry import get_registry
+    from audio.translator import Translator
+    loop = asyncio.get_running_loop()
+    print(f"Loading Whisper model '{args.model}'...")
+    transcriber = await loop.run_in_executor(None, lambda: get_registry().get(args.model, precision=args.precision))
+    translator = None if args.no_translation else Translator(cache_path=args.translation_cache)
+    server = TranscriptionServer(transcriber, translator, max_sessions=args.max_sessions,
+                                 update_interval=args.update_interval, profile_dir=args.profile_dir)
+    listener = await asyncio.start_server(server.handle, args.host, args.port)
+    print(f"Listening on http://{args.host}:{args.port} (at most {args.max_sessions} sessions)")
+    async with listener:
+        await listener.serve_forever()
+
+async def run_client(args):
+    """
+    Streams a WAV file to the server (in real time unless --fast) and prints
+    the events it sends back.
+    """
+    url = urlparse(args.url)
+    reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+    with wave.open(args.file, "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+            raise SystemExit("The client sends 16-bit mono WAV files")
+        rate = wav.getframerate()
+        query = f"rate={rate}" + (f"&translate={args.translate}" if args.translate else "")
+        writer.write(f"POST /stream?{query} HTTP/1.1\r\nHost: {url.hostname}\r\n"
+                     f"Transfer-Encoding: chunked\r\n\r\n".encode())
+
+        async def send():
+            block = int(rate * 0.1)
+            while True:
+                data = wav.readframes(block)
+                if not data:
+                    break
+                writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                await writer.drain()
+                if not args.fast:
+                    await asyncio.sleep(0.1)
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+
+        # The server answers as soon as it admits (or rejects) the stream,
+        # before any audio has been sent.
+        status = (await reader.readline()).decode().strip()
+        if " 200 " not in status:
+            print(status, (await reader.read()).decode(errors="replace"))
+            writer.close()
+            return 1
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        sending = asyncio.ensure_future(send())
+        started = time.monotonic()
+        while True:
+            size = int((await reader.readline()).strip() or b"0", 16)
+            if size == 0:
+                break
+            event = json.loads(await reader.readexactly(size))
+            await reader.readexactly(2)
+            if event["type"] != "partial" or args.partials:
+                print(f"{time.monotonic() - started:6.2f}s {json.dumps(event, ensure_ascii=False)}", flush=True)
+        await sending
+    writer.close()
+    return 0
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Streaming transcription server.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="run the server")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765)
+    serve_parser.add_argument("--model", default="base",
+                              help="Whisper model name (tiny, base, small, ...) or checkpoint path")
+    serve_parser.add_argument("--precision", default="fp32", choices=["fp32", "int8", "bf16"])
+    serve_parser.add_argument("--max-sessions", type=int, default=8,
+                              help="concurrent streams admitted before answering 503")
+    serve_parser.add_argument("--update-interval", type=float, default=1.0,
+                              help="seconds of new audio between re-decodes of a session")
+    serve_parser.add_argument("--no-translation", action="store_true",
+                              help="ignore translate= requests (no MarianMT models are loaded)")
+    serve_parser.add_argument("--translation-cache", default=None, metavar="PATH",
+                              help="SQLite file that keeps sentence translations across restarts")
+    serve_parser.add_argument("--profile-dir", default="profiles",
+                              help="directory for profiles recorded with POST /profile")
+    client_parser = commands.add_parser("client", help="stream a WAV file to a running server")
+    client_parser.add_argument("file", help="16-bit mono WAV file")
+    client_parser.add_argument("--url", default="http://127.0.0.1:8765")
+    client_parser.add_argument("--translate", default="", help="comma-separated target languages")
+    client_parser.add_argument("--fast", action="store_true", help="send as fast as possible")
+    client_parser.add_argument("--partials", action="store_true", help="also print partial events")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    try:
+        if args.command == "serve":
+            asyncio.run(serve(args))
+        else:
+            return asyncio.run(run_client(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
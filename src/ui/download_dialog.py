@@ -16,9 +16,10 @@ class DownloadProgressDialog(QtWidgets.QDialog):
         
         self.bytes_label = QtWidgets.QLabel("Downloaded: 0 / 0 bytes")
         self.speed_label = QtWidgets.QLabel("Speed: 0.00 bits/s")
+        self.title_label = QtWidgets.QLabel("Downloading Whisper model...")
         
         layout = QtWidgets.QVBoxLayout()
-        layout.addWidget(QtWidgets.QLabel("Downloading Whisper model..."))
+        layout.addWidget(self.title_label)
         layout.addWidget(self.progress_bar)
         layout.addWidget(self.bytes_label)
         layout.addWidget(self.speed_label)
@@ -29,3 +30,12 @@ class DownloadProgressDialog(QtWidgets.QDialog):
         self.progress_bar.setValue(percentage)
         self.bytes_label.setText(f"Downloaded: {downloaded} / {total} bytes")
         self.speed_label.setText(f"Speed: {speed:.2f} bits/s")
+
+    def show_error(self, message):
+        # Leaves the dialog open, closable, with the reason shown.
+        self.title_label.setText(message)
+        self.title_label.setWordWrap(True)
+        self.speed_label.setText("")
+        close_button = QtWidgets.QPushButton("Close")
+        close_button.clicked.connect(self.close)
+        self.layout().addWidget(close_button)
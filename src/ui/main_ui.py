@@ -1,135 +1,229 @@
+from startup_timer import startup_timer
+
 import sys
 import os
-import threading
-import queue
+import re
 import time
+import queue
+import collections
 from PyQt5 import QtWidgets, QtCore
 from PyQt5.QtGui import QTextCursor
+startup_timer.mark("Qt imported")
 
 from download_dialog import DownloadProgressDialog
 from settings_dialog import SettingsDialog
-
-#audio waveform
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-import numpy as np
+from transcript_view import TranscriptView
 
 # Ensure that the parent directory is in the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+# Only light modules are imported up front. torch/whisper are imported by the
+# model loader thread and transformers on the first translation model load.
 from audio.recorder import Recorder
-from audio.transcriber import Transcriber
 from audio.translator import Translator
-from audio.waveform import WaveformUpdater
-
-def is_model_cached(model_name):
-    cache_dir = os.path.expanduser("~/.cache/whisper")
-    model_path = os.path.join(cache_dir, f"{model_name}.pt")
-    return os.path.exists(model_path)
+from audio.translation_cache import default_cache_path
+from audio.fanout import TranslationFanout
+from audio.streaming import IncrementalTranscriber
+from audio.vad import VADSegmenter
+from audio.scheduler import AdaptiveScheduler
+from audio.pipeline import Pipeline, describe, merge_audio, merge_text
+from audio.model_registry import get_registry, SwappableTranscriber
+from audio.metrics import get_metrics, describe_stages
+from audio.cancellation import CancelToken, cancellation
+from audio.profiling import get_profiler
+startup_timer.mark("Audio modules imported")
 
 class ModelLoader(QtCore.QThread):
     # Emit percentage, downloaded bytes, total bytes, and speed (in bits/s)
     loaded = QtCore.pyqtSignal(object)
     progress = QtCore.pyqtSignal(int, int, int, float)
+    stage = QtCore.pyqtSignal(str)
+    # Emitted before weights have to be downloaded.
+    download_needed = QtCore.pyqtSignal()
+    # Emitted with an error message if the model could not be loaded.
+    failed = QtCore.pyqtSignal(str)
 
     def __init__(self, model_name="base", parent=None):
         super().__init__(parent)
         self.model_name = model_name
 
     def run(self):
-        # Simulated download parameters
-        total_bytes = 100 * 1024 * 1024  # Example: 100 MB total
-        downloaded = 0
-        start_time = time.time()
-        
-        while downloaded < total_bytes:
-            time.sleep(0.5)  # simulate waiting for a chunk
-            downloaded += 5 * 1024 * 1024  # simulate a 5 MB chunk
-            if downloaded > total_bytes:
-                downloaded = total_bytes
-            elapsed = time.time() - start_time
-            speed = (downloaded * 8) / elapsed if elapsed > 0 else 0  # bits per second
-            percentage = int((downloaded / total_bytes) * 100)
-            self.progress.emit(percentage, downloaded, total_bytes, speed)
-        
-        # Once "download" is complete, load the model.
-        transcriber = Transcriber(model_name=self.model_name)
+        # The heavy imports happen here, off the GUI thread.
+        from audio.transcriber import model_checkpoint_path
+        self.stage.emit(startup_timer.mark("torch and whisper imported"))
+        checkpoint = model_checkpoint_path(self.model_name)
+        if checkpoint is not None and not os.path.exists(checkpoint):
+            self.download_needed.emit()
+        # Downloads the weights if needed (reporting real byte counts), then
+        # loads them into the shared registry.
+        try:
+            transcriber = get_registry().get(self.model_name,
+                                             download_callback=self.progress.emit,
+                                             stage_callback=self.stage.emit)
+        except Exception as e:
+            self.failed.emit(f"Could not load Whisper model '{self.model_name}': {e}")
+            return
+        self.stage.emit(startup_timer.mark(f"Whisper model '{self.model_name}' ready"))
         self.loaded.emit(transcriber)
 
-class AudioWaveform(FigureCanvas):
-    def __init__(self, parent=None, width=5, height=2, dpi=100):
-        self.fig = Figure(figsize=(width, height), dpi=dpi)
-        self.axes = self.fig.add_subplot(111)
-        super().__init__(self.fig)
-        self.setup_plot()
-
-    def setup_plot(self):
-        # Removing axes for a cleaner look
-        self.axes.axis('off')
-        self.fig.subplots_adjust(left=0, right=1, top=1, bottom=0)  # No margins
+class ProfileStarter(QtCore.QThread):
+    # Emitted with Profiler.start()'s result.
+    done = QtCore.pyqtSignal(bool)
 
-    def update_waveform(self, audio_data):
-        self.axes.clear()
-        self.setup_plot()  # Reset the plot styling after clearing
-
-        # Convert audio data to numpy array (assuming float32 format)
-        audio_array = np.frombuffer(audio_data, dtype=np.float32)
-
-        # Plot the waveform
-        self.axes.plot(audio_array, color='blue', lw=0.5)
+    def __init__(self, profiler, parent=None, **options):
+        super().__init__(parent)
+        self.profiler = profiler
+        self.options = options
 
-        # Update the canvas
-        self.draw()
+    def run(self):
+        # The first start warms up the torch profiler, which takes seconds.
+        self.done.emit(self.profiler.start(**self.options))
 
 class TranscriptionWindow(QtWidgets.QWidget):
+    # Thread-safe route from worker threads to the log pane.
+    log_message = QtCore.pyqtSignal(str)
+    # Written trace paths (or an error message) of a finished profile.
+    profile_finished = QtCore.pyqtSignal(object)
+    # Name of the Whisper model swapped in (by the picker or the scheduler).
+    model_swapped = QtCore.pyqtSignal(str)
+    # Text committed by the transcription thread after Stop closed the queues.
+    final_text = QtCore.pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Transcription UI (PyQt) - Dual Pane with Logs")
         self.resize(800, 600)
         self.selected_device = None
-        self.waveform_audio_queue = queue.Queue()
+        # Incremental mode re-decodes a sliding window every `chunk_duration`
+        # seconds instead of transcribing fixed 5 s segments.
+        self.incremental = True
+        self.chunk_duration = 0.5
+        # Drop silent audio before it reaches Whisper and cut at pauses.
+        self.vad_enabled = True
+        self.max_segment_duration = 10
+        # Segment length without the VAD; the scheduler adapts it (and the
+        # VAD's forced cut length) to how fast decoding keeps up.
+        self.segment_duration = 5
+        self.adaptive_scheduling = True
+        self.scheduler = None
+        # Cancelled by Stop; every run gets a new one.
+        self.cancel_token = CancelToken()
+        # Decode short segments directly instead of through model.transcribe.
+        self.fast_decode = True
+        # Translations are cached on disk so repeated phrases stay cheap
+        # across sessions; None keeps the cache in memory only.
+        self.translation_cache_path = default_cache_path()
 
         # Create UI elements.
         self.start_button = QtWidgets.QPushButton("Start")
         self.stop_button = QtWidgets.QPushButton("Stop")
         self.settings_button = QtWidgets.QPushButton("Settings")
         self.toggle_waveform_button = QtWidgets.QPushButton("Show Waveform")
+        self.toggle_stats_button = QtWidgets.QPushButton("Show Stats")
+        # Records a profile of the next 20 s (or until clicked again).
+        self.profile_button = QtWidgets.QPushButton("Profile")
+        self.profile_button.setCheckable(True)
+        self.profile_duration = 20
+        self.profile_dir = "profiles"
         self.stop_button.setEnabled(False)
         
         self.language_combo = QtWidgets.QComboBox()
         self.language_combo.addItems(["en", "fr", "es", "de", "it", "pt"])
         self.language_combo.setCurrentText("en")
         self.language_combo.currentTextChanged.connect(self.on_language_changed)
+
+        # Whisper model size; switching loads the new model in the background
+        # and swaps it in without stopping transcription.
+        self.model_combo = QtWidgets.QComboBox()
+        self.model_combo.addItems(["tiny", "base", "small", "medium", "large"])
+        self.model_combo.setCurrentText("base")
+        self.model_combo.currentTextChanged.connect(self.on_model_changed)
+
+        # Additional languages translated simultaneously, each in its own pane.
+        self.extra_languages_button = QtWidgets.QToolButton()
+        self.extra_languages_button.setText("More Languages")
+        self.extra_languages_button.setPopupMode(QtWidgets.QToolButton.InstantPopup)
+        self.extra_languages_menu = QtWidgets.QMenu(self)
+        self.extra_languages_button.setMenu(self.extra_languages_menu)
+        self.extra_language_actions = {}
+        self.extra_translation_edits = {}
+        self.extra_translation_queues = {}
+
+        # recording -> audio -> transcription -> transcripts -> translation,
+        # plus the display queues drained by the GUI timer. Every queue is
+        # bounded; audio and text are merged rather than dropped when a
+        # consumer falls behind, waveform frames are simply dropped.
+        self.pipeline = Pipeline()
+        self.stop_event = self.pipeline.stop_event
+        self.audio_queue = self.pipeline.add_queue("audio", 8, "coalesce", merge_audio(30 * 16000))
+        self.english_text_queue = self.pipeline.add_queue("english", 256, "coalesce", merge_text)
+        self.raw_transcription_queue = self.pipeline.add_queue("transcripts", 32, "block")
+        self.translated_text_queue = self.pipeline.add_queue("translation", 256, "coalesce", merge_text)
+        self.waveform_audio_queue = self.pipeline.add_queue("waveform", 4, "drop_oldest")
+        for lang in ["fr", "es", "de", "it", "pt"]:
+            action = self.extra_languages_menu.addAction(lang)
+            action.setCheckable(True)
+            action.toggled.connect(self.on_extra_languages_changed)
+            self.extra_language_actions[lang] = action
+            edit = TranscriptView()
+            edit.setPlaceholderText(lang)
+            edit.hide()
+            self.extra_translation_edits[lang] = edit
+            self.extra_translation_queues[lang] = self.pipeline.add_queue(
+                f"translation-{lang}", 256, "coalesce", merge_text)
         
-        self.english_text_edit = QtWidgets.QTextEdit()
-        self.english_text_edit.setReadOnly(True)
-        self.translated_text_edit = QtWidgets.QTextEdit()
-        self.translated_text_edit.setReadOnly(True)
+        # Workers queue whole segments; the views add the typing effect.
+        self.english_text_edit = TranscriptView()
+        self.translated_text_edit = TranscriptView()
         self.translated_text_edit.hide()
         
         self.log_text_edit = QtWidgets.QTextEdit()
         self.log_text_edit.setReadOnly(True)
 
-        self.waveform_widget = AudioWaveform(self)
-        self.waveform_widget.setVisible(False)
+        # Created the first time the waveform is shown.
+        self.waveform_widget = None
+        self.waveform_visible = False
+
+        # Depth and age of the processing stages' queues.
+        self.pipeline_status = QtWidgets.QLabel()
+
+        # Every stage records timings into the shared metrics. Each decoded
+        # segment gets a trace (captured -> dequeued -> transcribed) that the
+        # GUI timer finishes once its text has been handed to the view.
+        self.metrics = get_metrics()
+        self.metrics.add_collector(
+            "queues", lambda: self.pipeline.stats() + self.translation_fanout.stats())
+        self.pending_traces = collections.deque()
+        self._last_tick = None
+        # Created the first time the stats are shown.
+        self.stats_panel = None
+        self.profiler = get_profiler()
 
         self.text_layout = QtWidgets.QHBoxLayout()
         self.text_layout.addWidget(self.english_text_edit)
         self.text_layout.addWidget(self.translated_text_edit)
+        for edit in self.extra_translation_edits.values():
+            self.text_layout.addWidget(edit)
         
         button_layout = QtWidgets.QHBoxLayout()
         button_layout.addWidget(self.start_button)
         button_layout.addWidget(self.stop_button)
         button_layout.addWidget(self.settings_button)
         button_layout.addWidget(self.toggle_waveform_button)
+        button_layout.addWidget(self.toggle_stats_button)
+        button_layout.addWidget(self.profile_button)
+        button_layout.addWidget(QtWidgets.QLabel("Model:"))
+        button_layout.addWidget(self.model_combo)
         button_layout.addWidget(QtWidgets.QLabel("Target Language:"))
         button_layout.addWidget(self.language_combo)
+        button_layout.addWidget(self.extra_languages_button)
         
         main_layout = QtWidgets.QVBoxLayout()
         main_layout.addLayout(button_layout)
         main_layout.addLayout(self.text_layout)
-        main_layout.addWidget(self.waveform_widget)  
+        main_layout.addWidget(self.pipeline_status)
         main_layout.addWidget(self.log_text_edit)  # Log text box
+        self.main_layout = main_layout
 
         self.setLayout(main_layout)
         
@@ -137,41 +231,63 @@ class TranscriptionWindow(QtWidgets.QWidget):
         self.stop_button.clicked.connect(self.stop_transcription)
         self.settings_button.clicked.connect(self.show_settings)
         self.toggle_waveform_button.clicked.connect(self.toggle_waveform)
+        self.toggle_stats_button.clicked.connect(self.toggle_stats)
+        self.profile_button.toggled.connect(self.toggle_profile)
+        self.profile_finished.connect(self.on_profile_finished)
         self.start_button.setEnabled(False)
         
-        self.audio_queue = queue.Queue()
-        self.english_text_queue = queue.Queue()
-        self.raw_transcription_queue = queue.Queue()
-        self.translated_text_queue = queue.Queue()
-        
-        self.stop_event = threading.Event()
-        
         self.recorder = Recorder(sample_rate=16000, channels=1, dtype="float32")
         self.update_log("Recorder Ready")
         self.recorder.log_signal.connect(self.update_log)
+        self.log_message.connect(self.update_log)
 
-        self.translator = Translator()
+        self.translator = Translator(cache_path=self.translation_cache_path,
+                                     on_model_loaded=self.log_message.emit)
+        self.translation_fanout = TranslationFanout(self.translator)
         self.transcriber = None
         
         self.timer = QtCore.QTimer()
         self.timer.timeout.connect(self.update_text_edits)
         self.timer.start(50)
+        self.status_timer = QtCore.QTimer()
+        self.status_timer.timeout.connect(self.update_pipeline_status)
+        self.status_timer.start(500)
         
         self.model_loader = ModelLoader(model_name="base")
         self.model_loader.loaded.connect(self.on_model_loaded)
+        self.model_loader.stage.connect(self.update_log)
+        self.model_loader.download_needed.connect(self.show_download_dialog)
+        self.model_loader.failed.connect(self.on_model_load_failed)
+        self.model_swapped.connect(self.on_model_swapped)
+        self.final_text.connect(self.english_text_edit.append_text)
+        startup_timer.mark("Window constructed")
+        for line in startup_timer.report():
+            self.update_log(line)
         self.update_log("Ready")
-        
-        if not is_model_cached("base"):
-            self.download_dialog = DownloadProgressDialog(self)
-            self.model_loader.progress.connect(self.download_dialog.update_progress)
-            self.download_dialog.show()
+        # Load the model once the event loop runs, so the window paints first.
+        QtCore.QTimer.singleShot(0, self.on_first_show)
+
+    def on_first_show(self):
+        self.update_log(startup_timer.mark("Window shown"))
         self.model_loader.start()
 
+    def show_download_dialog(self):
+        self.download_dialog = DownloadProgressDialog(self)
+        self.model_loader.progress.connect(self.download_dialog.update_progress)
+        self.download_dialog.show()
+
 
     def toggle_waveform(self):
+        if self.waveform_widget is None:
+            from waveform_view import WaveformView
+            self.waveform_widget = WaveformView(self, sample_rate=self.recorder.target_rate)
+            self.waveform_widget.setVisible(False)
+            # Insert above the status line and log pane.
+            self.main_layout.insertWidget(self.main_layout.count() - 2, self.waveform_widget)
         # Toggle visibility
         visible = self.waveform_widget.isVisible()
         self.waveform_widget.setVisible(not visible)
+        self.waveform_visible = not visible
 
         # Update button text
         if visible:
@@ -179,6 +295,54 @@ class TranscriptionWindow(QtWidgets.QWidget):
         else:
             self.toggle_waveform_button.setText("Hide Waveform")
 
+    def toggle_stats(self):
+        if self.stats_panel is None:
+            from stats_panel import StatsPanel
+            self.stats_panel = StatsPanel(self.metrics, self)
+            self.stats_panel.setVisible(False)
+            self.main_layout.insertWidget(self.main_layout.count() - 1, self.stats_panel)
+        visible = not self.stats_panel.isVisible()
+        self.stats_panel.setVisible(visible)
+        self.toggle_stats_button.setText("Hide Stats" if visible else "Show Stats")
+        if visible:
+            self.stats_panel.refresh()
+
+    def toggle_profile(self, checked):
+        if not checked:
+            # Ends the capture early; on_profile_finished reports the files.
+            self.profiler.stop()
+            return
+        # Disabled until the capture has started off the GUI thread.
+        self.profile_button.setEnabled(False)
+        self.update_log("Starting the profiler...")
+        self.profile_starter = ProfileStarter(self.profiler, self, duration=self.profile_duration,
+                                              output_dir=self.profile_dir,
+                                              on_finished=self.profile_finished.emit)
+        self.profile_starter.done.connect(self.on_profile_started)
+        self.profile_starter.start()
+
+    def on_profile_started(self, started):
+        self.profile_button.setEnabled(True)
+        if started:
+            self.update_log(f"Profiling for up to {self.profile_duration} s "
+                            f"(click Profile again to stop early)")
+        else:
+            self.update_log("A profile is already being recorded")
+            self.profile_button.blockSignals(True)
+            self.profile_button.setChecked(False)
+            self.profile_button.blockSignals(False)
+
+    def on_profile_finished(self, result):
+        if isinstance(result, str):
+            self.update_log(result)
+        else:
+            self.update_log("Profile written to " + ", ".join(result))
+            self.update_log("Open the .json file in https://ui.perfetto.dev; "
+                            "the .folded file works with speedscope or flamegraph.pl")
+        self.profile_button.blockSignals(True)
+        self.profile_button.setChecked(False)
+        self.profile_button.blockSignals(False)
+
     def show_settings(self):
         # Placeholder method for settings dialog
         settings_dialog = SettingsDialog(self)
@@ -191,104 +355,325 @@ class TranscriptionWindow(QtWidgets.QWidget):
         self.log_text_edit.append(message)
         self.log_text_edit.moveCursor(QTextCursor.End) 
 
-    def update_waveform(self, audio_data):
-        # Update the waveform widget using the audio data signal
-        self.waveform_widget.update_waveform(audio_data)
+    def update_waveform(self):
+        # Runs on the GUI thread. The view only copies the blocks into its
+        # ring; it repaints on its own frame timer.
+        try:
+            while True:
+                audio_data = self.waveform_audio_queue.get_nowait()
+                if self.waveform_visible:
+                    self.waveform_widget.update_waveform(audio_data)
+        except queue.Empty:
+            pass
+
+    def update_pipeline_status(self):
+        stages = [stats for stats in self.pipeline.stats()
+                  if stats["name"] in ("audio", "transcripts")]
+        stages += self.translation_fanout.stats()
+        status = describe(stages)
+        latency = describe_stages(self.metrics.snapshot())
+        if latency:
+            status += "\n" + latency
+        self.pipeline_status.setText(status)
+        if self.stats_panel is not None and self.stats_panel.isVisible():
+            self.stats_panel.refresh()
 
     def on_model_loaded(self, transcriber):
-        self.transcriber = transcriber
+        self.transcriber = SwappableTranscriber(transcriber, model_name=self.model_loader.model_name,
+                                                on_switched=self.log_message.emit,
+                                                on_model_changed=self.model_swapped.emit)
+        # Honour a model picked while the first one was still loading.
+        self.on_model_changed(self.model_combo.currentText())
         self.start_button.setEnabled(True)
         if hasattr(self, 'download_dialog'):
             self.download_dialog.close()
     
+    def on_model_load_failed(self, message):
+        self.update_log(message)
+        self.update_log("Pick a model to try again.")
+        if hasattr(self, 'download_dialog') and self.download_dialog.isVisible():
+            self.download_dialog.show_error(message)
+
+    def on_model_swapped(self, model_name):
+        # Keep the picker in line with the active model (the scheduler may
+        # have stepped down) without starting another switch.
+        self.model_combo.blockSignals(True)
+        self.model_combo.setCurrentText(model_name)
+        self.model_combo.blockSignals(False)
+
+    def on_model_changed(self, model_name):
+        if self.transcriber is None:
+            # The first load failed: retry with the picked model.
+            if not self.model_loader.isRunning():
+                self.model_loader.model_name = model_name
+                self.model_loader.start()
+            return
+        if self.transcriber.switch(model_name) is not None:
+            self.update_log(f"Loading Whisper model '{model_name}' in the background...")
+
     def on_language_changed(self, lang):
         if lang.lower() == "en":
             self.translated_text_edit.hide()
         else:
             self.translated_text_edit.show()
+            # Load the model now rather than on the first translated segment.
+            self.translator.preload(lang)
+        self.on_extra_languages_changed()
+
+    def on_extra_languages_changed(self, checked=None):
+        primary = self.language_combo.currentText().lower()
+        for lang, edit in self.extra_translation_edits.items():
+            selected = self.extra_language_actions[lang].isChecked()
+            edit.setVisible(selected and lang != primary)
+            if selected:
+                self.translator.preload(lang)
+        # Running workers pick up the new set of languages immediately.
+        if self.stop_button.isEnabled():
+            self.translation_fanout.set_targets(self.translation_sinks())
+
+    def translation_sinks(self):
+        """
+        Maps every active target language to the function that displays its
+        translations.
+        """
+        sinks = {}
+        primary = self.language_combo.currentText().lower()
+        if primary != "en":
+            sinks[primary] = lambda segments: self.show_translations(self.translated_text_queue, segments)
+        for lang, action in self.extra_language_actions.items():
+            if action.isChecked() and lang not in sinks:
+                text_queue = self.extra_translation_queues[lang]
+                sinks[lang] = lambda segments, q=text_queue: self.show_translations(q, segments)
+        return sinks
     
     def start_transcription(self):
         if self.transcriber is None:
             QtWidgets.QMessageBox.warning(self, "Model not loaded", "The transcription model is still loading. Please wait.")
             return
+        if self.pipeline.running():
+            # The previous run is still shutting down.
+            return
         self.start_button.setEnabled(False)
         self.stop_button.setEnabled(True)
         self.english_text_edit.clear()
         self.translated_text_edit.clear()
-        self.stop_event.clear()
+        for edit in self.extra_translation_edits.values():
+            edit.clear()
+        self.cancel_token = CancelToken()
+        self.pending_traces.clear()
+        self.scheduler = None
+        if self.adaptive_scheduling and not self.incremental:
+            self.scheduler = AdaptiveScheduler(
+                segment_duration=self.max_segment_duration if self.vad_enabled else self.segment_duration,
+                max_segment=max(15, self.max_segment_duration),
+                sample_rate=self.recorder.target_rate, transcriber=self.transcriber,
+                on_event=self.log_message.emit)
         
-        self.recording_thread = threading.Thread(target=self.recording_loop, daemon=True)
-        self.transcription_thread = threading.Thread(target=self.transcription_loop, daemon=True)
-        self.translation_thread = threading.Thread(target=self.translation_loop, daemon=True)
-        self.waveform_thread = WaveformUpdater(self.waveform_widget, self.waveform_audio_queue, self.stop_event)
-        
-        self.recording_thread.start()
-        self.transcription_thread.start()
-        self.translation_thread.start()
-        self.waveform_thread.start()
+        self.pipeline.start({
+            "recording": self.recording_loop,
+            "transcription": self.transcription_loop,
+            "translation": self.translation_loop,
+        })
     
     def stop_transcription(self):
-        self.stop_event.set()
-        self.start_button.setEnabled(True)
+        # Closing the queues wakes blocked stages, stopping the stream wakes
+        # the capture read and cancelling interrupts a running decode.
+        self.pipeline.stop()
+        self.recorder.stop_stream()
+        self.cancel_token.cancel()
+        self.translation_fanout.stop()
         self.stop_button.setEnabled(False)
+        self.wait_for_shutdown()
+        if self.translator.cache is not None:
+            stats = self.translator.cache.stats()
+            self.update_log(f"Translation cache: {stats['hits']} hits, {stats['misses']} misses "
+                            f"({stats['hit_rate']:.0%} hit rate)")
     
+    def wait_for_shutdown(self):
+        # Start is only re-enabled once every stage thread has exited.
+        if self.pipeline.running() or not self.translation_fanout.join(timeout=0):
+            QtCore.QTimer.singleShot(100, self.wait_for_shutdown)
+            return
+        self.start_button.setEnabled(True)
+
     def recording_loop(self):
-        segment_duration = 5
-        while not self.stop_event.is_set():
-            audio_data = self.recorder.record(segment_duration)
-            if audio_data is not None:
-                self.audio_queue.put(audio_data)
-                self.waveform_widget.update_waveform(audio_data)
-            time.sleep(0.1)
+        segment_duration = self.segment_duration
+        if self.incremental or self.vad_enabled:
+            segment_duration = self.chunk_duration
+        segmenter = None
+        if self.vad_enabled:
+            segmenter = VADSegmenter(sample_rate=self.recorder.target_rate,
+                                     max_segment=self.max_segment_duration)
+        scheduler = self.scheduler
+        if scheduler is not None:
+            scheduler.attach_segmenter(segmenter)
+        self.recorder.start_stream()
+        try:
+            while not self.stop_event.is_set():
+                if scheduler is not None and segmenter is None:
+                    segment_duration = scheduler.segment_duration
+                # Wake up periodically so a stop request is noticed promptly.
+                audio_data = self.recorder.read(segment_duration, timeout=0.5)
+                if audio_data is not None:
+                    # The ring buffer hands out views; the queue needs its own copy.
+                    audio_data = audio_data.copy()
+                    if self.waveform_visible:
+                        self.waveform_audio_queue.put(audio_data)
+                    self.queue_audio(audio_data, segmenter)
+        finally:
+            self.recorder.stop_stream()
+            # Stop cancels decodes and closes the queues first, so the
+            # segment still in the VAD is discarded like the queued ones.
+            if segmenter is not None:
+                self.recorder.log_signal.emit(segmenter.report())
+
+    def queue_audio(self, audio_data, segmenter):
+        """
+        Passes captured audio to the transcription thread, through the VAD
+        when enabled. In incremental mode a None item marks the end of an
+        utterance.
+        """
+        if segmenter is None:
+            self.audio_queue.put(audio_data)
+        elif self.incremental:
+            speech, pause = segmenter.gate(audio_data)
+            if speech is not None:
+                self.audio_queue.put(speech)
+            if pause:
+                self.audio_queue.put(None)
+        else:
+            for segment in segmenter.feed(audio_data):
+                self.audio_queue.put(segment)
     
     def transcription_loop(self):
+        # Stop cancels this run's decodes only, whichever model they run on.
+        with cancellation(self.cancel_token):
+            if self.incremental:
+                self.incremental_transcription_loop()
+            else:
+                self.segment_transcription_loop()
+
+    def segment_transcription_loop(self):
         while not self.stop_event.is_set():
             try:
-                audio_data = self.audio_queue.get(timeout=1)
+                if self.scheduler is None:
+                    audio_data = self.audio_queue.get(timeout=1)
+                else:
+                    audio_data = self.scheduler.next_segment(self.audio_queue, timeout=1)
             except queue.Empty:
                 continue
-            for english_segment in self.transcriber.transcribe_stream(audio_data):
-                for char in english_segment:
-                    self.english_text_queue.put(char)
-                    time.sleep(0.03)
-                self.english_text_queue.put("\n")
+            trace = self.metrics.start_trace(captured_at=self.audio_queue.last_enqueued)
+            trace.mark("dequeued")
+            with self.profiler.segment(trace.id):
+                if self.scheduler is None:
+                    segments = list(self.transcriber.transcribe_stream(audio_data, fast=self.fast_decode))
+                else:
+                    segments = self.scheduler.transcribe(self.transcriber, audio_data,
+                                                         queue_depth=self.audio_queue.qsize(),
+                                                         fast=self.fast_decode)
+            trace.mark("transcribed")
+            for english_segment in segments:
+                self.english_text_queue.put(english_segment + "\n")
                 self.raw_transcription_queue.put(english_segment)
+            # Queued after the text, so the GUI never finishes it early.
+            self.pending_traces.append(trace)
             self.audio_queue.task_done()
+
+    def incremental_transcription_loop(self):
+        engine = IncrementalTranscriber(self.transcriber, update_interval=self.chunk_duration)
+        sentence = ""
+        while not self.stop_event.is_set():
+            try:
+                chunks = [self.audio_queue.get(timeout=1)]
+            except queue.Empty:
+                continue
+            # Fold in anything that queued up during the last decode so one
+            # update covers it.
+            while True:
+                try:
+                    chunks.append(self.audio_queue.get_nowait())
+                except queue.Empty:
+                    break
+            # Timed from the newest chunk, whose words this update can commit.
+            trace = self.metrics.start_trace(captured_at=self.audio_queue.last_enqueued)
+            trace.mark("dequeued")
+            shown = False
+            with self.profiler.segment(trace.id):
+                for audio_data in chunks:
+                    if audio_data is None:
+                        # The speaker paused: finalise the utterance.
+                        text = engine.finish()
+                        shown = shown or bool(text)
+                        sentence = self.emit_committed_text(text, sentence, flush=True)
+                    else:
+                        engine.insert_audio(audio_data)
+                    self.audio_queue.task_done()
+                committed, _ = engine.process()
+            trace.mark("transcribed")
+            sentence = self.emit_committed_text(committed, sentence)
+            if shown or committed:
+                self.pending_traces.append(trace)
+        # Stopped: keep the words that were still tentative. Decodes are
+        # cancelled by now, so the last hypothesis is committed as it is.
+        text = engine.finish(decode=False)
+        if text:
+            self.final_text.emit(text + "\n")
+
+    def emit_committed_text(self, text, sentence, flush=False):
+        """
+        Shows newly committed text and forwards complete sentences to the
+        translation thread. Returns the unfinished sentence.
+        """
+        sentence += text
+        if sentence.strip() and (flush or re.search(r"[.!?]\s*$", sentence)):
+            text += "\n"
+            self.raw_transcription_queue.put(sentence.strip())
+            sentence = ""
+        if text:
+            self.english_text_queue.put(text)
+        return sentence
     
     def translation_loop(self):
+        # Hand every English segment to one worker per target language.
+        self.translation_fanout.set_targets(self.translation_sinks())
         while not self.stop_event.is_set():
             try:
                 english_segment = self.raw_transcription_queue.get(timeout=1)
             except queue.Empty:
                 continue
-            target_lang = self.language_combo.currentText().lower()
-            if target_lang != "en":
-                translated_segment = self.translator.translate(english_segment, target_lang)
-            else:
-                translated_segment = ""
-            for char in translated_segment:
-                self.translated_text_queue.put(char)
-                time.sleep(0.03)
-            self.translated_text_queue.put("\n")
+            self.translation_fanout.submit(english_segment)
             self.raw_transcription_queue.task_done()
+        self.translation_fanout.stop()
+
+    def show_translations(self, text_queue, translated_segments):
+        text_queue.put("".join(segment + "\n" for segment in translated_segments))
     
     def update_text_edits(self):
-        try:
-            while True:
-                char = self.english_text_queue.get_nowait()
-                self.english_text_edit.moveCursor(QTextCursor.End)
-                self.english_text_edit.insertPlainText(char)
-                self.english_text_queue.task_done()
-        except queue.Empty:
-            pass
-        try:
-            while True:
-                char = self.translated_text_queue.get_nowait()
-                self.translated_text_edit.moveCursor(QTextCursor.End)
-                self.translated_text_edit.insertPlainText(char)
-                self.translated_text_queue.task_done()
-        except queue.Empty:
-            pass
+        started = time.perf_counter()
+        interval = self.timer.interval() / 1000.0
+        if self._last_tick is not None:
+            # How late this tick is: a busy GUI thread shows up here.
+            self.metrics.observe("gui.tick_delay", max(0.0, started - self._last_tick - interval))
+        self._last_tick = started
+        # Only traces queued before the text queues are drained are shown now.
+        ready = len(self.pending_traces)
+        if self.waveform_widget is not None:
+            self.update_waveform()
+        panes = [(self.english_text_queue, self.english_text_edit),
+                 (self.translated_text_queue, self.translated_text_edit)]
+        panes += [(self.extra_translation_queues[lang], edit)
+                  for lang, edit in self.extra_translation_edits.items()]
+        for text_queue, edit in panes:
+            try:
+                while True:
+                    edit.append_text(text_queue.get_nowait())
+            except queue.Empty:
+                pass
+            # At most one document edit per pane per tick.
+            edit.tick(interval)
+        for _ in range(ready):
+            self.metrics.finish_trace(self.pending_traces.popleft())
+        self.metrics.observe("gui.update", time.perf_counter() - started)
 
 if __name__ == "__main__":
     app = QtWidgets.QApplication(sys.argv)
@@ -1,9 +1,14 @@
 from PyQt5 import QtWidgets, QtCore
-from audio.transcriber import Transcriber
+from audio.model_registry import get_registry
 
 class ModelLoaderThread(QtCore.QThread):
     # Signal that sends the loaded transcriber when finished.
     modelLoaded = QtCore.pyqtSignal(object)
+    # Overall progress (0-100) and a description of the current stage.
+    progress = QtCore.pyqtSignal(int)
+    stage = QtCore.pyqtSignal(str)
+    # Emitted with an error message if the model could not be loaded.
+    failed = QtCore.pyqtSignal(str)
     
     def __init__(self, model_name="base", parent=None):
         super().__init__(parent)
@@ -11,19 +16,27 @@ class ModelLoaderThread(QtCore.QThread):
 
     def run(self):
         # Load the Whisper model (this may download it if not cached).
-        transcriber = Transcriber(model_name=self.model_name)
+        try:
+            transcriber = get_registry().get(self.model_name,
+                                             progress_callback=self.progress.emit,
+                                             stage_callback=self.stage.emit)
+        except Exception as e:
+            self.failed.emit(f"Could not load Whisper model '{self.model_name}': {e}")
+            return
         self.modelLoaded.emit(transcriber)
 
 class ModelLoaderDialog(QtWidgets.QDialog):
     """
     A modal dialog that shows a progress bar while the Whisper model is loaded.
     When finished, the loaded Transcriber is available via getTranscriber().
+    If loading fails, the dialog shows the reason and is rejected when closed.
     """
     def __init__(self, model_name="base", parent=None):
         super().__init__(parent)
         self.setWindowTitle("Loading Whisper Model")
         self.resize(400, 150)
         self.model_name = model_name
+        self.transcriber = None
 
         # Create UI elements.
         self.label = QtWidgets.QLabel("Loading Whisper model. Please wait...", self)
@@ -37,32 +50,31 @@ class ModelLoaderDialog(QtWidgets.QDialog):
         layout.addWidget(self.progressBar)
         self.setLayout(layout)
 
-        # Start the loader thread.
+        # Start the loader thread; it reports the real download/load progress.
         self.loaderThread = ModelLoaderThread(model_name=self.model_name)
         self.loaderThread.modelLoaded.connect(self.onModelLoaded)
+        self.loaderThread.progress.connect(self.progressBar.setValue)
+        self.loaderThread.stage.connect(self.label.setText)
+        self.loaderThread.failed.connect(self.onModelLoadFailed)
         self.loaderThread.start()
 
-        # Timer to simulate progress updates.
-        self.timer = QtCore.QTimer(self)
-        self.timer.timeout.connect(self.updateProgress)
-        self.timer.start(100)  # update every 100 ms
-        self.currentProgress = 0
-
-    def updateProgress(self):
-        # Simulate progress until near completion.
-        if self.currentProgress < 90:
-            self.currentProgress += 5
-            self.progressBar.setValue(self.currentProgress)
-        else:
-            self.progressBar.setValue(100)
-
     def onModelLoaded(self, transcriber):
-        # Stop the timer, record the loaded model, and close the dialog.
-        self.timer.stop()
+        # Record the loaded model and close the dialog.
+        self.progressBar.setValue(100)
         self.transcriber = transcriber
         self.accept()
 
+    def onModelLoadFailed(self, message):
+        # Leave the dialog open, closable, with the reason shown.
+        print(message)
+        self.label.setText(message)
+        self.label.setWordWrap(True)
+        self.progressBar.hide()
+        closeButton = QtWidgets.QPushButton("Close", self)
+        closeButton.clicked.connect(self.reject)
+        self.layout().addWidget(closeButton)
+
     def getTranscriber(self):
-        """Return the loaded Transcriber instance."""
+        """Return the loaded Transcriber instance (None if loading failed)."""
         return self.transcriber
 
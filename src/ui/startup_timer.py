@@ -0,0 +1,32 @@
+import time
+
+class StartupTimer:
+    """
+    Records named checkpoints measured from the moment this module was
+    first imported, to show where start-up time goes.
+    """
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.marks = []
+
+    def mark(self, label):
+        """
+        Records a checkpoint and returns a log line describing it.
+        """
+        elapsed = time.perf_counter() - self.origin
+        previous = self.marks[-1][1] if self.marks else 0.0
+        self.marks.append((label, elapsed))
+        return f"[startup] {label}: +{elapsed - previous:.2f} s (at {elapsed:.2f} s)"
+
+    def report(self):
+        """Returns one log line per checkpoint recorded so far."""
+        lines = []
+        previous = 0.0
+        for label, elapsed in self.marks:
+            lines.append(f"[startup] {label}: +{elapsed - previous:.2f} s (at {elapsed:.2f} s)")
+            previous = elapsed
+        return lines
+
+# Process-wide timer; import this module first so its origin is close to
+# process start.
+startup_timer = StartupTimer()
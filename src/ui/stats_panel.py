@@ -0,0 +1,85 @@
+from PyQt5 import QtWidgets
+
+class StatsPanel(QtWidgets.QWidget):
+    """
+    Live table of the pipeline metrics: latency percentiles of every stage
+    and model, counters and gauges, and the depth and drop count of every
+    queue. refresh() updates the rows in place, so it is cheap enough for the
+    window's status timer; Export saves a JSON snapshot.
+    """
+    COLUMNS = ["Metric", "Count / value", "p50 (ms)", "p90 (ms)", "p99 (ms)", "Max (ms)"]
+
+    def __init__(self, metrics, parent=None):
+        """
+        Parameters:
+            metrics (Metrics): Source of the snapshots shown.
+        """
+        super().__init__(parent)
+        self.metrics = metrics
+        self.tree = QtWidgets.QTreeWidget()
+        self.tree.setColumnCount(len(self.COLUMNS))
+        self.tree.setHeaderLabels(self.COLUMNS)
+        self.tree.setRootIsDecorated(True)
+        self.tree.setMinimumHeight(160)
+        self._groups = {}
+        self._rows = {}
+        for group in ("Latency", "Queues", "Counters", "Gauges"):
+            item = QtWidgets.QTreeWidgetItem([group])
+            self.tree.addTopLevelItem(item)
+            item.setExpanded(True)
+            self._groups[group] = item
+
+        self.reset_button = QtWidgets.QPushButton("Reset")
+        self.reset_button.clicked.connect(self.reset)
+        self.export_button = QtWidgets.QPushButton("Export...")
+        self.export_button.clicked.connect(self.export)
+        buttons = QtWidgets.QHBoxLayout()
+        buttons.addStretch()
+        buttons.addWidget(self.reset_button)
+        buttons.addWidget(self.export_button)
+        layout = QtWidgets.QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.tree)
+        layout.addLayout(buttons)
+        self.setLayout(layout)
+
+    def _set_row(self, group, name, values):
+        item = self._rows.get((group, name))
+        if item is None:
+            item = QtWidgets.QTreeWidgetItem(self._groups[group], [name])
+            self._rows[(group, name)] = item
+        for column, value in enumerate(values, 1):
+            item.setText(column, value)
+
+    def refresh(self):
+        snapshot = self.metrics.snapshot()
+        for name, summary in snapshot["histograms"].items():
+            # Batch sizes are counts, everything else is seconds.
+            scale = 1 if name.endswith("batch_size") else 1000
+            self._set_row("Latency", name, [str(summary["count"])] + [
+                f"{summary[key] * scale:.1f}" for key in ("p50", "p90", "p99", "max")])
+        for stage in snapshot.get("queues", []):
+            value = f"{stage['depth']}/{stage['maxsize'] or '-'}"
+            if stage["dropped"]:
+                value += f", {stage['dropped']} dropped"
+            if stage["coalesced"]:
+                value += f", {stage['coalesced']} merged"
+            self._set_row("Queues", stage["name"], [value])
+        for name, value in snapshot["counters"].items():
+            self._set_row("Counters", name, [str(value)])
+        for name, value in snapshot["gauges"].items():
+            self._set_row("Gauges", name, [f"{value:.3g}" if isinstance(value, float) else str(value)])
+        self.tree.resizeColumnToContents(0)
+
+    def reset(self):
+        self.metrics.reset()
+        for (group, _), item in self._rows.items():
+            self._groups[group].removeChild(item)
+        self._rows.clear()
+        self.refresh()
+
+    def export(self):
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export Metrics", "metrics.json",
+                                                        "JSON files (*.json)")
+        if path:
+            self.metrics.export(path)
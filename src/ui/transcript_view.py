@@ -0,0 +1,49 @@
+import math
+from PyQt5 import QtWidgets
+from PyQt5.QtGui import QTextCursor
+
+class TranscriptView(QtWidgets.QTextEdit):
+    """
+    Read-only text pane that receives whole words and segments.
+
+    append_text() only buffers; tick() (called from the window's GUI timer)
+    moves the next part of the buffer into the document with a single edit.
+    The typing effect is produced here by revealing ``chars_per_second``
+    characters per second, speeding up when a backlog builds so the view
+    never falls far behind, instead of by worker threads sleeping between
+    characters.
+    """
+    def __init__(self, parent=None, chars_per_second=33, typing_effect=True):
+        """
+        Parameters:
+            chars_per_second (float): Reveal rate of the typing effect.
+            typing_effect (bool): If False, buffered text appears on the next tick.
+        """
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.chars_per_second = chars_per_second
+        self.typing_effect = typing_effect
+        self._pending = ""
+
+    def append_text(self, text):
+        self._pending += text
+
+    def clear(self):
+        self._pending = ""
+        super().clear()
+
+    def tick(self, interval):
+        """
+        Reveals buffered text for a timer tick of ``interval`` seconds.
+        """
+        if not self._pending:
+            return
+        if self.typing_effect:
+            # Keep up with a backlog by also revealing a fifth of it per tick.
+            count = max(math.ceil(self.chars_per_second * interval),
+                        math.ceil(len(self._pending) / 5))
+        else:
+            count = len(self._pending)
+        chunk, self._pending = self._pending[:count], self._pending[count:]
+        self.moveCursor(QTextCursor.End)
+        self.insertPlainText(chunk)
@@ -0,0 +1,83 @@
+import numpy as np
+from PyQt5 import QtCore, QtGui, QtWidgets
+
+class WaveformView(QtWidgets.QWidget):
+    """
+    Scrolling view of the most recent audio.
+
+    Incoming blocks are copied into a ring of the last ``history_seconds`` of
+    samples; nothing is drawn when they arrive. A timer repaints at a fixed
+    frame rate if new audio came in, and each repaint reduces the ring to one
+    min/max pair per pixel column, so drawing costs the same whatever the
+    sample rate or history length. All methods must be called on the GUI
+    thread.
+    """
+    def __init__(self, parent=None, sample_rate=16000, history_seconds=5.0, fps=30):
+        """
+        Parameters:
+            sample_rate (int): Rate of the appended audio.
+            history_seconds (float): Length of audio shown across the widget.
+            fps (int): Maximum repaint rate.
+        """
+        super().__init__(parent)
+        self.setMinimumHeight(80)
+        self.setAttribute(QtCore.Qt.WA_OpaquePaintEvent)
+        self._ring = np.zeros(int(sample_rate * history_seconds), dtype=np.float32)
+        self._write_pos = 0
+        self._dirty = False
+        self._pen = QtGui.QPen(QtGui.QColor("blue"))
+        self._timer = QtCore.QTimer(self)
+        self._timer.timeout.connect(self._on_frame)
+        self._timer.start(int(1000 / fps))
+
+    def update_waveform(self, audio_data):
+        """Appends a block of mono float32 audio to the ring."""
+        audio = np.asarray(audio_data, dtype=np.float32).reshape(-1)
+        size = len(self._ring)
+        if len(audio) >= size:
+            self._ring[:] = audio[-size:]
+            self._write_pos = 0
+        else:
+            start = self._write_pos
+            first = min(len(audio), size - start)
+            self._ring[start:start + first] = audio[:first]
+            self._ring[:len(audio) - first] = audio[first:]
+            self._write_pos = (start + len(audio)) % size
+        self._dirty = True
+
+    def clear(self):
+        self._ring[:] = 0.0
+        self._write_pos = 0
+        self._dirty = True
+
+    def _on_frame(self):
+        if self._dirty and self.isVisible():
+            self._dirty = False
+            self.update()
+
+    def envelope(self, columns):
+        """
+        Returns per-column (min, max) arrays of the ring, oldest audio first.
+        """
+        samples = np.roll(self._ring, -self._write_pos)
+        per_column = max(1, -(-len(samples) // columns))
+        columns = len(samples) // per_column
+        blocks = samples[-columns * per_column:].reshape(columns, per_column)
+        return blocks.min(axis=1), blocks.max(axis=1)
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        painter.fillRect(self.rect(), QtCore.Qt.white)
+        width, height = self.width(), self.height()
+        if width <= 0:
+            return
+        lows, highs = self.envelope(width)
+        mid = height / 2.0
+        scale = mid * 0.95
+        painter.setPen(self._pen)
+        # Right-align so the newest audio is always at the right edge.
+        offset = width - len(lows)
+        lines = [QtCore.QLineF(offset + x, mid - high * scale, offset + x, mid - low * scale)
+                 for x, (low, high) in enumerate(zip(lows.tolist(), highs.tolist()))]
+        painter.drawLines(lines)
+        painter.end()
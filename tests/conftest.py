@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules import each other as top-level packages (audio.x), as when run from src/.
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "src"))
@@ -0,0 +1,37 @@
+import types
+
+import numpy as np
+import pytest
+
+from audio.metrics import get_metrics
+from server import SAMPLE_RATE, Session
+
+def speech_like(seconds=3.0, rate=SAMPLE_RATE):
+    # Quiet noise, then a voiced, syllable-modulated tone, then quiet noise.
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * rate)) / rate
+    voiced = sum(np.sin(2 * np.pi * 150 * k * t) / k for k in range(1, 8))
+    voiced *= 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t) ** 2
+    envelope = (t > 0.5) & (t < seconds - 0.5)
+    audio = 0.3 * voiced * envelope + 0.001 * rng.standard_normal(len(t))
+    return (np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes()
+
+def make_session():
+    server = types.SimpleNamespace(transcriber=None, update_interval=1.0, max_backlog=60.0,
+                                   metrics=get_metrics())
+    return Session(server, SAMPLE_RATE, [])
+
+def stream(pcm, piece_bytes):
+    session = make_session()
+    for start in range(0, len(pcm), piece_bytes):
+        session.add_audio(pcm[start:start + piece_bytes])
+    session.flush_audio()
+    return session.pending_samples
+
+@pytest.mark.parametrize("piece_samples", [160, 77])
+def test_sub_frame_pieces_pass_speech(piece_samples):
+    pcm = speech_like()
+    passed = stream(pcm, piece_samples * 2)
+    # All 2 s of speech, as when the same audio arrives in 0.1 s pieces.
+    assert passed >= 2 * SAMPLE_RATE
+    assert passed == stream(pcm, SAMPLE_RATE // 10 * 2)
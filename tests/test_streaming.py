@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+whisper = pytest.importorskip("whisper")
+
+from audio.mel_frontend import HOP_LENGTH
+from audio.streaming import IncrementalTranscriber
+
+class MelTranscriber:
+    # Enough of a Transcriber for the engine to use the mel frontend.
+    n_mels = 80
+
+    def decode_words(self, mel, num_frames, initial_prompt=None, language=None):
+        return []
+
+def test_trimmed_window_matches_whisper():
+    rng = np.random.default_rng(0)
+    t = np.arange(12 * 16000) / 16000
+    audio = (0.3 * np.sin(2 * np.pi * 220 * t) * (np.sin(2 * np.pi * 3 * t) > 0)
+             + 0.01 * rng.standard_normal(len(t))).astype(np.float32)
+    engine = IncrementalTranscriber(MelTranscriber())
+    for start in range(0, len(audio), 1600):
+        engine.insert_audio(audio[start:start + 1600])
+    # Commit up to a point between two frames.
+    engine._trim((3 * 16000 + 77) / 16000)
+
+    frontend = engine.frontend
+    start = frontend.total_samples - len(engine.buffer)
+    assert start % HOP_LENGTH == 0
+    assert engine.buffer_offset == start / 16000
+    mel, num_frames = frontend.window(start)
+    expected = whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(engine.buffer)))
+    # The first two frames reach before the cut: Whisper reflects the window
+    # there, while the stream still has the real audio.
+    assert torch.allclose(mel[:, 2:], expected[:, 2:], atol=1e-4)